@@ -1,3 +1,4 @@
 __version__ = "0.1.0"
 
-from .dlmm import DLMM_CLIENT
\ No newline at end of file
+from .dlmm import DLMM_CLIENT
+from .transport import Transport
\ No newline at end of file
@@ -0,0 +1,305 @@
+'''
+Zero-copy decoders for the DLMM program accounts.
+
+Each account is described by a packed NumPy structured dtype that mirrors the Anchor layout in
+`ts-client/src/dlmm/idl.ts`. Decoding is `np.frombuffer` over the raw account data, so nothing is
+copied until a field is actually read. `u128` fields are stored as `(lo, hi)` pairs of `u64`; use
+`u128_to_int` for exact values or `q64_to_float` for Q64.64 prices.
+'''
+import hashlib
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+from solders.pubkey import Pubkey
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+LB_CLMM_PROGRAM_ID = Pubkey.from_string("LBUZKhRxPF3XUpBCjp4YzTKgLccjZhTSDM9YuVaPwxo")
+
+MAX_BIN_PER_ARRAY = 70
+MAX_BIN_PER_POSITION = 70
+BIN_ARRAY_BITMAP_SIZE = 512
+EXTENSION_BINARRAY_BITMAP_SIZE = 12
+NUM_REWARDS = 2
+SCALE_OFFSET = 64
+BASIS_POINT_MAX = 10000
+
+DISCRIMINATOR_SIZE = 8
+
+U128 = np.dtype([("lo", "<u8"), ("hi", "<u8")])
+PUBKEY = np.dtype(("u1", 32))
+
+STATIC_PARAMETERS = np.dtype([
+    ("base_factor", "<u2"),
+    ("filter_period", "<u2"),
+    ("decay_period", "<u2"),
+    ("reduction_factor", "<u2"),
+    ("variable_fee_control", "<u4"),
+    ("max_volatility_accumulator", "<u4"),
+    ("min_bin_id", "<i4"),
+    ("max_bin_id", "<i4"),
+    ("protocol_share", "<u2"),
+    ("padding", "u1", 6),
+])
+
+VARIABLE_PARAMETERS = np.dtype([
+    ("volatility_accumulator", "<u4"),
+    ("volatility_reference", "<u4"),
+    ("index_reference", "<i4"),
+    ("padding", "u1", 4),
+    ("last_update_timestamp", "<i8"),
+    ("padding1", "u1", 8),
+])
+
+REWARD_INFO = np.dtype([
+    ("mint", PUBKEY),
+    ("vault", PUBKEY),
+    ("funder", PUBKEY),
+    ("reward_duration", "<u8"),
+    ("reward_duration_end", "<u8"),
+    ("reward_rate", U128),
+    ("last_update_time", "<u8"),
+    ("cumulative_seconds_with_empty_liquidity_reward", "<u8"),
+])
+
+LB_PAIR = np.dtype([
+    ("parameters", STATIC_PARAMETERS),
+    ("v_parameters", VARIABLE_PARAMETERS),
+    ("bump_seed", "u1", 1),
+    ("bin_step_seed", "u1", 2),
+    ("pair_type", "u1"),
+    ("active_id", "<i4"),
+    ("bin_step", "<u2"),
+    ("status", "u1"),
+    ("require_base_factor_seed", "u1"),
+    ("base_factor_seed", "u1", 2),
+    ("activation_type", "u1"),
+    ("padding0", "u1"),
+    ("token_x_mint", PUBKEY),
+    ("token_y_mint", PUBKEY),
+    ("reserve_x", PUBKEY),
+    ("reserve_y", PUBKEY),
+    ("protocol_fee_amount_x", "<u8"),
+    ("protocol_fee_amount_y", "<u8"),
+    ("padding1", "u1", 32),
+    ("reward_infos", REWARD_INFO, NUM_REWARDS),
+    ("oracle", PUBKEY),
+    ("bin_array_bitmap", "<u8", 16),
+    ("last_updated_at", "<i8"),
+    ("padding2", "u1", 32),
+    ("pre_activation_swap_address", PUBKEY),
+    ("base_key", PUBKEY),
+    ("activation_point", "<u8"),
+    ("pre_activation_duration", "<u8"),
+    ("padding3", "u1", 8),
+    ("padding4", "<u8"),
+    ("creator", PUBKEY),
+    ("reserved", "u1", 24),
+])
+
+BIN = np.dtype([
+    ("amount_x", "<u8"),
+    ("amount_y", "<u8"),
+    ("price", U128),
+    ("liquidity_supply", U128),
+    ("reward_per_token_stored", U128, NUM_REWARDS),
+    ("fee_amount_x_per_token_stored", U128),
+    ("fee_amount_y_per_token_stored", U128),
+    ("amount_x_in", U128),
+    ("amount_y_in", U128),
+])
+
+BIN_ARRAY = np.dtype([
+    ("index", "<i8"),
+    ("version", "u1"),
+    ("padding", "u1", 7),
+    ("lb_pair", PUBKEY),
+    ("bins", BIN, MAX_BIN_PER_ARRAY),
+])
+
+USER_REWARD_INFO = np.dtype([
+    ("reward_per_token_completes", U128, NUM_REWARDS),
+    ("reward_pendings", "<u8", NUM_REWARDS),
+])
+
+FEE_INFO = np.dtype([
+    ("fee_x_per_token_complete", U128),
+    ("fee_y_per_token_complete", U128),
+    ("fee_x_pending", "<u8"),
+    ("fee_y_pending", "<u8"),
+])
+
+POSITION_V2 = np.dtype([
+    ("lb_pair", PUBKEY),
+    ("owner", PUBKEY),
+    ("liquidity_shares", U128, MAX_BIN_PER_POSITION),
+    ("reward_infos", USER_REWARD_INFO, MAX_BIN_PER_POSITION),
+    ("fee_infos", FEE_INFO, MAX_BIN_PER_POSITION),
+    ("lower_bin_id", "<i4"),
+    ("upper_bin_id", "<i4"),
+    ("last_updated_at", "<i8"),
+    ("total_claimed_fee_x_amount", "<u8"),
+    ("total_claimed_fee_y_amount", "<u8"),
+    ("total_claimed_rewards", "<u8", NUM_REWARDS),
+    ("operator", PUBKEY),
+    ("lock_release_point", "<u8"),
+    ("padding0", "u1"),
+    ("fee_owner", PUBKEY),
+    ("reserved", "u1", 87),
+])
+
+BIN_ARRAY_BITMAP_EXTENSION = np.dtype([
+    ("lb_pair", PUBKEY),
+    ("positive_bin_array_bitmap", "<u8", (EXTENSION_BINARRAY_BITMAP_SIZE, 8)),
+    ("negative_bin_array_bitmap", "<u8", (EXTENSION_BINARRAY_BITMAP_SIZE, 8)),
+])
+
+def account_discriminator(name: str) -> bytes:
+    '''
+    Anchor account discriminator: the first 8 bytes of `sha256("account:<Name>")`.
+
+    Args:
+        name (str): The account name as declared in the program, e.g. `LbPair`.
+
+    '''
+    return hashlib.sha256(f"account:{name}".encode()).digest()[:DISCRIMINATOR_SIZE]
+
+LB_PAIR_DISCRIMINATOR = account_discriminator("LbPair")
+BIN_ARRAY_DISCRIMINATOR = account_discriminator("BinArray")
+POSITION_V2_DISCRIMINATOR = account_discriminator("PositionV2")
+BIN_ARRAY_BITMAP_EXTENSION_DISCRIMINATOR = account_discriminator("BinArrayBitmapExtension")
+
+def _decode(data: Buffer, dtype: np.dtype, discriminator: bytes, name: str) -> np.void:
+    view = memoryview(data)
+    if view.nbytes < DISCRIMINATOR_SIZE + dtype.itemsize:
+        raise ValueError(f"{name} account data is too short: {view.nbytes} bytes")
+    if view[:DISCRIMINATOR_SIZE] != discriminator:
+        raise ValueError(f"Invalid {name} account discriminator")
+    return np.frombuffer(view, dtype=dtype, count=1, offset=DISCRIMINATOR_SIZE)[0]
+
+def decode_lb_pair(data: Buffer) -> np.void:
+    '''
+    Decode an LbPair account into a record of `LB_PAIR`, backed by `data`.
+    '''
+    return _decode(data, LB_PAIR, LB_PAIR_DISCRIMINATOR, "LbPair")
+
+def decode_bin_array(data: Buffer) -> np.void:
+    '''
+    Decode a BinArray account into a record of `BIN_ARRAY`, backed by `data`.
+    '''
+    return _decode(data, BIN_ARRAY, BIN_ARRAY_DISCRIMINATOR, "BinArray")
+
+def decode_position_v2(data: Buffer) -> np.void:
+    '''
+    Decode a PositionV2 account into a record of `POSITION_V2`, backed by `data`.
+    '''
+    return _decode(data, POSITION_V2, POSITION_V2_DISCRIMINATOR, "PositionV2")
+
+def decode_bin_array_bitmap_extension(data: Buffer) -> np.void:
+    '''
+    Decode a BinArrayBitmapExtension account into a record of `BIN_ARRAY_BITMAP_EXTENSION`, backed by `data`.
+    '''
+    return _decode(data, BIN_ARRAY_BITMAP_EXTENSION, BIN_ARRAY_BITMAP_EXTENSION_DISCRIMINATOR, "BinArrayBitmapExtension")
+
+def decode_bin_arrays(datas: Sequence[Buffer]) -> np.ndarray:
+    '''
+    Decode many BinArray accounts into one `BIN_ARRAY` array. Unlike the single-account decoders
+    this copies, once, into a contiguous array so the bins of every array can be sliced together.
+
+    Args:
+        datas (Sequence[Buffer]): Raw account data, e.g. from `get_multiple_accounts`.
+
+    '''
+    result = np.empty(len(datas), dtype=BIN_ARRAY)
+    for i, data in enumerate(datas):
+        result[i] = decode_bin_array(data)
+    return result
+
+def u128_to_int(value: np.void) -> int:
+    '''
+    Exact integer value of a single `U128` field.
+    '''
+    return (int(value["hi"]) << 64) | int(value["lo"])
+
+def u128_to_float(value: np.ndarray) -> np.ndarray:
+    '''
+    Approximate float value of an array of `U128` fields.
+    '''
+    return value["hi"].astype(np.float64) * 2.0 ** 64 + value["lo"].astype(np.float64)
+
+def q64_to_float(value: np.ndarray) -> np.ndarray:
+    '''
+    Float value of Q64.64 fixed point `U128` fields, such as `Bin.price`.
+    '''
+    return value["hi"].astype(np.float64) + value["lo"].astype(np.float64) * 2.0 ** -SCALE_OFFSET
+
+def to_pubkey(value: np.ndarray) -> Pubkey:
+    '''
+    Convert a `PUBKEY` field to a `solders.pubkey.Pubkey`.
+    '''
+    return Pubkey.from_bytes(value.tobytes())
+
+def bin_id_to_bin_array_index(bin_id: int) -> int:
+    '''
+    Index of the bin array holding `bin_id`. Floor division matches the program for negative ids.
+    '''
+    return bin_id // MAX_BIN_PER_ARRAY
+
+def bin_array_bin_ids(index: int) -> np.ndarray:
+    '''
+    Bin ids covered by the bin array at `index`, in storage order.
+    '''
+    lower = index * MAX_BIN_PER_ARRAY
+    return np.arange(lower, lower + MAX_BIN_PER_ARRAY, dtype=np.int64)
+
+def derive_bin_array(lb_pair: Pubkey, index: int, program_id: Pubkey = LB_CLMM_PROGRAM_ID) -> Pubkey:
+    '''
+    Address of the bin array at `index` of `lb_pair`.
+    '''
+    seed = int(index).to_bytes(8, "little", signed=True)
+    return Pubkey.find_program_address([b"bin_array", bytes(lb_pair), seed], program_id)[0]
+
+def derive_bin_array_bitmap_extension(lb_pair: Pubkey, program_id: Pubkey = LB_CLMM_PROGRAM_ID) -> Pubkey:
+    '''
+    Address of the bin array bitmap extension of `lb_pair`.
+    '''
+    return Pubkey.find_program_address([b"bitmap", bytes(lb_pair)], program_id)[0]
+
+def _set_bits(words: np.ndarray) -> np.ndarray:
+    bits = np.unpackbits(np.ascontiguousarray(words, dtype="<u8").view(np.uint8), bitorder="little")
+    return np.flatnonzero(bits)
+
+def initialized_bin_array_indexes(lb_pair: np.void, extension: Optional[np.void] = None) -> np.ndarray:
+    '''
+    Sorted indexes of every bin array flagged as initialized in the pair bitmap and, when given,
+    in its bitmap extension.
+
+    Args:
+        lb_pair (np.void): A decoded LbPair.
+        extension (Optional[np.void]): The decoded BinArrayBitmapExtension of the pair, if it exists.
+
+    '''
+    indexes = [_set_bits(lb_pair["bin_array_bitmap"]) - BIN_ARRAY_BITMAP_SIZE]
+    if extension is not None:
+        # Row r of the positive bitmap covers indexes [(r + 1) * 512, (r + 2) * 512); the negative
+        # bitmap mirrors it with offset = -(index + 1).
+        positive = _set_bits(extension["positive_bin_array_bitmap"]) + BIN_ARRAY_BITMAP_SIZE
+        negative = -(_set_bits(extension["negative_bin_array_bitmap"]) + BIN_ARRAY_BITMAP_SIZE) - 1
+        indexes += [positive, negative]
+    return np.sort(np.concatenate(indexes)).astype(np.int64)
+
+def get_multiple_accounts(client, pubkeys: List[Pubkey], chunk_size: int = 100) -> List[Optional[bytes]]:
+    '''
+    Fetch raw account data with `getMultipleAccounts`, `chunk_size` accounts per call.
+
+    Args:
+        client (solana.rpc.api.Client): The RPC client.
+        pubkeys (List[Pubkey]): The accounts to fetch.
+        chunk_size (int): Accounts per RPC call; 100 is the RPC limit.
+
+    '''
+    result: List[Optional[bytes]] = []
+    for start in range(0, len(pubkeys), chunk_size):
+        response = client.get_multiple_accounts(pubkeys[start:start + chunk_size])
+        result.extend(None if account is None else bytes(account.data) for account in response.value)
+    return result
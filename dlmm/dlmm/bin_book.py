@@ -0,0 +1,303 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from solders.pubkey import Pubkey
+
+from . import accounts
+from .accounts import Buffer, LB_CLMM_PROGRAM_ID, MAX_BIN_PER_ARRAY
+from .quote import QuoteLadder, swap_quote_ladder
+
+BOOK_BIN = np.dtype([
+    ("bin_id", "<i8"),
+    ("price", "<f8"),
+    ("amount_x", "<u8"),
+    ("amount_y", "<u8"),
+    ("supply", "<f8"),
+])
+
+class BinBook:
+    '''
+    In-memory mirror of every initialized bin of a pool.
+
+    Bins are kept as one row of 70 per bin array, rows sorted by bin array index, so a range of bin
+    ids is a contiguous slice found with `np.searchsorted`. The book is seeded from the pair bitmap
+    and bin arrays (`load`), then kept current by feeding it account changes (`apply_account`),
+    e.g. from `accountSubscribe` on every address in `addresses()`. Prices are per lamport, like the
+    on-chain `Bin.price`.
+
+    Args:
+        lb_pair (Pubkey): The pool address.
+        bin_step (int): The pool bin step, in basis points.
+        active_id (int): The active bin id.
+        program_id (Pubkey): The DLMM program id.
+
+    '''
+    lb_pair: Pubkey
+    bin_step: int
+    active_id: int
+    program_id: Pubkey
+
+    def __init__(self, lb_pair: Pubkey, bin_step: int, active_id: int, program_id: Pubkey = LB_CLMM_PROGRAM_ID) -> None:
+        if type(lb_pair) != Pubkey:
+            raise TypeError("lb_pair must be of type `solders.pubkey.Pubkey`")
+
+        self.lb_pair = lb_pair
+        self.bin_step = bin_step
+        self.active_id = active_id
+        self.program_id = program_id
+        self.__indexes = np.empty(0, dtype=np.int64)
+        self.__amount_x = np.empty((0, MAX_BIN_PER_ARRAY), dtype=np.uint64)
+        self.__amount_y = np.empty((0, MAX_BIN_PER_ARRAY), dtype=np.uint64)
+        self.__supply = np.empty((0, MAX_BIN_PER_ARRAY), dtype=np.float64)
+        self.__internal_flags = np.empty(0, dtype=np.int64)
+        self.__extension_flags = np.empty(0, dtype=np.int64)
+        self.__derived: Dict[int, Pubkey] = {}
+        # Last decoded pair and bin arrays, kept for exact local quotes.
+        self.__pair: Optional[np.void] = None
+        self.__bin_arrays: Dict[int, np.void] = {}
+        self.__columns: Optional[Dict[str, np.ndarray]] = None
+
+    @staticmethod
+    def from_accounts(
+        lb_pair: Pubkey,
+        lb_pair_data: Buffer,
+        bin_array_datas: List[Buffer],
+        extension_data: Optional[Buffer] = None,
+        program_id: Pubkey = LB_CLMM_PROGRAM_ID
+    ) -> "BinBook":
+        '''
+        Build a book from raw account data already fetched by the caller.
+
+        Args:
+            lb_pair (Pubkey): The pool address.
+            lb_pair_data (Buffer): The LbPair account data.
+            bin_array_datas (List[Buffer]): The data of the pool's bin arrays, in any order.
+            extension_data (Optional[Buffer]): The BinArrayBitmapExtension account data, if the pool has one.
+            program_id (Pubkey): The DLMM program id.
+
+        '''
+        pair = accounts.decode_lb_pair(lb_pair_data)
+        book = BinBook(lb_pair, int(pair["bin_step"]), int(pair["active_id"]), program_id)
+        book.apply_lb_pair(lb_pair_data)
+        if extension_data is not None:
+            book.apply_bitmap_extension(extension_data)
+        for data in bin_array_datas:
+            book.apply_bin_array(data)
+        return book
+
+    @staticmethod
+    def load(client, lb_pair: Pubkey, program_id: Pubkey = LB_CLMM_PROGRAM_ID) -> "BinBook":
+        '''
+        Seed a book from chain: the pair and its bitmap extension in one call, then every
+        initialized bin array in chunked `getMultipleAccounts` calls.
+
+        Args:
+            client (solana.rpc.api.Client): The RPC client.
+            lb_pair (Pubkey): The pool address.
+            program_id (Pubkey): The DLMM program id.
+
+        '''
+        extension_address = accounts.derive_bin_array_bitmap_extension(lb_pair, program_id)
+        lb_pair_data, extension_data = accounts.get_multiple_accounts(client, [lb_pair, extension_address])
+        if lb_pair_data is None:
+            raise ValueError(f"LB Pair account {lb_pair} not found")
+
+        book = BinBook.from_accounts(lb_pair, lb_pair_data, [], extension_data, program_id)
+        book.sync(client)
+        return book
+
+    def sync(self, client) -> None:
+        '''
+        Fetch every bin array flagged in the bitmap, known or not, in chunked `getMultipleAccounts` calls.
+        '''
+        indexes = self.flagged_bin_arrays().tolist()
+        datas = accounts.get_multiple_accounts(client, [self.bin_array_address(i) for i in indexes])
+        for data in datas:
+            if data is not None:
+                self.apply_bin_array(data)
+
+    def bin_array_address(self, index: int) -> Pubkey:
+        if index not in self.__derived:
+            self.__derived[index] = accounts.derive_bin_array(self.lb_pair, index, self.program_id)
+        return self.__derived[index]
+
+    def addresses(self) -> List[Pubkey]:
+        '''
+        Accounts whose changes the book should be fed: the pair, its bitmap extension and every
+        bin array it mirrors.
+        '''
+        result = [self.lb_pair, accounts.derive_bin_array_bitmap_extension(self.lb_pair, self.program_id)]
+        result += [self.bin_array_address(int(i)) for i in self.__indexes]
+        return result
+
+    def swap_bin_arrays(self, end_bin_id: int) -> List[Pubkey]:
+        '''
+        Bin arrays a swap from the active bin to `end_bin_id` walks through, in swap order. Like
+        `getBinArrayForSwap`, only initialized arrays are included: the accounts of arrays in a
+        liquidity gap do not exist and would fail the swap instruction.
+        '''
+        start = accounts.bin_id_to_bin_array_index(self.active_id)
+        end = accounts.bin_id_to_bin_array_index(end_bin_id)
+        indexes = self.__indexes[(self.__indexes >= min(start, end)) & (self.__indexes <= max(start, end))]
+        if end < start:
+            indexes = indexes[::-1]
+        return [self.bin_array_address(int(i)) for i in indexes]
+
+    def flagged_bin_arrays(self) -> np.ndarray:
+        '''
+        Indexes flagged as initialized in the pair bitmap or its extension.
+        '''
+        return np.union1d(self.__internal_flags, self.__extension_flags)
+
+    def missing_bin_arrays(self) -> List[int]:
+        '''
+        Indexes flagged as initialized in the bitmap but not in the book yet.
+        '''
+        return np.setdiff1d(self.flagged_bin_arrays(), self.__indexes).tolist()
+
+    def apply_account(self, data: Buffer) -> None:
+        '''
+        Apply a changed account of any kind the book mirrors, dispatching on its discriminator.
+        '''
+        discriminator = bytes(memoryview(data)[:accounts.DISCRIMINATOR_SIZE])
+        if discriminator == accounts.BIN_ARRAY_DISCRIMINATOR:
+            self.apply_bin_array(data)
+        elif discriminator == accounts.LB_PAIR_DISCRIMINATOR:
+            self.apply_lb_pair(data)
+        elif discriminator == accounts.BIN_ARRAY_BITMAP_EXTENSION_DISCRIMINATOR:
+            self.apply_bitmap_extension(data)
+        else:
+            raise ValueError("Account is not mirrored by the bin book")
+
+    def apply_lb_pair(self, data: Buffer) -> None:
+        pair = accounts.decode_lb_pair(data)
+        self.__pair = pair
+        self.active_id = int(pair["active_id"])
+        self.bin_step = int(pair["bin_step"])
+        self.__internal_flags = accounts.initialized_bin_array_indexes(pair)
+
+    def apply_bitmap_extension(self, data: Buffer) -> None:
+        extension = accounts.decode_bin_array_bitmap_extension(data)
+        flags = accounts.initialized_bin_array_indexes(np.zeros(1, dtype=accounts.LB_PAIR)[0], extension)
+        self.__extension_flags = flags
+
+    def apply_bin_array(self, data: Buffer) -> None:
+        bin_array = accounts.decode_bin_array(data)
+        index = int(bin_array["index"])
+        bins = bin_array["bins"]
+        self.__bin_arrays[index] = bin_array
+        row = int(np.searchsorted(self.__indexes, index))
+        if row == len(self.__indexes) or self.__indexes[row] != index:
+            self.__indexes = np.insert(self.__indexes, row, index)
+            self.__amount_x = np.insert(self.__amount_x, row, 0, axis=0)
+            self.__amount_y = np.insert(self.__amount_y, row, 0, axis=0)
+            self.__supply = np.insert(self.__supply, row, 0, axis=0)
+        self.__amount_x[row] = bins["amount_x"]
+        self.__amount_y[row] = bins["amount_y"]
+        self.__supply[row] = accounts.u128_to_float(bins["liquidity_supply"])
+        self.__columns = None
+
+    def __len__(self) -> int:
+        return self.__indexes.size * MAX_BIN_PER_ARRAY
+
+    @property
+    def lb_pair_state(self) -> Optional[np.void]:
+        '''
+        The last LbPair applied to the book, decoded.
+        '''
+        return self.__pair
+
+    def quote(self, amounts: List[int], swap_for_y: bool, timestamp: Optional[float] = None) -> QuoteLadder:
+        '''
+        Quote swaps of every amount against the mirrored bins, see `quote.swap_quote_ladder`.
+        '''
+        if self.__pair is None:
+            raise ValueError("The bin book has no LbPair state to quote with")
+        bin_arrays = [self.__bin_arrays[int(i)] for i in self.__indexes]
+        return swap_quote_ladder(self.__pair, bin_arrays, amounts, swap_for_y, timestamp)
+
+    @property
+    def bin_array_indexes(self) -> np.ndarray:
+        return self.__indexes
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        # Flattened columns and prefix sums, rebuilt lazily after updates.
+        if self.__columns is None:
+            bin_ids = (self.__indexes[:, None] * MAX_BIN_PER_ARRAY + np.arange(MAX_BIN_PER_ARRAY)).ravel()
+            amount_x = self.__amount_x.ravel()
+            amount_y = self.__amount_y.ravel()
+            self.__columns = {
+                "bin_id": bin_ids,
+                "price": (1 + self.bin_step / accounts.BASIS_POINT_MAX) ** bin_ids.astype(np.float64),
+                "amount_x": amount_x,
+                "amount_y": amount_y,
+                "supply": self.__supply.ravel(),
+                "cum_x": np.concatenate(([0], np.cumsum(amount_x, dtype=np.uint64))),
+                "cum_y": np.concatenate(([0], np.cumsum(amount_y, dtype=np.uint64))),
+            }
+        return self.__columns
+
+    def _slice(self, lower_bin_id: int, upper_bin_id: int) -> slice:
+        bin_ids = self._columns()["bin_id"]
+        return slice(
+            int(np.searchsorted(bin_ids, lower_bin_id, side="left")),
+            int(np.searchsorted(bin_ids, upper_bin_id, side="right"))
+        )
+
+    def bins_between(self, lower_bin_id: int, upper_bin_id: int) -> np.ndarray:
+        '''
+        Mirrored bins with `lower_bin_id <= bin_id <= upper_bin_id`, as a `BOOK_BIN` array.
+        '''
+        columns = self._columns()
+        window = self._slice(lower_bin_id, upper_bin_id)
+        result = np.empty(window.stop - window.start, dtype=BOOK_BIN)
+        for name in BOOK_BIN.names:
+            result[name] = columns[name][window]
+        return result
+
+    def bins_around_active_bin(self, number_of_bins_to_left: int, number_of_bins_to_right: int) -> np.ndarray:
+        return self.bins_between(self.active_id - number_of_bins_to_left, self.active_id + number_of_bins_to_right)
+
+    def bins_between_prices(self, min_price: float, max_price: float) -> np.ndarray:
+        '''
+        Mirrored bins whose price per lamport lies in `[min_price, max_price]`.
+        '''
+        return self.bins_between(self.bin_id_from_price(min_price, True), self.bin_id_from_price(max_price, False))
+
+    def bin_id_from_price(self, price: float, min: bool) -> int:
+        bin_id = np.log(price) / np.log1p(self.bin_step / accounts.BASIS_POINT_MAX)
+        return int(np.ceil(bin_id - 1e-9)) if min else int(np.floor(bin_id + 1e-9))
+
+    def liquidity_between(self, lower_bin_id: int, upper_bin_id: int) -> Tuple[int, int]:
+        '''
+        Total X and Y held by bins in `[lower_bin_id, upper_bin_id]`, in O(log n) from prefix sums.
+        '''
+        columns = self._columns()
+        window = self._slice(lower_bin_id, upper_bin_id)
+        return (
+            int(columns["cum_x"][window.stop] - columns["cum_x"][window.start]),
+            int(columns["cum_y"][window.stop] - columns["cum_y"][window.start])
+        )
+
+    def depth(self, swap_for_y: bool, max_bins: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Output liquidity a swap can reach, walking away from the active bin: Y in the active bin and
+        below when selling X (`swap_for_y`), X in the active bin and above otherwise.
+
+        Returns:
+            (bin_ids, cumulative): The bins in walk order and the output amount available up to each of them.
+
+        '''
+        columns = self._columns()
+        bin_ids = columns["bin_id"]
+        active = int(np.searchsorted(bin_ids, self.active_id))
+        if swap_for_y:
+            end = active + 1 if active < bin_ids.size and bin_ids[active] == self.active_id else active
+            start = 0 if max_bins is None else max(0, end - max_bins)
+            ids = bin_ids[start:end][::-1]
+            amounts = columns["amount_y"][start:end][::-1]
+        else:
+            end = bin_ids.size if max_bins is None else min(bin_ids.size, active + max_bins)
+            ids = bin_ids[active:end]
+            amounts = columns["amount_x"][active:end]
+        return ids, np.cumsum(amounts, dtype=np.uint64)
@@ -0,0 +1,184 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Seconds a response stays fresh, per DLMM method. Price conversions never change, fee parameters
+# rarely; anything that follows the active bin lives about a slot.
+DEFAULT_TTLS: Dict[str, float] = {
+    "from_price_per_lamport": 3600.0,
+    "to_price_per_lamport": 3600.0,
+    "get_bin_id_from_price": 3600.0,
+    "get_fee_info": 300.0,
+    "get_dynamic_fee": 1.0,
+    "get_active_bin": 0.4,
+    "get_bin_array_for_swap": 0.4,
+    "get_bin_arrays": 2.0,
+    "get_bins_around_active_bin": 2.0,
+    "get_bins_between_min_and_max_price": 2.0,
+    "get_bins_between_lower_and_upper_bound": 2.0,
+}
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    version: int
+    slot: Optional[int]
+
+class ResponseCache:
+    '''
+    A bounded LRU of server responses for one `DLMM` client. Each entry is stamped with the time it
+    expires, the cache version and the last slot observed when it was stored. An entry is served while
+    it has not expired, no state-changing transaction was built since (`invalidate` bumps the version)
+    and the chain has not moved more than `max_slot_lag` slots past it (see `observe_slot`).
+
+    Cached responses are shared between callers and must not be mutated.
+
+    Args:
+        max_entries (int): Entries kept before the least recently used one is evicted.
+        ttls (Optional[Dict[str, float]]): TTL in seconds per method, merged over `DEFAULT_TTLS`.
+        default_ttl (float): TTL of methods missing from `ttls`.
+        max_slot_lag (Optional[int]): Slots an entry may lag the last observed slot, None to ignore slots.
+        clock (Callable[[], float]): Monotonic time source.
+
+    '''
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 1.0,
+        max_slot_lag: Optional[int] = 2,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        if type(max_entries) != int or max_entries < 1:
+            raise TypeError("max_entries must be a positive `int`")
+
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_slot_lag = max_slot_lag
+        self.version = 0
+        self.slot: Optional[int] = None
+        self.__clock = clock
+        self.__entries: "OrderedDict[Tuple[str, Hashable], _Entry]" = OrderedDict()
+        self.__stats: Dict[str, CacheStats] = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def _stats(self, method: str) -> CacheStats:
+        if method not in self.__stats:
+            self.__stats[method] = CacheStats()
+        return self.__stats[method]
+
+    def _fresh(self, entry: _Entry) -> bool:
+        if entry.version != self.version or entry.expires_at <= self.__clock():
+            return False
+        if self.max_slot_lag is not None and self.slot is not None and entry.slot is not None:
+            return self.slot - entry.slot <= self.max_slot_lag
+        return True
+
+    def get(self, method: str, key: Hashable) -> Tuple[bool, Any]:
+        '''
+        Whether a fresh response is cached for `method` and `key`, and the response.
+        '''
+        with self.__lock:
+            entry = self.__entries.get((method, key))
+            if entry is None or not self._fresh(entry):
+                if entry is not None:
+                    del self.__entries[(method, key)]
+                self._stats(method).misses += 1
+                return False, None
+            self.__entries.move_to_end((method, key))
+            self._stats(method).hits += 1
+            return True, entry.value
+
+    def put(self, method: str, key: Hashable, value: Any) -> None:
+        with self.__lock:
+            ttl = self.ttls.get(method, self.default_ttl)
+            self.__entries[(method, key)] = _Entry(value, self.__clock() + ttl, self.version, self.slot)
+            self.__entries.move_to_end((method, key))
+            while len(self.__entries) > self.max_entries:
+                (evicted, _), _ = self.__entries.popitem(last=False)
+                self._stats(evicted).evictions += 1
+
+    def lookup(self, method: str, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        '''
+        Serve `method` for `key` from the cache, calling `fetch` and storing its result on a miss.
+        '''
+        hit, value = self.get(method, key)
+        if not hit:
+            value = fetch()
+            self.put(method, key, value)
+        return value
+
+    def observe_slot(self, slot: int) -> None:
+        '''
+        Record the latest slot seen on chain; entries stored too many slots earlier go stale.
+        '''
+        with self.__lock:
+            if self.slot is None or slot > self.slot:
+                self.slot = slot
+
+    def invalidate(self) -> None:
+        '''
+        Drop every entry, e.g. once a transaction that changes pool state was built.
+        '''
+        with self.__lock:
+            self.version += 1
+            self.__entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, CacheStats]:
+        '''
+        Hits, misses and evictions per method.
+        '''
+        with self.__lock:
+            return {method: CacheStats(s.hits, s.misses, s.evictions) for method, s in self.__stats.items()}
+
+    @property
+    def totals(self) -> CacheStats:
+        stats = self.stats.values()
+        return CacheStats(sum(s.hits for s in stats), sum(s.misses for s in stats), sum(s.evictions for s in stats))
+
+def cached(method: Callable) -> Callable:
+    '''
+    Serve a read-only `DLMM` method from `self.cache` when the client has one. Arguments must be hashable.
+    '''
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = getattr(self, "cache", None)
+        if cache is None:
+            return method(self, *args, **kwargs)
+        key = (args, tuple(sorted(kwargs.items())))
+        return cache.lookup(method.__name__, key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
+def invalidates(method: Callable) -> Callable:
+    '''
+    Invalidate `self.cache` once a `DLMM` method that builds a state-changing transaction returns.
+    '''
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            cache = getattr(self, "cache", None)
+            if cache is not None:
+                cache.invalidate()
+    return wrapper
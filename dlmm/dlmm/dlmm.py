@@ -1,10 +1,18 @@
 import json
+import os
 import requests
 from typing import Dict, List, Optional
 from solana.transaction import Transaction
 from solders.pubkey import Pubkey
-from .utils import convert_to_transaction
-from .types import ActivationType, ActiveBin, FeeInfo, GetBins, GetPositionByUser, Position, PositionInfo, StrategyParameters, SwapQuote, LBPair, TokenReserve, DlmmHttpError as HTTPError
+from .transport import Transport
+from .bin_book import BinBook
+from .cache import ResponseCache, cached, invalidates
+from .fee import FeeModel
+from .metadata_cache import PoolMetadataCache
+from .metrics import MetricsSink, instrument_client, instrument_session
+from .tracing import trace_client, trace_session
+from .utils import convert_to_transaction, loads
+from .types import ActivationType, ActiveBin, FeeInfo, GetBins, GetPositionByUser, Position, PositionChanges, PositionInfo, StrategyParameters, SwapQuote, SwapQuoteLadderStep, LBPair, TokenReserve, DlmmHttpError as HTTPError
 from solana.rpc.api import Client
 import logging
 import traceback
@@ -16,51 +24,130 @@ API_URL = "http://localhost:3000"
 
 logger = logging.getLogger(__name__)
 
+def default_transport() -> Transport:
+    '''
+    The transport used when none is given: `DLMM_API_URL` from the environment, else `API_URL`.
+    '''
+    return Transport.from_url(os.getenv("DLMM_API_URL", API_URL))
+
 class DLMM:
     '''
     DLMM is a class that provides utility methods for interacting with the DLMM API.
     '''
     __session: requests.Session
+    __api_url: str
     pool_address: Pubkey
     rpc: str
+    transport: Transport
+    cache: Optional[ResponseCache]
+    metadata_cache: Optional[PoolMetadataCache]
+    metrics: Optional[MetricsSink]
     lb_pair: LBPair
     token_X: TokenReserve
     token_Y: TokenReserve
 
-    def __init__(self, public_key: Pubkey, rpc: str) -> None:
+    def __init__(
+        self,
+        public_key: Pubkey,
+        rpc: str,
+        transport: Optional[Transport] = None,
+        cache: Optional[ResponseCache] = None,
+        metadata_cache: Optional[PoolMetadataCache] = None,
+        metadata: Optional[dict] = None,
+        metrics: Optional[MetricsSink] = None
+    ) -> None:
         if type(public_key) != Pubkey:
             raise TypeError("public_key must be of type `solders.pubkey.Pubkey`")
         
         if type(rpc) != str:
             raise TypeError("rpc must be of type `str`")
         
+        if transport is not None and isinstance(transport, Transport) == False:
+            raise TypeError("transport must be of type `dlmm.transport.Transport`")
+        
+        if cache is not None and isinstance(cache, ResponseCache) == False:
+            raise TypeError("cache must be of type `dlmm.cache.ResponseCache`")
+        
+        if metadata_cache is not None and isinstance(metadata_cache, PoolMetadataCache) == False:
+            raise TypeError("metadata_cache must be of type `dlmm.metadata_cache.PoolMetadataCache`")
+        
         self.pool_address = public_key
         self.rpc = rpc
-        session = requests.Session()
+        self.transport = transport if transport is not None else default_transport()
+        self.cache = cache
+        self.__api_url = self.transport.base_url
+        session = self.transport.session()
         session.headers.update({
             'Content-type': 'application/json', 
             'Accept': 'text/plain',
             'pool': str(public_key),
             'rpc': rpc
         })
-        self.__session = session
+        self.metrics = metrics
+        if metrics is not None:
+            instrument_session(session, metrics)
+            if cache is not None and hasattr(metrics, "track_cache"):
+                metrics.track_cache(cache, str(public_key))
+        # Inside a `tracing.Tracer` trace, requests carry its id and the server's spans are recorded.
+        self.__session = trace_session(session)
+        self.metadata_cache = metadata_cache
+
+        # A `/dlmm/create` response passed in (see `DLMM_CLIENT.create_multiple`) is used as is. Cached
+        # metadata lets the client start without the server; it is checked by `validate_metadata`.
+        if metadata is not None:
+            self._apply_metadata(metadata)
+            self.metadata_from_cache = False
+            return
+        metadata = metadata_cache.get(public_key) if metadata_cache is not None else None
+        self.metadata_from_cache = metadata is not None
+        if metadata is not None:
+            self._apply_metadata(metadata)
+        else:
+            self._create()
+
+    def _apply_metadata(self, result: dict) -> None:
+        self.lb_pair = LBPair(result["lbPair"])
+        self.token_X = TokenReserve(result["tokenX"])
+        self.token_Y = TokenReserve(result["tokenY"])
 
+    def _create(self) -> None:
         try:
-            result = session.get(f"{API_URL}/dlmm/create").json()
-            self.lb_pair = LBPair(result["lbPair"])
-            self.token_X = TokenReserve(result["tokenX"])
-            self.token_Y = TokenReserve(result["tokenY"])
+            result = self.__session.get(f"{self.__api_url}/dlmm/create").json()
+            self._apply_metadata(result)
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error creating DLMM: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
+        if self.metadata_cache is not None:
+            self.metadata_cache.put(self.pool_address, result)
+        self.metadata_from_cache = False
+
+    def _client(self) -> Client:
+        client = Client(self.rpc)
+        if self.metrics is not None:
+            instrument_client(client, self.metrics)
+        return trace_client(client)
+
+    def validate_metadata(self) -> bool:
+        '''
+        Check metadata loaded from the metadata cache against the chain, reloading it from the server when
+        it does not match. Returns whether the metadata in use was already valid.
+        '''
+        if not self.metadata_from_cache:
+            return True
+        if self.metadata_cache.validate(self._client(), self.pool_address):
+            self.metadata_from_cache = False
+            return True
+        self._create()
+        return False
     
+    @cached
     def get_active_bin(self) -> ActiveBin:
         '''
         The function retrieves the active bin ID and its corresponding price.
         '''
         try:
-            result = self.__session.get(f"{API_URL}/dlmm/get-active-bin").json()
+            result = self.__session.get(f"{self.__api_url}/dlmm/get-active-bin").json()
             active_bin = ActiveBin(result)
             return active_bin
         except requests.exceptions.HTTPError as e:
@@ -68,6 +155,7 @@ class DLMM:
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
 
+    @cached
     def from_price_per_lamport(self, price: float) -> float:
         '''
         The function converts a price per lamport value to a real price of bin.
@@ -83,13 +171,14 @@ class DLMM:
             data = json.dumps({
                 "price": price
             })
-            result = self.__session.post(f"{API_URL}/dlmm/from-price-per-lamport", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/from-price-per-lamport", data=data).json()
             return float(result["price"])
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error converting price per lamports: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @cached
     def to_price_per_lamport(self, price: float) -> float:
         '''
         The function converts a real price of bin to a lamport value.
@@ -105,13 +194,14 @@ class DLMM:
             data = json.dumps({
                 "price": price
             })
-            result = self.__session.post(f"{API_URL}/dlmm/to-price-per-lamport", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/to-price-per-lamport", data=data).json()
             return float(result["price"])
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error converting price per lamports: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
 
+    @invalidates
     def initialize_position_and_add_liquidity_by_strategy(
         self, 
         position_pub_key: Pubkey, 
@@ -135,7 +225,7 @@ class DLMM:
             logger.info(f"Sending request with data: {json.dumps(request_data, indent=2)}")
             
             result = self.__session.post(
-                f"{API_URL}/dlmm/initialize-position-and-add-liquidity-by-strategy", 
+                f"{self.__api_url}/dlmm/initialize-position-and-add-liquidity-by-strategy", 
                 data=json.dumps(request_data),
                 headers={"Content-Type": "application/json"}
             ).json()
@@ -154,6 +244,7 @@ class DLMM:
             logger.error(f"Stack trace: {traceback.format_exc()}")
             raise
 
+    @invalidates
     def add_liquidity_by_strategy(self, position_pub_key: Pubkey, user: Pubkey, x_amount: int, y_amount: int, strategy: StrategyParameters) -> Transaction:
         '''
         Add liquidity by strategy to existing position.
@@ -200,7 +291,7 @@ class DLMM:
                 "minBinId": strategy["min_bin_id"],
                 "strategyType": str(strategy["strategy_type"])
             })
-            result = self.__session.post(f"{API_URL}/dlmm/add-liquidity-by-strategy", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/add-liquidity-by-strategy", data=data).json()
             transaction = convert_to_transaction(result)
             return transaction
         except requests.exceptions.HTTPError as e:
@@ -223,13 +314,47 @@ class DLMM:
             data = json.dumps({
                 "userPublicKey": str(user)
             })
-            result = self.__session.post(f"{API_URL}/dlmm/get-positions-by-user-and-lb-pair", data=data).json()
-            return GetPositionByUser(result)
+            response = self.__session.post(f"{self.__api_url}/dlmm/get-positions-by-user-and-lb-pair", data=data)
+            return GetPositionByUser(loads(response.content))
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting positions by user and lb pair: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
 
+    def get_position_changes(self, user: Pubkey, since_slot: int) -> PositionChanges:
+        '''
+        This function retrieves only the positions of the user in this LB pair whose account or bins changed
+        since `since_slot`, plus the positions closed since then. Pass the returned `slot` as `since_slot`
+        on the next call. When `full` is set the server could not answer with a delta (first call, or
+        the server restarted) and `user_positions` holds every position.
+
+        Args:
+            user (Pubkey): The public key of the user.
+            since_slot (int): The slot returned by the previous call, or 0.
+        
+        '''
+        if type(user) != Pubkey:
+            raise TypeError("user must be of type `solders.pubkey.Pubkey`")
+        
+        if type(since_slot) != int:
+            raise TypeError("since_slot must be of type `int`")
+        
+        try:
+            data = json.dumps({
+                "userPublicKey": str(user),
+                "sinceSlot": since_slot
+            })
+            response = self.__session.post(f"{self.__api_url}/dlmm/get-positions-by-user-and-lb-pair", data=data)
+            changes = PositionChanges(loads(response.content))
+            if self.cache is not None:
+                self.cache.observe_slot(changes.slot)
+            return changes
+        except requests.exceptions.HTTPError as e:
+            raise HTTPError(f"Error getting position changes: {e}")
+        except requests.exceptions.ConnectionError as e:
+            raise HTTPError(f"Error connecting to DLMM: {e}")
+
+    @invalidates
     def remove_liqidity(self, position_pub_key: Pubkey, user: Pubkey, bin_ids: List[int], bps: int, should_claim_and_close: bool) -> List[Transaction]:
         '''
         Remove liquidity from the position.
@@ -265,7 +390,7 @@ class DLMM:
                 "bps": bps,
                 "shouldClaimAndClose": should_claim_and_close
             })
-            result = self.__session.post(f"{API_URL}/dlmm/remove-liquidity", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/remove-liquidity", data=data).json()
             
             # 打印 API 返回的結果以進行調試
             logger.info(f"API response for remove_liquidity: {result}")
@@ -283,7 +408,7 @@ class DLMM:
         try:
             # 如果 API 沒有提供 blockhash，使用 RPC 獲取
             if "recentBlockhash" not in tx_data:
-                client = Client(self.rpc)
+                client = self._client()
                 recent_blockhash = client.get_latest_blockhash().value.blockhash
                 tx_data["recentBlockhash"] = recent_blockhash
                 
@@ -295,6 +420,7 @@ class DLMM:
             logger.error(f"Error creating transaction: {e}")
             raise
 
+    @invalidates
     def close_position(
         self,
         position: Position,  # 完整的 Position 對象
@@ -316,7 +442,7 @@ class DLMM:
             logger.info(f"Sending close position request with data: {json.dumps(request_data, indent=2)}")
             
             result = self.__session.post(
-                f"{API_URL}/dlmm/close-position",
+                f"{self.__api_url}/dlmm/close-position",
                 data=json.dumps(request_data),
                 headers={"Content-Type": "application/json"}
             ).json()
@@ -340,6 +466,7 @@ class DLMM:
 
     
     # TODO: Add type for result
+    @cached
     def get_bin_array_for_swap(self, swap_Y_to_X: bool, count: Optional[int]=4) -> List[dict]:
         '''
         This function retrieves a specified number of `BinArrayAccount` objects from the blockchain for swap.
@@ -360,7 +487,7 @@ class DLMM:
                 "swapYToX": swap_Y_to_X,
                 "count": count
             })
-            result = self.__session.post(f"{API_URL}/dlmm/get-bin-array-for-swap", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/get-bin-array-for-swap", data=data).json()
             return result
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting bin array for swap: {e}")
@@ -402,7 +529,7 @@ class DLMM:
                 "binArrays": binArrays,
                 "isPartialFilled": is_partial_filled
             })
-            result = self.__session.post(f"{API_URL}/dlmm/swap-quote", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/swap-quote", data=data).json()
             logger.info(f"Swap quote result: {result}") #albert
             return SwapQuote(result)
         except requests.exceptions.HTTPError as e:
@@ -410,6 +537,40 @@ class DLMM:
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    def swap_quote_ladder(self, amounts: List[int], swap_Y_to_X: bool, bin_arrays: List[dict]) -> List[SwapQuoteLadderStep]:
+        '''
+        Get swap quotes for many input amounts in one call. The server walks the bins once for all of
+        them; see `dlmm.quote.swap_quote_ladder` for the same computation done locally.
+
+        Args:
+            amounts (List[int]): Amounts of lamport to swap in.
+            swap_Y_to_X (bool): Swap token X to Y when it is true, else reversed (same as `swap_quote`).
+            bin_arrays (List[dict]): The list of bin arrays to use for the swap.
+        
+        '''
+        if type(amounts) != list or any(type(amount) != int for amount in amounts):
+            raise TypeError("amounts must be of type `List[int]`")
+        
+        if isinstance(swap_Y_to_X, bool) == False:
+            raise TypeError("swap_Y_to_X must be of type `bool`")
+        
+        if type(bin_arrays) != list:
+            raise TypeError("bin_arrays must be of type `list`")
+        
+        try:
+            data = json.dumps({
+                "swapYToX": swap_Y_to_X,
+                "amounts": [str(amount) for amount in amounts],
+                "binArrays": bin_arrays
+            })
+            result = self.__session.post(f"{self.__api_url}/dlmm/swap-quote-ladder", data=data).json()
+            return [SwapQuoteLadderStep(step) for step in result]
+        except requests.exceptions.HTTPError as e:
+            raise HTTPError(f"Error getting swap quote ladder: {e}")
+        except requests.exceptions.ConnectionError as e:
+            raise HTTPError(f"Error connecting to DLMM: {e}")
+
+    @invalidates
     def swap(self, in_token: Pubkey, out_token: Pubkey, in_amount: int, min_out_amount: int, lb_pair: Pubkey,  user: Pubkey, binArrays: List[Pubkey]) -> Transaction:
         '''
         Swap tokens.
@@ -455,19 +616,20 @@ class DLMM:
                 "userPublicKey": str(user),
                 "binArrays": list(map(lambda x: str(x), binArrays))
             })
-            result = self.__session.post(f"{API_URL}/dlmm/swap", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/swap", data=data).json()
             return convert_to_transaction(result)
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error swapping: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
 
+    @invalidates
     def refetch_states(self) -> None:
         '''
         This function retrieves and updates various states and data related to bin arrays and lb pairs
         '''
         try:
-            result = self.__session.get(f"{API_URL}/dlmm/refetch-states")
+            result = self.__session.get(f"{self.__api_url}/dlmm/refetch-states")
             return None
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error refetching states: {e}")
@@ -475,42 +637,62 @@ class DLMM:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
     # TODO: Add type for result
+    @cached
     def get_bin_arrays(self) -> List[dict]:
         '''
         This function retrieves all bin arrays from the blockchain.
         '''
         try:
-            result = self.__session.get(f"{API_URL}/dlmm/get-bin-arrays").json()
+            result = self.__session.get(f"{self.__api_url}/dlmm/get-bin-arrays").json()
             return result
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting bin arrays: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @cached
     def get_fee_info(self) -> FeeInfo:
         '''
         This function calculates and returns the base fee rate percentage, maximum fee rate percentage, and protocol fee percentage.
         '''
         try:
-            result = self.__session.get(f"{API_URL}/dlmm/get-fee-info").json()
+            result = self.__session.get(f"{self.__api_url}/dlmm/get-fee-info").json()
             return FeeInfo(result)
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting fee info: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @cached
     def get_dynamic_fee(self) -> float:
         '''
         This function calculates and returns the dynamic fee.
         '''
         try:
-            result = self.__session.get(f"{API_URL}/dlmm/get-dynamic-fee").json()
+            result = self.__session.get(f"{self.__api_url}/dlmm/get-dynamic-fee").json()
             return float(result['fee'])
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting dynamic fee: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    def load_bin_book(self) -> BinBook:
+        '''
+        Mirror every initialized bin of the pool in memory, read straight from the RPC. Range and depth
+        queries on the returned book need no further network calls; feed it account changes with
+        `BinBook.apply_account` to keep it current.
+        '''
+        return BinBook.load(self._client(), self.pool_address)
+
+    def load_fee_model(self) -> FeeModel:
+        '''
+        Read the pool from the RPC and model its dynamic fee locally. `FeeModel.dynamic_fee` and
+        `FeeModel.fee_info` answer like `get_dynamic_fee` and `get_fee_info` without a server call;
+        feed it LbPair changes with `FeeModel.apply_lb_pair` to keep it current.
+        '''
+        return FeeModel.load(self._client(), self.pool_address)
+
+    @cached
     def get_bin_id_from_price(self, price: float, min: bool) -> int | None:
         '''
         The function get bin ID based on a given price and a boolean flag indicating whether to round down or up.
@@ -531,13 +713,14 @@ class DLMM:
                 "price": price,
                 "min": min
             })
-            result = self.__session.post(f"{API_URL}/dlmm/get-bin-id-from-price", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/get-bin-id-from-price", data=data).json()
             return int(result['binId']) if result.get('binId') is not None else None
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting bin id from price: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @cached
     def get_bins_around_active_bin(self, number_of_bins_to_left: int, number_of_bins_to_right: int) -> GetBins:
         '''
         The function retrieves a specified number of bins to the left and right of the active bin and returns them along with the active bin ID.
@@ -559,13 +742,14 @@ class DLMM:
                 "numberOfBinsToTheLeft": number_of_bins_to_left,
                 "numberOfBinsToTheRight": number_of_bins_to_right
             })
-            result = self.__session.post(f"{API_URL}/dlmm/get-bins-around-active-bin", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/get-bins-around-active-bin", data=data).json()
             return GetBins(result)
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting bins around active bin: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @cached
     def get_bins_between_min_and_max_price(self, min_price: float, max_price: float) -> GetBins:
         '''
         The function retrieves a list of bins within a specified price range.
@@ -586,13 +770,14 @@ class DLMM:
                 "minPrice": min_price,
                 "maxPrice": max_price
             })
-            result = self.__session.post(f"{API_URL}/dlmm/get-bins-between-min-and-max-price", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/get-bins-between-min-and-max-price", data=data).json()
             return GetBins(result)
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting bins between min and max price: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @cached
     def get_bins_between_lower_and_upper_bound(self, lower_bound: int, upper_bound: int) -> GetBins:
         '''
         The function retrieves a list of bins within a specified range of bin IDs.
@@ -613,13 +798,14 @@ class DLMM:
                 "lowerBound": lower_bound,
                 "upperBound": upper_bound
             })
-            result = self.__session.post(f"{API_URL}/dlmm/get-bins-between-lower-and-upper-bound", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/get-bins-between-lower-and-upper-bound", data=data).json()
             return GetBins(result)
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting bins between lower and upper bound: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @invalidates
     def claim_LM_reward(self, owner: Pubkey, position: Position) -> Transaction:
         '''
         The function is used to claim rewards for a specific position owned by a specific owner.
@@ -637,13 +823,14 @@ class DLMM:
                 "owner": str(owner),
                 "position": position.to_json()
             })
-            result = self.__session.post(f"{API_URL}/dlmm/claim-lm-reward", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/claim-lm-reward", data=data).json()
             return convert_to_transaction(result)
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error claiming LM rewards: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @invalidates
     def claim_all_LM_reards(self, owner: Pubkey, positions: List[Position]) -> List[Transaction]:
         '''
         The function is used to claim all liquidity mining rewards for a given owner and their positions.
@@ -663,13 +850,14 @@ class DLMM:
                 "owner": str(owner),
                 "positions": [position.to_json() for position in positions]
             })
-            result = self.__session.post(f"{API_URL}/dlmm/claim-all-lm-rewards", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/claim-all-lm-rewards", data=data).json()
             return [convert_to_transaction(tx) for tx in result]
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error claiming all LM rewards: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @invalidates
     def claim_swap_fee(self, owner: Pubkey, position: Position) -> Transaction:
         '''
         The function is used to claim swap fee for a specific position owned by a specific owner.
@@ -690,13 +878,14 @@ class DLMM:
                 "owner": str(owner),
                 "position": position.to_json()
             })
-            result = self.__session.post(f"{API_URL}/dlmm/claim-swap-fee", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/claim-swap-fee", data=data).json()
             return convert_to_transaction(result)
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error claiming swap fee: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @invalidates
     def claim_all_swap_fees(self, owner: Pubkey, positions: List[Position]) -> List[Transaction]:
         '''
         The function is used to claim all swap fees for a given owner and their positions.
@@ -717,13 +906,14 @@ class DLMM:
                 "owner": str(owner),
                 "positions": [position.to_json() for position in positions]
             })
-            result = self.__session.post(f"{API_URL}/dlmm/claim-all-swap-fee", data=data).json()
+            result = self.__session.post(f"{self.__api_url}/dlmm/claim-all-swap-fee", data=data).json()
             return [convert_to_transaction(tx) for tx in result]
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error claiming all swap fees: {e}")
         except requests.exceptions.ConnectionError as e:
             raise HTTPError(f"Error connecting to DLMM: {e}")
     
+    @invalidates
     def claim_all_rewards(self, owner: Pubkey, positions: List[Position]) -> List[Transaction]:
         '''
         一次性領取所有倉位的所有獎勵（包括流動性挖礦和交易費用）。
@@ -747,7 +937,7 @@ class DLMM:
             logger.info(f"Sending claim all rewards request with data: {json.dumps(json.loads(data), indent=2)}")
             
             result = self.__session.post(
-                f"{API_URL}/dlmm/claim-all-rewards",
+                f"{self.__api_url}/dlmm/claim-all-rewards",
                 data=data,
                 headers={"Content-Type": "application/json"}
             ).json()
@@ -768,6 +958,7 @@ class DLMM:
             logger.error(f"Stack trace: {traceback.format_exc()}")
             raise
 
+    @invalidates
     def claim_reward(
         self,
         position: Position,
@@ -785,7 +976,7 @@ class DLMM:
             logger.info(f"Sending claim reward request with data: {json.dumps(request_data, indent=2)}")
             
             result = self.__session.post(
-                f"{API_URL}/dlmm/claim-reward",
+                f"{self.__api_url}/dlmm/claim-reward",
                 data=json.dumps(request_data),
                 headers={"Content-Type": "application/json"}
             ).json()
@@ -809,43 +1000,108 @@ class DLMM_CLIENT:
     '''
 
     @staticmethod
-    def create(public_key: Pubkey, rpc: str) -> DLMM:
+    def create(
+        public_key: Pubkey,
+        rpc: str,
+        transport: Optional[Transport] = None,
+        cache: Optional[ResponseCache] = None,
+        metadata_cache: Optional[PoolMetadataCache] = None,
+        metrics: Optional[MetricsSink] = None
+    ) -> DLMM:
         '''
         Create a DLMM object using the public key of the pool and the RPC URL.
 
         Args:
             public_key (Pubkey): The public key of the pool.
             rpc (str): The RPC URL.
+            transport (Optional[Transport]): How to reach the DLMM server. Defaults to `DLMM_API_URL` or `API_URL`.
+            cache (Optional[ResponseCache]): Cache read responses of the client. Disabled by default.
+            metadata_cache (Optional[PoolMetadataCache]): Start from pool metadata saved on disk when available.
+            metrics (Optional[MetricsSink]): Report the latency, size and errors of every server and RPC call, see `metrics.Metrics`.
         
         '''
         if isinstance(public_key, Pubkey) == False:
             raise TypeError("public_key must be of type `solders.pubkey.Pubkey`")
         
-        return DLMM(public_key, rpc)
+        return DLMM(public_key, rpc, transport, cache, metadata_cache, metrics=metrics)
     
     @staticmethod
-    def create_multiple(public_keys: List[Pubkey], rpc: str) -> List[DLMM]:
+    def create_multiple(
+        public_keys: List[Pubkey],
+        rpc: str,
+        transport: Optional[Transport] = None,
+        metadata_cache: Optional[PoolMetadataCache] = None,
+        chunk_size: int = 100,
+        metrics: Optional[MetricsSink] = None
+    ) -> List[DLMM]:
         '''
-        Create multiple DLMM objects using the public keys of the pools and the RPC URL.
+        Create multiple DLMM objects using the public keys of the pools and the RPC URL. The pools are
+        loaded through `/dlmm/create-multiple`, `chunk_size` pools per request, which fetches their accounts
+        with batched `getMultipleAccounts` calls instead of one `/dlmm/create` round trip per pool.
 
         Args:
             public_keys (List[Pubkey]): The public keys of the pools.
             rpc (str): The RPC URL
+            transport (Optional[Transport]): How to reach the DLMM server. Defaults to `DLMM_API_URL` or `API_URL`.
+            metadata_cache (Optional[PoolMetadataCache]): Skip pools saved on disk and save the ones loaded.
+            chunk_size (int): Pools per request to the server.
+            metrics (Optional[MetricsSink]): Report server and RPC calls of the clients, see `metrics.Metrics`.
         
         '''
         if type(public_keys) != list:
             raise TypeError("public_keys must be of type `list`")
         
-        return [DLMM(public_keys, rpc) for public_keys in public_keys]
+        if type(chunk_size) != int or chunk_size < 1:
+            raise TypeError("chunk_size must be a positive `int`")
+        
+        transport = transport if transport is not None else default_transport()
+        cached_keys = set()
+        if metadata_cache is not None:
+            cached_keys = {public_key for public_key in public_keys if metadata_cache.get(public_key) is not None}
+
+        loaded: Dict[Pubkey, dict] = {}
+        missing = list(dict.fromkeys(public_key for public_key in public_keys if public_key not in cached_keys))
+        if missing:
+            session = transport.session()
+            session.headers.update({
+                'Content-type': 'application/json', 
+                'Accept': 'text/plain',
+                'rpc': rpc
+            })
+            if metrics is not None:
+                instrument_session(session, metrics)
+            trace_session(session)
+            try:
+                for start in range(0, len(missing), chunk_size):
+                    chunk = missing[start:start + chunk_size]
+                    response = session.post(
+                        f"{transport.base_url}/dlmm/create-multiple",
+                        data=json.dumps({"poolAddresses": [str(public_key) for public_key in chunk]})
+                    )
+                    response.raise_for_status()
+                    loaded.update(zip(chunk, response.json()))
+            except requests.exceptions.HTTPError as e:
+                raise HTTPError(f"Error creating DLMMs: {e}")
+            except requests.exceptions.ConnectionError as e:
+                raise HTTPError(f"Error connecting to DLMM: {e}")
+            if metadata_cache is not None:
+                metadata_cache.put_many(loaded)
+
+        # Pools found in the metadata cache start from it, as with `DLMM_CLIENT.create`.
+        return [
+            DLMM(public_key, rpc, transport, None, metadata_cache, loaded.get(public_key), metrics)
+            for public_key in public_keys
+        ]
     
     @staticmethod
-    def get_all_lb_pair_positions_by_user(user: Pubkey, rpc: str) -> Dict[str, PositionInfo]:
+    def get_all_lb_pair_positions_by_user(user: Pubkey, rpc: str, transport: Optional[Transport] = None) -> Dict[str, PositionInfo]:
         '''
         Get all lb pair positions by user.
 
         Args:
             user (Pubkey): The public key of the user.
             rpc (str): The RPC URL.
+            transport (Optional[Transport]): How to reach the DLMM server. Defaults to `DLMM_API_URL` or `API_URL`.
         
         '''
         if type(user) != Pubkey:
@@ -855,7 +1111,8 @@ class DLMM_CLIENT:
             raise TypeError("rpc must be of type `str`")
         
         try:
-            session = requests.Session()
+            transport = transport if transport is not None else default_transport()
+            session = transport.session()
             session.headers.update({
                 'Content-type': 'application/json', 
                 'Accept': 'text/plain',
@@ -864,7 +1121,7 @@ class DLMM_CLIENT:
             data = json.dumps({
                 "user": str(user)
             })
-            result = session.post(f"{API_URL}/dlmm/get-all-lb-pair-positions-by-user", data=data).json()
+            result = session.post(f"{transport.base_url}/dlmm/get-all-lb-pair-positions-by-user", data=data).json()
             return {key: PositionInfo(value) for key, value in result.items()}
         except requests.exceptions.HTTPError as e:
             raise HTTPError(f"Error getting all lb pair positions by user: {e}")
@@ -881,7 +1138,8 @@ class DLMM_CLIENT:
         activation_type: int,
         has_alpha_vault: bool,
         creator_key: Pubkey,
-        activation_point: Optional[int] = None
+        activation_point: Optional[int] = None,
+        transport: Optional[Transport] = None
     ) -> Transaction:
         
         if(type(bin_step) != int):
@@ -923,7 +1181,8 @@ class DLMM_CLIENT:
                 "creatorKey": str(creator_key),
                 "activationPoint": activation_point
             })
-            result = requests.post(f"{API_URL}/dlmm/create-customizable-permissionless-lb-pair", data=data).json()
+            transport = transport if transport is not None else default_transport()
+            result = transport.session().post(f"{transport.base_url}/dlmm/create-customizable-permissionless-lb-pair", data=data).json()
             return convert_to_transaction(result)
 
         except requests.exceptions.HTTPError as e:
@@ -0,0 +1,322 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from . import accounts
+from .accounts import BASIS_POINT_MAX, SCALE_OFFSET
+from .fee import FEE_PRECISION, total_fee_rates, volatility_accumulators
+from .quote import QuoteLadder, swap_quote_ladder
+
+logger = logging.getLogger(__name__)
+
+class ChildOrderFailed(Exception):
+    '''
+    Raised by `Venue.execute` when a child order did not land, e.g. when its minimum out was not met.
+    '''
+    def __init__(self, message):
+        super().__init__(message)
+
+class Venue(Protocol):
+    '''
+    Where a `SlicedSwapExecutor` quotes and sends its child orders: `SimulatedPool` in tests, or an
+    adapter over a live pool.
+    '''
+    def slot(self) -> int: ...
+
+    def wait_for_slot(self, slot: int) -> None: ...
+
+    def active_price(self) -> float: ...
+
+    def quote(self, amounts: List[int], swap_for_y: bool) -> QuoteLadder: ...
+
+    def execute(self, amount: int, swap_for_y: bool, min_out_amount: int) -> int: ...
+
+@dataclass
+class ChildOrder:
+    slot: int
+    amount_in: int
+    quoted_out: int
+    min_out_amount: int
+    realized_out: int
+    price_impact: float
+    status: str
+
+@dataclass
+class ExecutionReport:
+    '''
+    Outcome of a sliced swap. `one_shot_out` is what the whole amount would have returned in a single
+    swap at arrival; `quoted_out` sums the child quotes and `realized_out` what the children returned.
+    '''
+    amount: int
+    swap_for_y: bool
+    one_shot_out: int
+    filled_in: int = 0
+    quoted_out: int = 0
+    realized_out: int = 0
+    children: List[ChildOrder] = field(default_factory=list)
+    cancelled: bool = False
+    reason: Optional[str] = None
+
+    @property
+    def unfilled(self) -> int:
+        return self.amount - self.filled_in
+
+    @property
+    def realized_vs_quoted_bps(self) -> float:
+        '''
+        Slippage of the fills against their own quotes; positive when they returned less.
+        '''
+        if self.quoted_out == 0:
+            return 0.0
+        return (self.quoted_out - self.realized_out) / self.quoted_out * BASIS_POINT_MAX
+
+    @property
+    def improvement_vs_one_shot_bps(self) -> float:
+        '''
+        Output gained per unit of input against a single swap at arrival; positive when slicing paid off.
+        '''
+        if self.filled_in == 0 or self.one_shot_out == 0:
+            return 0.0
+        one_shot_rate = self.one_shot_out / self.amount
+        return (self.realized_out / self.filled_in - one_shot_rate) / one_shot_rate * BASIS_POINT_MAX
+
+class SimulatedPool:
+    '''
+    A pool held in memory that quotes with `quote.swap_quote_ladder` and executes swaps by moving
+    liquidity between the sides of its bins, exactly like the program's exact-in swap. Slots advance
+    only through `wait_for_slot`; `on_slot` is called for every slot passed, e.g. to inject other
+    traders' flow with `swap`.
+
+    Args:
+        lb_pair (np.void): The decoded LbPair to start from.
+        bin_arrays (Sequence[np.void]): The decoded bin arrays of the pool.
+        slot (int): The starting slot.
+        timestamp (Optional[float]): Unix time of the starting slot; defaults to now.
+        slot_seconds (float): Duration of a slot.
+        on_slot (Optional[Callable[[SimulatedPool, int], None]]): Called with the pool and the new slot.
+
+    '''
+    def __init__(
+        self,
+        lb_pair: np.void,
+        bin_arrays: Sequence[np.void],
+        slot: int = 0,
+        timestamp: Optional[float] = None,
+        slot_seconds: float = 0.4,
+        on_slot: Optional[Callable[["SimulatedPool", int], None]] = None
+    ) -> None:
+        self.__pair = np.array([lb_pair], dtype=accounts.LB_PAIR)
+        self.__bin_arrays = np.array(sorted(bin_arrays, key=lambda b: int(b["index"])), dtype=accounts.BIN_ARRAY)
+        self.__slot = slot
+        self.__start_slot = slot
+        self.__start_timestamp = timestamp if timestamp is not None else time.time()
+        self.slot_seconds = slot_seconds
+        self.on_slot = on_slot
+
+    @property
+    def lb_pair(self) -> np.void:
+        return self.__pair[0]
+
+    @property
+    def bin_arrays(self) -> np.ndarray:
+        return self.__bin_arrays
+
+    @property
+    def timestamp(self) -> float:
+        return self.__start_timestamp + (self.__slot - self.__start_slot) * self.slot_seconds
+
+    def slot(self) -> int:
+        return self.__slot
+
+    def wait_for_slot(self, slot: int) -> None:
+        while self.__slot < slot:
+            self.__slot += 1
+            if self.on_slot is not None:
+                self.on_slot(self, self.__slot)
+
+    def active_price(self) -> float:
+        return (1 + int(self.lb_pair["bin_step"]) / BASIS_POINT_MAX) ** int(self.lb_pair["active_id"])
+
+    def quote(self, amounts: List[int], swap_for_y: bool) -> QuoteLadder:
+        return swap_quote_ladder(self.lb_pair, list(self.__bin_arrays), amounts, swap_for_y, self.timestamp)
+
+    def execute(self, amount: int, swap_for_y: bool, min_out_amount: int) -> int:
+        out_amount = self.quote([amount], swap_for_y).out_amount[0]
+        if out_amount < min_out_amount:
+            raise ChildOrderFailed(f"Exceeded slippage: out {out_amount} < min out {min_out_amount}")
+        return self.swap(amount, swap_for_y)
+
+    def swap(self, amount: int, swap_for_y: bool) -> int:
+        '''
+        Swap `amount` in, moving the pool state, and return the amount out. Bins run dry are skipped;
+        any input left once the bins run out is not taken.
+        '''
+        pair = self.lb_pair
+        s, v = pair["parameters"], pair["v_parameters"]
+        if self.timestamp - int(v["last_update_timestamp"]) >= int(s["filter_period"]):
+            # DLMM.updateReference, which the quote applies on the fly.
+            reference = volatility_accumulators(pair, np.array([int(pair["active_id"])]), self.timestamp)
+            v["index_reference"] = int(pair["active_id"])
+            v["volatility_reference"] = int(reference[0])
+        bins = self.__bin_arrays["bins"].reshape(-1)
+        bin_ids = np.concatenate([accounts.bin_array_bin_ids(int(i)) for i in self.__bin_arrays["index"]])
+        active_id = int(pair["active_id"])
+        order = np.flatnonzero(bin_ids <= active_id)[::-1] if swap_for_y else np.flatnonzero(bin_ids >= active_id)
+        volatility = volatility_accumulators(pair, bin_ids[order], self.timestamp)
+        rates = total_fee_rates(pair, volatility)
+        out_side, in_side = ("amount_y", "amount_x") if swap_for_y else ("amount_x", "amount_y")
+
+        left, out_total, last = amount, 0, None
+        for n, i in enumerate(order):
+            if left == 0:
+                break
+            last = n
+            max_out = int(bins[out_side][i])
+            if max_out == 0:
+                continue
+            price = accounts.u128_to_int(bins["price"][i])
+            rate = int(rates[n])
+            if swap_for_y:
+                max_in = -(-(max_out << SCALE_OFFSET) // price)
+            else:
+                max_in = -(-(max_out * price) >> SCALE_OFFSET)
+            max_fee = -(-(max_in * rate) // (FEE_PRECISION - rate))
+            if left > max_in + max_fee:
+                amount_in, out, fee = max_in + max_fee, max_out, max_fee
+            else:
+                fee = -(-(left * rate) // FEE_PRECISION)
+                if swap_for_y:
+                    out = ((left - fee) * price) >> SCALE_OFFSET
+                else:
+                    out = ((left - fee) << SCALE_OFFSET) // price
+                amount_in, out = left, min(out, max_out)
+            bins[out_side][i] = max_out - out
+            bins[in_side][i] = int(bins[in_side][i]) + amount_in - fee
+            left -= amount_in
+            out_total += out
+
+        if last is not None:
+            pair["active_id"] = int(bin_ids[order[last]])
+            v["volatility_accumulator"] = int(volatility[last])
+            v["last_update_timestamp"] = int(self.timestamp)
+        self.__bin_arrays["bins"] = bins.reshape(self.__bin_arrays["bins"].shape)
+        return out_total
+
+class SlicedSwapExecutor:
+    '''
+    Splits a swap into child orders spread over slots, TWAP style. Before each child the remaining
+    amount is re-quoted against the venue: the child is the largest of `target, target/2, target/4, ...`
+    whose price impact stays within `max_impact_bps`, or is deferred to the next slice when none does.
+    When the active price has moved against the order by more than `max_price_move_bps` since arrival,
+    the rest of the order is cancelled. The last slice targets whatever is left but is sized like the
+    others, so part of the order may stay unfilled; `ExecutionReport.reason` then says how much.
+
+    Args:
+        venue (Venue): Where to quote and execute.
+        slices (int): Number of child orders to aim for.
+        slot_interval (int): Slots between two children.
+        max_impact_bps (float): Largest price impact accepted for a child.
+        max_price_move_bps (float): Adverse move of the active price that cancels the rest of the order.
+        slippage_bps (int): Slippage allowed on each child against its own quote.
+        resize_steps (int): How many times a child may be halved to fit `max_impact_bps`.
+
+    '''
+    def __init__(
+        self,
+        venue: Venue,
+        slices: int = 4,
+        slot_interval: int = 10,
+        max_impact_bps: float = 50,
+        max_price_move_bps: float = 100,
+        slippage_bps: int = 50,
+        resize_steps: int = 4
+    ) -> None:
+        if type(slices) != int or slices < 1:
+            raise TypeError("slices must be a positive `int`")
+
+        self.venue = venue
+        self.slices = slices
+        self.slot_interval = slot_interval
+        self.max_impact_bps = max_impact_bps
+        self.max_price_move_bps = max_price_move_bps
+        self.slippage_bps = slippage_bps
+        self.resize_steps = resize_steps
+
+    def _adverse_move_bps(self, arrival_price: float, price: float, swap_for_y: bool) -> float:
+        # Selling X gets worse as the price of X falls, buying X as it rises.
+        move = (arrival_price - price) if swap_for_y else (price - arrival_price)
+        return move / arrival_price * BASIS_POINT_MAX
+
+    def _size_child(self, target: int, swap_for_y: bool) -> Tuple[int, int, float]:
+        candidates = [target >> step for step in range(self.resize_steps + 1)]
+        candidates = [c for c in candidates if c > 0]
+        if not candidates:
+            return 0, 0, 0.0
+        ladder = self.venue.quote(candidates, swap_for_y)
+        for i, amount in enumerate(candidates):
+            fillable = ladder.consumed_in_amount[i] == amount
+            if fillable and -ladder.price_impact[i] * 100 <= self.max_impact_bps:
+                return amount, int(ladder.out_amount[i]), float(ladder.price_impact[i])
+        return 0, 0, 0.0
+
+    def run(self, amount: int, swap_for_y: bool) -> ExecutionReport:
+        '''
+        Execute `amount` in slices and report realized against quoted output.
+
+        Args:
+            amount (int): Amount of lamport to swap in.
+            swap_for_y (bool): Swap token X to Y when it is true, else reversed.
+
+        '''
+        if type(amount) != int or amount <= 0:
+            raise TypeError("amount must be a positive `int`")
+
+        arrival_price = self.venue.active_price()
+        report = ExecutionReport(
+            amount=amount,
+            swap_for_y=swap_for_y,
+            one_shot_out=int(self.venue.quote([amount], swap_for_y).out_amount[0])
+        )
+        start_slot = self.venue.slot()
+        remaining = amount
+
+        for i in range(self.slices):
+            if remaining == 0:
+                break
+            if i > 0:
+                self.venue.wait_for_slot(start_slot + i * self.slot_interval)
+            slot = self.venue.slot()
+
+            move_bps = self._adverse_move_bps(arrival_price, self.venue.active_price(), swap_for_y)
+            if move_bps > self.max_price_move_bps:
+                report.cancelled = True
+                report.reason = f"price moved {move_bps:.1f} bps against the order"
+                logger.info(f"Cancelling sliced swap at slot {slot}: {report.reason}")
+                break
+
+            target = remaining if i == self.slices - 1 else remaining // (self.slices - i)
+            size, quoted_out, impact = self._size_child(target, swap_for_y)
+            if size == 0:
+                report.children.append(ChildOrder(slot, 0, 0, 0, 0, 0.0, "deferred"))
+                continue
+
+            min_out_amount = quoted_out * (BASIS_POINT_MAX - self.slippage_bps) // BASIS_POINT_MAX
+            try:
+                realized_out = self.venue.execute(size, swap_for_y, min_out_amount)
+            except ChildOrderFailed as e:
+                logger.warning(f"Child order of {size} failed at slot {slot}: {e}")
+                report.children.append(ChildOrder(slot, size, quoted_out, min_out_amount, 0, impact, "failed"))
+                continue
+
+            remaining -= size
+            report.filled_in += size
+            report.quoted_out += quoted_out
+            report.realized_out += realized_out
+            report.children.append(ChildOrder(slot, size, quoted_out, min_out_amount, realized_out, impact, "filled"))
+
+        if remaining and not report.cancelled:
+            report.reason = f"{remaining} left unfilled within the impact bound"
+        return report
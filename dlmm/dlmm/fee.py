@@ -0,0 +1,166 @@
+import time
+from typing import Optional
+
+import numpy as np
+from solders.pubkey import Pubkey
+
+from . import accounts
+from .accounts import BASIS_POINT_MAX, Buffer
+from .types import FeeInfo
+
+FEE_PRECISION = 1_000_000_000
+MAX_FEE_RATE = 100_000_000
+
+def volatility_accumulators(lb_pair: np.void, bin_ids: np.ndarray, timestamp: float) -> np.ndarray:
+    '''
+    Volatility accumulator of a swap at every bin of `bin_ids`: `DLMM.updateReference` once at the start
+    of the swap, then `updateVolatilityAccumulator` at every bin the walk reaches.
+    '''
+    s = lb_pair["parameters"]
+    v = lb_pair["v_parameters"]
+    index_reference = int(v["index_reference"])
+    volatility_reference = int(v["volatility_reference"])
+    elapsed = timestamp - int(v["last_update_timestamp"])
+    if elapsed >= int(s["filter_period"]):
+        index_reference = int(lb_pair["active_id"])
+        if elapsed < int(s["decay_period"]):
+            volatility_reference = int(v["volatility_accumulator"]) * int(s["reduction_factor"]) // BASIS_POINT_MAX
+        else:
+            volatility_reference = 0
+    accumulators = volatility_reference + np.abs(index_reference - bin_ids.astype(np.int64)) * BASIS_POINT_MAX
+    return np.minimum(accumulators, int(s["max_volatility_accumulator"]))
+
+def total_fee_rates(lb_pair: np.void, volatility_accumulators: np.ndarray) -> np.ndarray:
+    '''
+    `getTotalFee` for every volatility accumulator, as exact integers over `FEE_PRECISION`.
+    '''
+    s = lb_pair["parameters"]
+    bin_step = int(lb_pair["bin_step"])
+    base_fee = int(s["base_factor"]) * bin_step * 10
+    rates = np.full(volatility_accumulators.shape, base_fee, dtype=object)
+    if int(s["variable_fee_control"]) > 0:
+        square = (volatility_accumulators.astype(object) * bin_step) ** 2
+        rates = rates + (int(s["variable_fee_control"]) * square + 99_999_999_999) // 100_000_000_000
+    return np.minimum(rates, MAX_FEE_RATE)
+
+def active_fee_rates(lb_pairs: np.ndarray, timestamp: float) -> np.ndarray:
+    '''
+    Total fee rate over `FEE_PRECISION` of a swap starting now at the active bin of every pair of an
+    `LB_PAIR` array. Same rules as `volatility_accumulators` and `total_fee_rates`, evaluated over all
+    pairs at once. The squared volatility term overflows the exact range of float64 and int64, so the
+    variable fee is rounded up on Python integers like `total_fee_rates`.
+    '''
+    s = lb_pairs["parameters"]
+    v = lb_pairs["v_parameters"]
+    bin_step = lb_pairs["bin_step"].astype(np.int64)
+    elapsed = timestamp - v["last_update_timestamp"].astype(np.float64)
+    filtered = elapsed >= s["filter_period"]
+    decayed = v["volatility_accumulator"].astype(np.int64) * s["reduction_factor"] // BASIS_POINT_MAX
+    volatility_reference = np.where(filtered, np.where(elapsed < s["decay_period"], decayed, 0), v["volatility_reference"])
+    # Past the filter period the index reference moves to the active bin.
+    distance = np.where(filtered, 0, np.abs(v["index_reference"].astype(np.int64) - lb_pairs["active_id"]))
+    accumulators = np.minimum(volatility_reference + distance * BASIS_POINT_MAX, s["max_volatility_accumulator"])
+    base_fee = s["base_factor"].astype(np.int64) * bin_step * 10
+    square = (accumulators.astype(np.int64) * bin_step).astype(object) ** 2
+    variable_fee = (s["variable_fee_control"].astype(object) * square + 99_999_999_999) // 100_000_000_000
+    return np.minimum(base_fee + variable_fee, MAX_FEE_RATE).astype(np.int64)
+
+class FeeModel:
+    '''
+    The dynamic fee of a pool computed locally from its LbPair, like `getTotalFee` and `getDynamicFee` of
+    the SDK. Feed it LbPair account changes with `apply_lb_pair`; it keeps its own copy of the pair, so
+    the buffer given can be reused.
+
+    Args:
+        lb_pair (np.void): The decoded LbPair, see `accounts.decode_lb_pair`.
+
+    '''
+    def __init__(self, lb_pair: np.void) -> None:
+        self.__pair = np.array([lb_pair], dtype=accounts.LB_PAIR)
+
+    @staticmethod
+    def load(client, lb_pair: Pubkey) -> "FeeModel":
+        '''
+        Read the pair from chain and build its fee model.
+
+        Args:
+            client (solana.rpc.api.Client): The RPC client.
+            lb_pair (Pubkey): The pool address.
+
+        '''
+        data = accounts.get_multiple_accounts(client, [lb_pair])[0]
+        if data is None:
+            raise ValueError(f"LB Pair account {lb_pair} not found")
+        return FeeModel(accounts.decode_lb_pair(data))
+
+    @property
+    def lb_pair(self) -> np.void:
+        return self.__pair[0]
+
+    @property
+    def active_id(self) -> int:
+        return int(self.lb_pair["active_id"])
+
+    @property
+    def bin_step(self) -> int:
+        return int(self.lb_pair["bin_step"])
+
+    def apply_lb_pair(self, data: Buffer) -> bool:
+        '''
+        Update the model from new LbPair account data. Returns whether anything the fee depends on
+        changed: the active bin, the static or the variable parameters.
+        '''
+        pair = accounts.decode_lb_pair(data)
+        current = self.lb_pair
+        changed = (
+            pair["active_id"] != current["active_id"]
+            or pair["v_parameters"].tobytes() != current["v_parameters"].tobytes()
+            or pair["parameters"].tobytes() != current["parameters"].tobytes()
+        )
+        if changed:
+            self.__pair[0] = pair
+        return bool(changed)
+
+    @property
+    def base_fee_rate(self) -> int:
+        return int(self.lb_pair["parameters"]["base_factor"]) * self.bin_step * 10
+
+    def fee_rates(self, bin_ids: np.ndarray, timestamp: Optional[float] = None) -> np.ndarray:
+        '''
+        Total fee rate over `FEE_PRECISION` that a swap starting now would pay at each of `bin_ids`.
+        '''
+        if timestamp is None:
+            timestamp = time.time()
+        bin_ids = np.asarray(bin_ids, dtype=np.int64)
+        return total_fee_rates(self.lb_pair, volatility_accumulators(self.lb_pair, bin_ids, timestamp))
+
+    def project(self, bins_crossed: int, swap_for_y: bool, timestamp: Optional[float] = None) -> np.ndarray:
+        '''
+        Fee rate over `FEE_PRECISION` of each bin a swap crosses, the active bin first.
+
+        Args:
+            bins_crossed (int): Number of bins to project.
+            swap_for_y (bool): Swap token X to Y when it is true, else reversed.
+            timestamp (Optional[float]): Unix time of the swap; defaults to now.
+
+        '''
+        steps = np.arange(bins_crossed, dtype=np.int64)
+        bin_ids = self.active_id - steps if swap_for_y else self.active_id + steps
+        return self.fee_rates(bin_ids, timestamp)
+
+    def dynamic_fee(self, timestamp: Optional[float] = None) -> float:
+        '''
+        Current fee of the active bin in percent, like `get_dynamic_fee`.
+        '''
+        rate = self.fee_rates(np.array([self.active_id]), timestamp)[0]
+        return int(rate) / FEE_PRECISION * 100
+
+    def fee_info(self) -> FeeInfo:
+        '''
+        Base fee rate, maximum fee rate and protocol fee in percent, like `get_fee_info`.
+        '''
+        return FeeInfo({
+            "baseFeeRatePercentage": self.base_fee_rate * 100 / FEE_PRECISION,
+            "maxFeeRatePercentage": MAX_FEE_RATE * 100 / FEE_PRECISION,
+            "protocolFeePercentage": int(self.lb_pair["parameters"]["protocol_share"]) * 100 / BASIS_POINT_MAX
+        })
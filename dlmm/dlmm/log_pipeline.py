@@ -0,0 +1,116 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+class JsonLinesFormatter(logging.Formatter):
+    '''
+    One JSON object per record: time, level, logger, message, the call site, and the `fields` dict given
+    with `logger.info(..., extra={"fields": {...}})`. Records dropped by `RateLimitFilter` since the
+    previous record of the same call site are reported as `suppressed`.
+    '''
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "site": f"{record.module}:{record.lineno}",
+        }
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            entry.update(fields)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class RateLimitFilter(logging.Filter):
+    '''
+    A token bucket per call site for records at or below `max_level`: each site may log `burst` records
+    at once and `rate` records per second on average. Records above `max_level` always pass. Sites are
+    keyed by file and line, since messages are usually f-strings that differ on every call.
+
+    Args:
+        rate (float): Records per second allowed per call site.
+        burst (int): Records a call site may log at once.
+        max_level (int): The highest level that is rate limited.
+        clock (Callable[[], float]): Monotonic time source.
+
+    '''
+    def __init__(self, rate: float = 1.0, burst: int = 20, max_level: int = logging.INFO, clock=time.monotonic) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self.__clock = clock
+        self.__buckets: Dict[Tuple[str, int], List[float]] = {}
+        self.__lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        now = self.__clock()
+        with self.__lock:
+            # [tokens, last refill, records suppressed since the last one that passed]
+            bucket = self.__buckets.setdefault((record.pathname, record.lineno), [float(self.burst), now, 0])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            record.suppressed, bucket[2] = int(bucket[2]), 0
+        return True
+
+class _Listener(QueueListener):
+    # Stopping twice, e.g. by the caller and again at exit, is harmless.
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+class _DeferredQueueHandler(QueueHandler):
+    # The stock handler formats the message before enqueueing it; leave that to the listener thread.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def setup_logging(
+    handlers: List[logging.Handler],
+    level: int = logging.INFO,
+    rate_limit: Optional[RateLimitFilter] = None,
+    logger: Optional[logging.Logger] = None
+) -> QueueListener:
+    '''
+    Route `logger` (the root logger by default) through an in-memory queue: the logging thread only
+    filters and enqueues records, while formatting and I/O happen in `handlers` on a listener thread.
+    The listener is flushed and stopped at exit.
+
+    Args:
+        handlers (List[logging.Handler]): Where records end up, e.g. a file handler with `JsonLinesFormatter`.
+        level (int): Records below this level are dropped before anything else happens.
+        rate_limit (Optional[RateLimitFilter]): Applied before enqueueing, so suppressed records cost nothing more.
+        logger (Optional[logging.Logger]): The logger to configure; its existing handlers are removed.
+
+    '''
+    logger = logger if logger is not None else logging.getLogger()
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(records)
+    if rate_limit is not None:
+        queue_handler.addFilter(rate_limit)
+
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+
+    listener = _Listener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
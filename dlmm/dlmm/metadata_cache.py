@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from solders.pubkey import Pubkey
+
+from . import accounts
+from .accounts import LB_CLMM_PROGRAM_ID
+
+logger = logging.getLogger(__name__)
+
+def default_path() -> str:
+    '''
+    Where pool metadata is kept: `DLMM_METADATA_CACHE` from the environment, else `~/.cache/dlmm/pools.json`.
+    '''
+    return os.getenv("DLMM_METADATA_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "dlmm", "pools.json"))
+
+class PoolMetadataCache:
+    '''
+    Pool metadata kept on disk between runs, so that a `DLMM` client can start without `/dlmm/create`.
+    Entries hold the `/dlmm/create` response of a pool: the LbPair, the mints, decimals and reserve
+    accounts of both tokens, plus the program id. Only fields that never change for a pool are relied
+    upon; `validate` checks them against the LbPair account on chain.
+
+    Args:
+        path (Optional[str]): The JSON file to use, see `default_path`.
+
+    '''
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path if path is not None else default_path()
+        self.__lock = threading.Lock()
+        self.__entries: Optional[Dict[str, dict]] = None
+
+    def _load(self) -> Dict[str, dict]:
+        if self.__entries is None:
+            try:
+                with open(self.path, "r") as f:
+                    self.__entries = json.load(f)
+            except FileNotFoundError:
+                self.__entries = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable pool metadata cache {self.path}: {e}")
+                self.__entries = {}
+        return self.__entries
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename, so a crash never leaves a truncated file behind.
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".pools.", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.__entries, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def get(self, pool: Pubkey) -> Optional[dict]:
+        with self.__lock:
+            return self._load().get(str(pool))
+
+    def put(self, pool: Pubkey, metadata: dict) -> None:
+        '''
+        Store the `/dlmm/create` response of `pool`.
+        '''
+        self.put_many({pool: metadata})
+
+    def put_many(self, entries: Dict[Pubkey, dict]) -> None:
+        '''
+        Store the `/dlmm/create` responses of many pools with a single write.
+        '''
+        with self.__lock:
+            saved_at = int(time.time())
+            for pool, metadata in entries.items():
+                self._load()[str(pool)] = {**metadata, "programId": str(LB_CLMM_PROGRAM_ID), "savedAt": saved_at}
+            self._save()
+
+    def evict(self, pool: Pubkey) -> None:
+        with self.__lock:
+            if self._load().pop(str(pool), None) is not None:
+                self._save()
+
+    def validate(self, client, pool: Pubkey) -> bool:
+        '''
+        Check the cached metadata of `pool` against its LbPair account: owner program, mints, bin step
+        and reserve accounts. A mismatched or missing pool is evicted.
+
+        Args:
+            client (solana.rpc.api.Client): The RPC client.
+            pool (Pubkey): The pool address.
+
+        '''
+        metadata = self.get(pool)
+        if metadata is None:
+            return False
+
+        account = client.get_multiple_accounts([pool]).value[0]
+        valid = account is not None and str(account.owner) == metadata["programId"]
+        if valid:
+            try:
+                pair = accounts.decode_lb_pair(bytes(account.data))
+            except ValueError:
+                pair = None
+            valid = pair is not None and (
+                str(accounts.to_pubkey(pair["token_x_mint"])) == metadata["tokenX"]["publicKey"]
+                and str(accounts.to_pubkey(pair["token_y_mint"])) == metadata["tokenY"]["publicKey"]
+                and str(accounts.to_pubkey(pair["reserve_x"])) == metadata["tokenX"]["reserve"]
+                and str(accounts.to_pubkey(pair["reserve_y"])) == metadata["tokenY"]["reserve"]
+                and int(pair["bin_step"]) == metadata["lbPair"]["binStep"]
+            )
+
+        if not valid:
+            logger.warning(f"Cached metadata of pool {pool} does not match the chain, evicting it")
+            self.evict(pool)
+        return valid
@@ -0,0 +1,267 @@
+import bisect
+import logging
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from .cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS: Tuple[float, ...] = tuple(float(256 * 4 ** n) for n in range(8))
+
+class MetricsSink(Protocol):
+    '''
+    Receives one call per request. `Metrics` keeps them in memory; any object with these two methods
+    can stand in, e.g. to forward them to StatsD.
+    '''
+    def observe(self, endpoint: str, seconds: float, size: int, error: bool) -> None:
+        ...
+
+    def observe_rpc(self, method: str, seconds: float, error: bool) -> None:
+        ...
+
+class Histogram:
+    '''
+    Counts per bucket, Prometheus style: bucket i counts values up to `bounds[i]`, the last one the rest.
+    '''
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        '''
+        Upper bound of the bucket holding the `q` quantile; infinite past the last bound.
+        '''
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank and seen > 0:
+                return bound
+        return 0.0
+
+class _Series:
+    def __init__(self, with_sizes: bool) -> None:
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sizes = Histogram(SIZE_BUCKETS) if with_sizes else None
+        self.errors = 0
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines, cumulative = [], 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+class Metrics:
+    '''
+    In-memory `MetricsSink`: latency and payload size histograms and error counts per server endpoint,
+    latency and call counts per Solana RPC method, plus the hit rates of the response caches registered
+    with `track_cache`. Recording a call costs two clock reads and a bucket lookup under a lock.
+    '''
+    def __init__(self) -> None:
+        self.__endpoints: Dict[str, _Series] = {}
+        self.__rpc: Dict[str, _Series] = {}
+        self.__caches: Dict[str, ResponseCache] = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, endpoint: str, seconds: float, size: int, error: bool) -> None:
+        with self.__lock:
+            series = self.__endpoints.get(endpoint)
+            if series is None:
+                series = self.__endpoints[endpoint] = _Series(with_sizes=True)
+            series.latency.observe(seconds)
+            series.sizes.observe(size)
+            series.errors += error
+
+    def observe_rpc(self, method: str, seconds: float, error: bool) -> None:
+        with self.__lock:
+            series = self.__rpc.get(method)
+            if series is None:
+                series = self.__rpc[method] = _Series(with_sizes=False)
+            series.latency.observe(seconds)
+            series.errors += error
+
+    def track_cache(self, cache: ResponseCache, name: str = "dlmm") -> None:
+        '''
+        Export the hits, misses and hit ratio of `cache` under `name`.
+        '''
+        with self.__lock:
+            self.__caches[name] = cache
+
+    def rpc_counts(self) -> Dict[str, int]:
+        with self.__lock:
+            return {method: series.latency.count for method, series in self.__rpc.items()}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        '''
+        Calls, errors, p50 and p99 latency (bucket upper bounds) per endpoint and per RPC method.
+        '''
+        with self.__lock:
+            series = [(f"rpc:{m}", s) for m, s in self.__rpc.items()] + list(self.__endpoints.items())
+            return {
+                name: {
+                    "calls": s.latency.count,
+                    "errors": s.errors,
+                    "p50": s.latency.quantile(0.5),
+                    "p99": s.latency.quantile(0.99)
+                }
+                for name, s in series
+            }
+
+    def prometheus(self) -> str:
+        '''
+        Every metric in the Prometheus text exposition format.
+        '''
+        lines: List[str] = []
+        with self.__lock:
+            lines.append("# TYPE dlmm_request_duration_seconds histogram")
+            for endpoint, series in sorted(self.__endpoints.items()):
+                lines += _histogram_lines("dlmm_request_duration_seconds", _labels(endpoint=endpoint), series.latency)
+            lines.append("# TYPE dlmm_response_size_bytes histogram")
+            for endpoint, series in sorted(self.__endpoints.items()):
+                lines += _histogram_lines("dlmm_response_size_bytes", _labels(endpoint=endpoint), series.sizes)
+            lines.append("# TYPE dlmm_request_errors_total counter")
+            for endpoint, series in sorted(self.__endpoints.items()):
+                lines.append(f"dlmm_request_errors_total{{{_labels(endpoint=endpoint)}}} {series.errors}")
+
+            lines.append("# TYPE solana_rpc_duration_seconds histogram")
+            for method, series in sorted(self.__rpc.items()):
+                lines += _histogram_lines("solana_rpc_duration_seconds", _labels(method=method), series.latency)
+            lines.append("# TYPE solana_rpc_requests_total counter")
+            for method, series in sorted(self.__rpc.items()):
+                lines.append(f"solana_rpc_requests_total{{{_labels(method=method)}}} {series.latency.count}")
+            lines.append("# TYPE solana_rpc_errors_total counter")
+            for method, series in sorted(self.__rpc.items()):
+                lines.append(f"solana_rpc_errors_total{{{_labels(method=method)}}} {series.errors}")
+            caches = sorted(self.__caches.items())
+
+        cache_stats = [
+            (_labels(cache=name, method=method), stats)
+            for name, cache in caches
+            for method, stats in sorted(cache.stats.items())
+        ]
+        lines.append("# TYPE dlmm_cache_hits_total counter")
+        for labels, stats in cache_stats:
+            lines.append(f"dlmm_cache_hits_total{{{labels}}} {stats.hits}")
+        lines.append("# TYPE dlmm_cache_misses_total counter")
+        for labels, stats in cache_stats:
+            lines.append(f"dlmm_cache_misses_total{{{labels}}} {stats.misses}")
+        lines.append("# TYPE dlmm_cache_hit_ratio gauge")
+        for labels, stats in cache_stats:
+            lines.append(f"dlmm_cache_hit_ratio{{{labels}}} {stats.hit_ratio:.4f}")
+        return "\n".join(lines) + "\n"
+
+    def dump_on_signal(self, path: str, signum: int = signal.SIGUSR1) -> None:
+        '''
+        Write `prometheus()` to `path` whenever the process receives `signum`. Must be called from the
+        main thread.
+        '''
+        def write_dump() -> None:
+            try:
+                # Readers of `path` never see a partial dump.
+                with open(f"{path}.tmp", "w") as f:
+                    f.write(self.prometheus())
+                os.replace(f"{path}.tmp", path)
+                logger.info(f"Metrics written to {path}")
+            except OSError as e:
+                logger.warning(f"Could not write metrics to {path}: {e}")
+
+        # The handler runs on the main thread, possibly while it holds the metrics, cache or logging
+        # locks; it only starts a thread that takes them.
+        def dump(received, frame) -> None:
+            threading.Thread(target=write_dump, name="metrics-dump", daemon=True).start()
+        signal.signal(signum, dump)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        '''
+        Serve `prometheus()` at `http://host:port/metrics` from a daemon thread.
+        '''
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+def instrument_session(session: requests.Session, sink: MetricsSink) -> requests.Session:
+    '''
+    Report every request of `session` to `sink` under its URL path, e.g. `/dlmm/get-active-bin`. The
+    latency includes reading the body; failed connections count as errors with a zero size.
+    '''
+    request = session.request
+
+    def timed(method, url, *args, **kwargs):
+        endpoint = urlparse(url).path
+        start = time.perf_counter()
+        try:
+            response = request(method, url, *args, **kwargs)
+            size = len(response.content)
+        except Exception:
+            sink.observe(endpoint, time.perf_counter() - start, 0, True)
+            raise
+        sink.observe(endpoint, time.perf_counter() - start, size, response.status_code >= 400)
+        return response
+
+    session.request = timed
+    return session
+
+def _rpc_method(body) -> str:
+    # solders request bodies are named after the method: GetMultipleAccounts -> getMultipleAccounts.
+    name = type(body).__name__
+    return name[:1].lower() + name[1:]
+
+def instrument_client(client, sink: MetricsSink):
+    '''
+    Report every request of a `solana.rpc.api.Client` to `sink` under its RPC method name.
+    '''
+    # The client has no public hook; every call goes through its provider's `make_request`.
+    provider = client._provider
+    make_request = provider.make_request
+
+    def timed(body, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = make_request(body, *args, **kwargs)
+        except Exception:
+            sink.observe_rpc(_rpc_method(body), time.perf_counter() - start, True)
+            raise
+        sink.observe_rpc(_rpc_method(body), time.perf_counter() - start, False)
+        return result
+
+    provider.make_request = timed
+    return client
@@ -0,0 +1,182 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A thread sampled while off the CPU is waiting on the network when its innermost Python frame is in one of these.
+NETWORK_MODULES = frozenset({"socket.py", "ssl.py", "selectors.py"})
+
+def _thread_cpu_clock(thread_id: int) -> Optional[Callable[[], float]]:
+    # CPU time of another thread, where the platform offers it (Linux, macOS).
+    try:
+        clock_id = time.pthread_getcpuclockid(thread_id)
+        time.clock_gettime(clock_id)
+    except (AttributeError, OSError):
+        return None
+    return lambda: time.clock_gettime(clock_id)
+
+def _stack(frame) -> Tuple[str, ...]:
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+@dataclass
+class CycleProfile:
+    '''
+    Samples of one profiled cycle. Each sample is attributed to `cpu` when the thread used the CPU for at
+    least half of the sampling interval, otherwise to `network` when it was inside socket code and to
+    `wait` (sleeps, locks, other I/O) for the rest. Without a per-thread CPU clock every sample outside
+    socket code counts as `cpu`.
+    '''
+    cycle: int
+    wall: float
+    cpu: float
+    network: float
+    wait: float
+    samples: int
+    stacks: Counter = field(default_factory=Counter)
+    path: Optional[str] = None
+
+    def collapsed(self) -> List[str]:
+        '''
+        Stacks in the collapsed format of flamegraph.pl and speedscope, rooted at `[cpu]`, `[network]` or `[wait]`.
+        '''
+        return [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+
+    def hot_spots(self, n: int = 5) -> List[Tuple[str, int]]:
+        '''
+        The `n` innermost frames with the most CPU samples.
+        '''
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            if stack[0] == "[cpu]":
+                leaves[stack[-1]] += count
+        return leaves.most_common(n)
+
+class _Sampler(threading.Thread):
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(name="cycle-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.stacks: Counter = Counter()
+        self.seconds: Dict[str, float] = {"cpu": 0.0, "network": 0.0, "wait": 0.0}
+        self.samples = 0
+
+    def run(self) -> None:
+        cpu_clock = _thread_cpu_clock(self.thread_id)
+        last_wall = time.perf_counter()
+        last_cpu = cpu_clock() if cpu_clock is not None else 0.0
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = _stack(frame)
+            del frame
+            now = time.perf_counter()
+            elapsed, last_wall = now - last_wall, now
+            in_socket = bool(stack) and stack[-1].split(":", 1)[0] in NETWORK_MODULES
+            if cpu_clock is None:
+                state = "network" if in_socket else "cpu"
+            else:
+                cpu_now = cpu_clock()
+                on_cpu, last_cpu = cpu_now - last_cpu >= elapsed / 2, cpu_now
+                state = "cpu" if on_cpu else "network" if in_socket else "wait"
+            self.seconds[state] += elapsed
+            self.stacks[(f"[{state}]",) + stack] += 1
+            self.samples += 1
+
+class CycleProfiler:
+    '''
+    Samples the stack of the thread running a loop for the next few cycles, at a fixed interval from a
+    background thread, and writes each cycle's stacks to `directory/cycle-<n>.collapsed`. Call
+    `start_cycle` at the top of every iteration and `end_cycle` before the loop sleeps; both cost little
+    more than a counter update while no cycles are requested.
+
+    Args:
+        directory (str): Where the collapsed stack files are written.
+        interval (float): Seconds between samples.
+
+    '''
+    def __init__(self, directory: str, interval: float = 0.01) -> None:
+        if type(interval) != float:
+            raise TypeError("interval must be of type `float`")
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.directory = directory
+        self.interval = interval
+        self.cycle = 0
+        self.profiles: List[CycleProfile] = []
+        self.__remaining = 0
+        # Requests from `profile`, taken by the loop thread in `start_cycle`.
+        self.__requests: "queue.SimpleQueue[int]" = queue.SimpleQueue()
+        self.__sampler: Optional[_Sampler] = None
+        self.__started = 0.0
+
+    def profile(self, cycles: int) -> None:
+        '''
+        Profile the next `cycles` cycles. Takes no lock and does not log, so it is safe to call from a
+        signal handler (`SimpleQueue.put` is reentrant) or another thread.
+        '''
+        if type(cycles) != int:
+            raise TypeError("cycles must be of type `int`")
+        self.__requests.put(cycles)
+
+    def start_cycle(self) -> None:
+        self.end_cycle()
+        self.cycle += 1
+        requested = None
+        while not self.__requests.empty():
+            requested = self.__requests.get_nowait()
+        if requested is not None:
+            self.__remaining = requested
+            logger.info(f"Profiling {requested} cycles from cycle {self.cycle}")
+        if self.__remaining <= 0:
+            return
+        self.__remaining -= 1
+        self.__sampler = _Sampler(threading.get_ident(), self.interval)
+        self.__started = time.perf_counter()
+        self.__sampler.start()
+
+    def end_cycle(self) -> Optional[CycleProfile]:
+        '''
+        Stop sampling the current cycle, if it is profiled, and write its stacks.
+        '''
+        sampler, self.__sampler = self.__sampler, None
+        if sampler is None:
+            return None
+        wall = time.perf_counter() - self.__started
+        sampler.stopped.set()
+        sampler.join()
+        profile = CycleProfile(
+            self.cycle, wall, sampler.seconds["cpu"], sampler.seconds["network"], sampler.seconds["wait"],
+            sampler.samples, sampler.stacks
+        )
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.path = os.path.join(self.directory, f"cycle-{self.cycle:04d}.collapsed")
+            with open(profile.path, "w") as f:
+                f.write("\n".join(profile.collapsed()) + "\n")
+        except OSError as e:
+            profile.path = None
+            logger.warning(f"Could not write profile of cycle {self.cycle}: {e}")
+        self.profiles.append(profile)
+        logger.info(
+            f"Profiled cycle {profile.cycle}: {wall:.3f}s wall, {profile.cpu:.3f}s CPU, {profile.network:.3f}s network",
+            extra={"fields": {
+                "cycle": profile.cycle, "wall": wall, "cpu": profile.cpu, "network": profile.network,
+                "wait": profile.wait, "samples": profile.samples, "path": profile.path,
+                "hotSpots": profile.hot_spots()
+            }}
+        )
+        return profile
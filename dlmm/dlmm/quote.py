@@ -0,0 +1,142 @@
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from . import accounts
+from .accounts import BASIS_POINT_MAX, SCALE_OFFSET
+from .fee import FEE_PRECISION, total_fee_rates, volatility_accumulators
+
+@dataclass
+class QuoteLadder:
+    '''
+    Swap quotes for many input amounts of the same direction, one entry per amount in request order.
+    Amounts are lamports; `price_impact` is a percentage, negative when the swap gets a worse price
+    than the first bin.
+    '''
+    in_amount: np.ndarray
+    consumed_in_amount: np.ndarray
+    out_amount: np.ndarray
+    fee: np.ndarray
+    protocol_fee: np.ndarray
+    price_impact: np.ndarray
+    end_bin_id: np.ndarray
+    bins_crossed: int
+
+def _object(values) -> np.ndarray:
+    return np.asarray([int(v) for v in values], dtype=object)
+
+def _u128_to_object(value: np.ndarray) -> np.ndarray:
+    return (value["hi"].astype(object) << 64) | value["lo"].astype(object)
+
+def _out_amount(in_amount, price, swap_for_y: bool):
+    if swap_for_y:
+        return (in_amount * price) >> SCALE_OFFSET
+    return (in_amount << SCALE_OFFSET) // price
+
+def swap_quote_ladder(
+    lb_pair: np.void,
+    bin_arrays: Sequence[np.void],
+    amounts: Sequence[int],
+    swap_for_y: bool,
+    timestamp: Optional[float] = None
+) -> QuoteLadder:
+    '''
+    Quote many input amounts in one walk over the bins, locally. The bins the largest amount can
+    reach are tabulated once, with exact integer math matching `swapExactInQuoteAtBin`; every amount
+    is then resolved against the cumulative table with `np.searchsorted`, so the cost grows with the
+    number of bins crossed, not with the number of amounts. Amounts beyond the liquidity of
+    `bin_arrays` are partially filled, like `swapQuote` with `isPartialFill`.
+
+    Args:
+        lb_pair (np.void): The decoded LbPair, see `accounts.decode_lb_pair`.
+        bin_arrays (Sequence[np.void]): Decoded bin arrays in the swap direction, see `accounts.decode_bin_array`.
+        amounts (Sequence[int]): Amounts of lamport to swap in.
+        swap_for_y (bool): Swap token X to Y when it is true, else reversed.
+        timestamp (Optional[float]): Unix time used for the volatility reference; defaults to now.
+
+    '''
+    if timestamp is None:
+        timestamp = time.time()
+
+    in_amount = _object(amounts)
+    active_id = int(lb_pair["active_id"])
+
+    if len(bin_arrays):
+        bins = np.concatenate([b["bins"] for b in bin_arrays])
+        bin_ids = np.concatenate([accounts.bin_array_bin_ids(int(b["index"])) for b in bin_arrays])
+    else:
+        bins = np.empty(0, dtype=accounts.BIN)
+        bin_ids = np.empty(0, dtype=np.int64)
+
+    # The walk: bins on the swap side of the active bin, nearest first, that hold output liquidity.
+    out_liquidity = bins["amount_y"] if swap_for_y else bins["amount_x"]
+    side = (bin_ids <= active_id) if swap_for_y else (bin_ids >= active_id)
+    walk = np.flatnonzero(side & (out_liquidity > 0))
+    walk = walk[np.argsort(bin_ids[walk], kind="stable")]
+    if swap_for_y:
+        walk = walk[::-1]
+
+    ids = bin_ids[walk]
+    price = _u128_to_object(bins["price"][walk])
+    max_out = out_liquidity[walk].astype(object)
+    rates = total_fee_rates(lb_pair, volatility_accumulators(lb_pair, ids, timestamp))
+    protocol_share = int(lb_pair["parameters"]["protocol_share"])
+
+    if swap_for_y:
+        max_in = ((max_out << SCALE_OFFSET) + price - 1) // price
+    else:
+        max_in = (max_out * price + (1 << SCALE_OFFSET) - 1) >> SCALE_OFFSET
+    max_fee = (max_in * rates + (FEE_PRECISION - rates) - 1) // (FEE_PRECISION - rates)
+    max_in_with_fee = max_in + max_fee
+
+    zero = np.zeros(1, dtype=object)
+    cum_in = np.concatenate((zero, np.cumsum(max_in_with_fee))) if walk.size else zero
+    cum_out = np.concatenate((zero, np.cumsum(max_out))) if walk.size else zero
+    cum_fee = np.concatenate((zero, np.cumsum(max_fee))) if walk.size else zero
+    cum_protocol_fee = np.concatenate((zero, np.cumsum(max_fee * protocol_share // BASIS_POINT_MAX))) if walk.size else zero
+
+    # Bin k of the walk is where an amount runs out; k == walk.size means the bins ran out first.
+    k = np.searchsorted(cum_in[1:], in_amount, side="left") if walk.size else np.zeros(in_amount.size, dtype=np.int64)
+    filled = k < walk.size
+    kk = np.minimum(k, max(walk.size - 1, 0))
+
+    consumed = np.where(filled, in_amount, cum_in[-1])
+    out_amount = cum_out[k].copy()
+    fee = cum_fee[k].copy()
+    protocol_fee = cum_protocol_fee[k].copy()
+
+    if walk.size and filled.any():
+        remaining = in_amount[filled] - cum_in[k[filled]]
+        bin_rates = rates[k[filled]]
+        partial_fee = (remaining * bin_rates + FEE_PRECISION - 1) // FEE_PRECISION
+        partial_out = _out_amount(remaining - partial_fee, price[k[filled]], swap_for_y)
+        partial_out = np.minimum(partial_out, max_out[k[filled]])
+        out_amount[filled] += partial_out
+        fee[filled] += partial_fee
+        protocol_fee[filled] += partial_fee * protocol_share // BASIS_POINT_MAX
+
+    price_impact = np.zeros(in_amount.size, dtype=np.float64)
+    end_bin_id = np.full(in_amount.size, active_id, dtype=np.int64)
+    if walk.size:
+        end_bin_id = ids[kk]
+        end_rates = rates[kk]
+        no_slippage = _out_amount(consumed - (consumed * end_rates + FEE_PRECISION - 1) // FEE_PRECISION, price[0], swap_for_y)
+        nonzero = (no_slippage != 0) & (consumed != 0)
+        price_impact[nonzero] = (
+            (out_amount[nonzero] - no_slippage[nonzero]).astype(np.float64)
+            / no_slippage[nonzero].astype(np.float64) * 100
+        )
+        end_bin_id = np.where(in_amount == 0, active_id, end_bin_id)
+
+    return QuoteLadder(
+        in_amount=in_amount,
+        consumed_in_amount=consumed,
+        out_amount=out_amount,
+        fee=fee,
+        protocol_fee=protocol_fee,
+        price_impact=price_impact,
+        end_bin_id=end_bin_id,
+        bins_crossed=int(kk.max()) + 1 if walk.size and in_amount.size else 0
+    )
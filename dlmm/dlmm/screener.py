@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from solders.pubkey import Pubkey
+
+from . import accounts
+from .accounts import LB_CLMM_PROGRAM_ID, MAX_BIN_PER_ARRAY, PUBKEY
+from .fee import FEE_PRECISION, active_fee_rates
+
+logger = logging.getLogger(__name__)
+
+# One row of the screening table. `pool` indexes `PoolScreener.pools`; depths are in lamports, `depth`
+# values the X side at each bin price in Y lamports; `emission` is reward lamports per second.
+SCREEN_ROW = np.dtype([
+    ("pool", "<i8"),
+    ("token_x_mint", PUBKEY),
+    ("token_y_mint", PUBKEY),
+    ("active_id", "<i4"),
+    ("bin_step", "<u2"),
+    ("fee_rate", "<f8"),
+    ("depth_x", "<f8"),
+    ("depth_y", "<f8"),
+    ("depth", "<f8"),
+    ("emission", "<f8"),
+    ("score", "<f8"),
+    ("updated_at", "<f8"),
+])
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    # Percentile rank in [0, 1]; ties share the rank of their first occurrence.
+    if len(values) < 2:
+        return np.ones(len(values))
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    first = np.searchsorted(sorted_values, sorted_values, side="left")
+    ranks = np.empty(len(values))
+    ranks[order] = first / (len(values) - 1)
+    return ranks
+
+class PoolScreener:
+    '''
+    Ranks many pools by what a liquidity provider would earn there: the fee rate charged at the active
+    bin now, the liquidity within `depth_bins` of the active bin, and the rewards being emitted. Each
+    `refresh` reads the LbPair and the active bin array of every pool with `getMultipleAccounts`, two
+    calls per 100 pools, and scores all of them at once. The score is a weighted sum of the percentile
+    ranks of the three measures, so pools quoted in different tokens remain comparable.
+
+    With `max_rpc_calls`, a refresh covers as many pools as the budget allows and the next refresh
+    continues where it stopped; rows keep the time they were last updated.
+
+    Args:
+        pools (Sequence[Pubkey]): The pool addresses to screen.
+        depth_bins (int): Bins on each side of the active bin counted as depth, within the active bin array.
+        weights (Tuple[float, float, float]): Weights of the fee rate, depth and emission ranks.
+        max_rpc_calls (Optional[int]): RPC calls allowed per refresh, None to refresh every pool.
+        program_id (Pubkey): The DLMM program.
+
+    '''
+    def __init__(
+        self,
+        pools: Sequence[Pubkey],
+        depth_bins: int = 10,
+        weights: Tuple[float, float, float] = (0.5, 0.3, 0.2),
+        max_rpc_calls: Optional[int] = None,
+        program_id: Pubkey = LB_CLMM_PROGRAM_ID
+    ) -> None:
+        if type(depth_bins) != int or depth_bins < 0:
+            raise TypeError("depth_bins must be a non-negative `int`")
+
+        if max_rpc_calls is not None and (type(max_rpc_calls) != int or max_rpc_calls < 2):
+            raise TypeError("max_rpc_calls must be an `int` of at least 2")
+
+        self.pools: List[Pubkey] = list(dict.fromkeys(pools))
+        self.depth_bins = depth_bins
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.max_rpc_calls = max_rpc_calls
+        self.program_id = program_id
+        self.last_rpc_calls = 0
+        self.__rows = np.zeros(len(self.pools), dtype=SCREEN_ROW)
+        self.__rows["pool"] = np.arange(len(self.pools))
+        self.__rows["score"] = np.nan
+        self.__loaded = np.zeros(len(self.pools), dtype=bool)
+        self.__table = self.__rows[:0].copy()
+        self.__cursor = 0
+        self.__bin_arrays: Dict[Tuple[int, int], Pubkey] = {}
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+
+    def _batch(self) -> np.ndarray:
+        count = len(self.pools)
+        if self.max_rpc_calls is not None:
+            # Every chunk of 100 pools costs one call for the pairs and one for the bin arrays.
+            count = min(count, self.max_rpc_calls // 2 * 100)
+        batch = (self.__cursor + np.arange(count)) % max(len(self.pools), 1)
+        self.__cursor = (self.__cursor + count) % max(len(self.pools), 1)
+        return batch
+
+    def _bin_array_address(self, pool: int, index: int) -> Pubkey:
+        # Active bin arrays rarely change, their PDAs are derived once.
+        key = (pool, index)
+        if key not in self.__bin_arrays:
+            self.__bin_arrays[key] = accounts.derive_bin_array(self.pools[pool], index, self.program_id)
+        return self.__bin_arrays[key]
+
+    def refresh(self, client, timestamp: Optional[float] = None) -> np.ndarray:
+        '''
+        Reload the next batch of pools, rescore every loaded pool and return the ranked table.
+
+        Args:
+            client (solana.rpc.api.Client): The RPC client.
+            timestamp (Optional[float]): Unix time the fee rates and emissions are evaluated at; defaults to now.
+
+        '''
+        if timestamp is None:
+            timestamp = time.time()
+        batch = self._batch()
+        pairs = np.zeros(len(batch), dtype=accounts.LB_PAIR)
+        valid = np.zeros(len(batch), dtype=bool)
+        datas = accounts.get_multiple_accounts(client, [self.pools[i] for i in batch])
+        for i, data in enumerate(datas):
+            if data is None:
+                continue
+            try:
+                pairs[i] = accounts.decode_lb_pair(data)
+            except ValueError:
+                continue
+            # Disabled pools take no swaps.
+            valid[i] = pairs[i]["status"] == 0
+        rpc_calls = -(-len(batch) // 100)
+
+        depth_x = np.zeros(len(batch))
+        depth_y = np.zeros(len(batch))
+        depth = np.zeros(len(batch))
+        positions = np.flatnonzero(valid)
+        if len(positions):
+            indexes = pairs["active_id"][positions].astype(np.int64) // MAX_BIN_PER_ARRAY
+            addresses = [self._bin_array_address(int(batch[p]), int(i)) for p, i in zip(positions, indexes)]
+            datas = accounts.get_multiple_accounts(client, addresses)
+            rpc_calls += -(-len(addresses) // 100)
+            found = np.array([data is not None for data in datas], dtype=bool)
+            if found.any():
+                bin_arrays = accounts.decode_bin_arrays([data for data in datas if data is not None])
+                owners = positions[found]
+                bins = bin_arrays["bins"]
+                bin_ids = bin_arrays["index"][:, None] * MAX_BIN_PER_ARRAY + np.arange(MAX_BIN_PER_ARRAY)
+                near = np.abs(bin_ids - pairs["active_id"][owners][:, None]) <= self.depth_bins
+                amount_x = np.where(near, bins["amount_x"], 0).astype(np.float64)
+                amount_y = np.where(near, bins["amount_y"], 0).astype(np.float64)
+                depth_x[owners] = amount_x.sum(axis=1)
+                depth_y[owners] = amount_y.sum(axis=1)
+                depth[owners] = (amount_x * accounts.q64_to_float(bins["price"]) + amount_y).sum(axis=1)
+
+        rewards = pairs["reward_infos"]
+        emitting = rewards["reward_duration_end"].astype(np.float64) > timestamp
+        emission = (accounts.q64_to_float(rewards["reward_rate"]) * emitting).sum(axis=1)
+
+        with self.__lock:
+            rows = self.__rows
+            rows["token_x_mint"][batch] = pairs["token_x_mint"]
+            rows["token_y_mint"][batch] = pairs["token_y_mint"]
+            rows["active_id"][batch] = pairs["active_id"]
+            rows["bin_step"][batch] = pairs["bin_step"]
+            rows["fee_rate"][batch] = active_fee_rates(pairs, timestamp) / FEE_PRECISION
+            rows["depth_x"][batch] = depth_x
+            rows["depth_y"][batch] = depth_y
+            rows["depth"][batch] = depth
+            rows["emission"][batch] = emission
+            rows["updated_at"][batch] = timestamp
+            # A pool without liquidity near the active bin earns nothing, whatever its fee.
+            self.__loaded[batch] = valid & (depth > 0)
+            self.__table = self._rank()
+            self.last_rpc_calls = rpc_calls
+            return self.__table
+
+    def _rank(self) -> np.ndarray:
+        rows = self.__rows
+        rows["score"] = np.nan
+        loaded = np.flatnonzero(self.__loaded)
+        measures = (rows["fee_rate"][loaded], rows["depth"][loaded], rows["emission"][loaded])
+        rows["score"][loaded] = sum(w * _ranks(m) for w, m in zip(self.weights, measures))
+        table = rows[loaded]
+        return table[np.argsort(-table["score"], kind="stable")]
+
+    @property
+    def table(self) -> np.ndarray:
+        '''
+        Rows of `SCREEN_ROW` of every screened pool, best score first. Do not mutate.
+        '''
+        with self.__lock:
+            return self.__table
+
+    def top(self, n: int = 10, mints: Optional[Sequence[Pubkey]] = None) -> List[Pubkey]:
+        '''
+        Addresses of the `n` best ranked pools, optionally only those with one of `mints` on either side.
+        '''
+        table = self.table
+        if mints is not None:
+            wanted = np.array([np.frombuffer(bytes(mint), dtype=np.uint8) for mint in mints]).reshape(-1, 32)
+            trades = lambda column: (table[column][:, None, :] == wanted[None, :, :]).all(axis=2).any(axis=1)
+            table = table[trades("token_x_mint") | trades("token_y_mint")]
+        return [self.pools[int(pool)] for pool in table["pool"][:n]]
+
+    def start(self, client, interval: float = 60.0) -> threading.Thread:
+        '''
+        Refresh every `interval` seconds on a daemon thread until `stop` is called. Failed refreshes are
+        logged and retried at the next interval.
+        '''
+        self.__stop.clear()
+
+        def run() -> None:
+            while not self.__stop.is_set():
+                try:
+                    table = self.refresh(client)
+                    logger.info(f"Screened {len(table)} pools with {self.last_rpc_calls} RPC calls")
+                except Exception as e:
+                    logger.warning(f"Pool screening failed: {e}")
+                self.__stop.wait(interval)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self.__stop.set()
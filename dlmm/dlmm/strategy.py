@@ -0,0 +1,388 @@
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from .accounts import BASIS_POINT_MAX
+from .types import StrategyType
+
+DEFAULT_MAX_WEIGHT = 2000
+DEFAULT_MIN_WEIGHT = 200
+
+@dataclass
+class BinAmounts:
+    '''
+    Per-bin deposit amounts in lamports, one entry per bin of the range in ascending bin id order.
+    '''
+    bin_id: np.ndarray
+    amount_x: np.ndarray
+    amount_y: np.ndarray
+
+    @property
+    def total_x(self) -> int:
+        return int(self.amount_x.sum())
+
+    @property
+    def total_y(self) -> int:
+        return int(self.amount_y.sum())
+
+def _bin_prices(bin_ids: np.ndarray, bin_step: int) -> np.ndarray:
+    return np.power(1 + bin_step / BASIS_POINT_MAX, bin_ids.astype(np.float64))
+
+def _spot(bin_ids: np.ndarray) -> np.ndarray:
+    return np.ones(bin_ids.size, dtype=np.float64)
+
+def _ascending(bin_ids: np.ndarray, min_bin_id: int) -> np.ndarray:
+    return (bin_ids - min_bin_id + 1).astype(np.float64)
+
+def _descending(bin_ids: np.ndarray, max_bin_id: int) -> np.ndarray:
+    return (max_bin_id - bin_ids + 1).astype(np.float64)
+
+def _slopes(min_bin_id: int, max_bin_id: int, active_id: int) -> Tuple[int, int]:
+    if active_id < min_bin_id or active_id > max_bin_id:
+        raise ValueError("Invalid strategy params")
+    diff_weight = DEFAULT_MAX_WEIGHT - DEFAULT_MIN_WEIGHT
+    diff_min_weight = diff_weight // (active_id - min_bin_id) if active_id > min_bin_id else 0
+    diff_max_weight = diff_weight // (max_bin_id - active_id) if max_bin_id > active_id else 0
+    return diff_min_weight, diff_max_weight
+
+def _curve(bin_ids: np.ndarray, min_bin_id: int, max_bin_id: int, active_id: int) -> np.ndarray:
+    diff_min_weight, diff_max_weight = _slopes(min_bin_id, max_bin_id, active_id)
+    distance = np.abs(bin_ids - active_id)
+    slope = np.where(bin_ids < active_id, diff_min_weight, diff_max_weight)
+    return (DEFAULT_MAX_WEIGHT - distance * slope).astype(np.float64)
+
+def _bid_ask(bin_ids: np.ndarray, min_bin_id: int, max_bin_id: int, active_id: int) -> np.ndarray:
+    diff_min_weight, diff_max_weight = _slopes(min_bin_id, max_bin_id, active_id)
+    distance = np.abs(bin_ids - active_id)
+    slope = np.where(bin_ids < active_id, diff_min_weight, diff_max_weight)
+    return (DEFAULT_MIN_WEIGHT + distance * slope).astype(np.float64)
+
+def _floor(values: np.ndarray) -> np.ndarray:
+    return np.floor(values).astype(np.uint64)
+
+def _bid_side(total: int, weights: np.ndarray) -> np.ndarray:
+    # toAmountBidSide
+    if weights.sum() <= 0:
+        raise ValueError("Invalid parameters")
+    return _floor(total * (weights / weights.sum()))
+
+def _ask_side(bin_ids: np.ndarray, bin_step: int, total: int, weights: np.ndarray) -> np.ndarray:
+    # toAmountAskSide
+    weight_per_price = weights / _bin_prices(bin_ids, bin_step)
+    if weight_per_price.sum() <= 0:
+        raise ValueError("Invalid parameters")
+    return _floor(total * weight_per_price / weight_per_price.sum())
+
+def _active_bin_weights(
+    active_id: int,
+    bin_step: int,
+    weight: float,
+    amount_x_in_active_bin: int,
+    amount_y_in_active_bin: int
+) -> Tuple[float, float]:
+    # Split the active bin weight between X and Y following the bin's current composition.
+    p0 = float(_bin_prices(np.array([active_id]), bin_step)[0])
+    if amount_x_in_active_bin == 0 and amount_y_in_active_bin == 0:
+        return weight / (p0 * 2), weight / 2
+    wx0 = wy0 = 0.0
+    if amount_x_in_active_bin != 0:
+        wx0 = weight / (p0 + amount_y_in_active_bin / amount_x_in_active_bin)
+    if amount_y_in_active_bin != 0:
+        wy0 = weight / (1 + p0 * amount_x_in_active_bin / amount_y_in_active_bin)
+    return wx0, wy0
+
+def _side_weights(
+    active_id: int,
+    bin_step: int,
+    bin_ids: np.ndarray,
+    weights: np.ndarray,
+    amount_x_in_active_bin: int,
+    amount_y_in_active_bin: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    '''
+    Weight of every bin in X per unit of the liquidity constant `k`, and in Y. Bins below the active bin
+    take Y, bins above take X priced per bin, and the active bin, when in the range, is split between both.
+    '''
+    is_active = bin_ids == active_id
+    if is_active.any():
+        wx0, wy0 = _active_bin_weights(active_id, bin_step, float(weights[is_active][0]), amount_x_in_active_bin, amount_y_in_active_bin)
+        ask = bin_ids > active_id
+    else:
+        wx0 = wy0 = 0.0
+        ask = bin_ids >= active_id
+    weight_x = np.where(ask, weights / _bin_prices(bin_ids, bin_step), 0.0)
+    weight_y = np.where(bin_ids < active_id, weights, 0.0)
+    weight_x[is_active] = wx0
+    weight_y[is_active] = wy0
+    return weight_x, weight_y
+
+def _both_side(
+    active_id: int,
+    bin_step: int,
+    amount_x: int,
+    amount_y: int,
+    amount_x_in_active_bin: int,
+    amount_y_in_active_bin: int,
+    bin_ids: np.ndarray,
+    weights: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # toAmountBothSide
+    zero = np.zeros(bin_ids.size, dtype=np.uint64)
+    if active_id > bin_ids[-1]:
+        return zero, _bid_side(amount_y, weights)
+    if active_id < bin_ids[0]:
+        return _ask_side(bin_ids, bin_step, amount_x, weights), zero
+
+    weight_x, weight_y = _side_weights(active_id, bin_step, bin_ids, weights, amount_x_in_active_bin, amount_y_in_active_bin)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kx = np.float64(amount_x) / weight_x.sum()
+        ky = np.float64(amount_y) / weight_y.sum()
+    k = kx if kx < ky else ky
+    return _floor(k * weight_x), _floor(k * weight_y)
+
+def _balanced_weights(strategy_type: StrategyType, bin_ids: np.ndarray, min_bin_id: int, max_bin_id: int, active_id: int) -> np.ndarray:
+    if strategy_type == StrategyType.SpotBalanced:
+        return _spot(bin_ids)
+    if strategy_type == StrategyType.CurveBalanced:
+        return _curve(bin_ids, min_bin_id, max_bin_id, active_id)
+    return _bid_ask(bin_ids, min_bin_id, max_bin_id, active_id)
+
+def _imbalanced_weights(
+    strategy_type: StrategyType,
+    bin_ids: np.ndarray,
+    min_bin_id: int,
+    max_bin_id: int,
+    bid_end: int,
+    ask_start: int
+) -> np.ndarray:
+    # One-sided shapes: bid weights over [min_bin_id, bid_end], ask weights over [ask_start, max_bin_id].
+    bid = bin_ids <= bid_end
+    if strategy_type == StrategyType.SpotBalanced:
+        return _spot(bin_ids)
+    if strategy_type == StrategyType.CurveBalanced:
+        return np.where(bid, _ascending(bin_ids, min_bin_id), _descending(bin_ids, max_bin_id))
+    return np.where(bid, _descending(bin_ids, bid_end), _ascending(bin_ids, ask_start))
+
+def _out_of_range_weights(strategy_type: StrategyType, bin_ids: np.ndarray, min_bin_id: int, max_bin_id: int, active_id: int) -> np.ndarray:
+    # Spot keeps flat weights; Curve leans towards the active bin and BidAsk away from it.
+    if strategy_type == StrategyType.SpotBalanced:
+        return _spot(bin_ids)
+    descending = (strategy_type == StrategyType.CurveBalanced) == (active_id < min_bin_id)
+    return _descending(bin_ids, max_bin_id) if descending else _ascending(bin_ids, min_bin_id)
+
+def to_amounts_both_side_by_strategy(
+    active_id: int,
+    bin_step: int,
+    min_bin_id: int,
+    max_bin_id: int,
+    amount_x: int,
+    amount_y: int,
+    amount_x_in_active_bin: int,
+    amount_y_in_active_bin: int,
+    strategy_type: StrategyType,
+    balanced: bool = False
+) -> BinAmounts:
+    '''
+    Port of `toAmountsBothSideByStrategy`: how a strategy deposit of `amount_x` and `amount_y` spreads over
+    the bins of `[min_bin_id, max_bin_id]`, computed locally. The SDK works in 20 digit decimals and this
+    port in float64, so a bin can be a lamport off on very large amounts.
+
+    `StrategyType` values are sent to the program as they are, which makes them the imbalanced strategies
+    of the SDK: X and Y are spread independently on either side of the active bin. Set `balanced` to
+    preview the balanced strategies, which deposit both tokens in the same proportion.
+
+    Args:
+        active_id (int): The active bin of the pool.
+        bin_step (int): The bin step of the pool.
+        min_bin_id (int): The lowest bin of the range.
+        max_bin_id (int): The highest bin of the range.
+        amount_x (int): Amount of lamport of token X to deposit.
+        amount_y (int): Amount of lamport of token Y to deposit.
+        amount_x_in_active_bin (int): Amount of lamport of token X already in the active bin.
+        amount_y_in_active_bin (int): Amount of lamport of token Y already in the active bin.
+        strategy_type (StrategyType): The shape of the distribution.
+        balanced (bool): Preview the balanced variant of `strategy_type`.
+
+    '''
+    if type(strategy_type) != StrategyType:
+        raise TypeError("strategy_type must be of type `StrategyType`")
+
+    if min_bin_id > max_bin_id:
+        raise ValueError("min_bin_id must not be greater than max_bin_id")
+
+    bin_ids = np.arange(min_bin_id, max_bin_id + 1, dtype=np.int64)
+    zero = np.zeros(bin_ids.size, dtype=np.uint64)
+
+    if balanced:
+        weights = _balanced_weights(strategy_type, bin_ids, min_bin_id, max_bin_id, active_id)
+        return BinAmounts(bin_ids, *_both_side(active_id, bin_step, amount_x, amount_y, amount_x_in_active_bin, amount_y_in_active_bin, bin_ids, weights))
+
+    if active_id < min_bin_id or active_id > max_bin_id:
+        weights = _out_of_range_weights(strategy_type, bin_ids, min_bin_id, max_bin_id, active_id)
+        return BinAmounts(bin_ids, *_both_side(active_id, bin_step, amount_x, amount_y, amount_x_in_active_bin, amount_y_in_active_bin, bin_ids, weights))
+
+    # A single sided X deposit puts the active bin on the ask side, otherwise it takes Y.
+    bid_end = active_id - 1 if amount_y == 0 else active_id
+    weights = _imbalanced_weights(strategy_type, bin_ids, min_bin_id, max_bin_id, bid_end, bid_end + 1)
+    bid = bin_ids <= bid_end
+    amounts_x, amounts_y = zero.copy(), zero.copy()
+    if bid.any():
+        amounts_y[bid] = _bid_side(amount_y, weights[bid])
+    if (~bid).any():
+        amounts_x[~bid] = _ask_side(bin_ids[~bid], bin_step, amount_x, weights[~bid])
+    return BinAmounts(bin_ids, amounts_x, amounts_y)
+
+def _fill_weights(
+    active_id: int,
+    bin_step: int,
+    min_bin_id: int,
+    max_bin_id: int,
+    amount_x_in_active_bin: int,
+    amount_y_in_active_bin: int,
+    strategy_type: StrategyType,
+    balanced: bool
+) -> Tuple[float, float]:
+    if type(strategy_type) != StrategyType:
+        raise TypeError("strategy_type must be of type `StrategyType`")
+
+    bin_ids = np.arange(min_bin_id, max_bin_id + 1, dtype=np.int64)
+    if balanced:
+        weights = _balanced_weights(strategy_type, bin_ids, min_bin_id, max_bin_id, active_id)
+        weight_x, weight_y = _side_weights(active_id, bin_step, bin_ids, weights, amount_x_in_active_bin, amount_y_in_active_bin)
+        return float(weight_x.sum()), float(weight_y.sum())
+
+    # The SDK refuses to auto fill imbalanced strategies, whose sides are independent. Size the other
+    # leg so that both sides get the same amount per unit of weight, as a balanced deposit would.
+    if active_id < min_bin_id or active_id > max_bin_id:
+        weights = _out_of_range_weights(strategy_type, bin_ids, min_bin_id, max_bin_id, active_id)
+    else:
+        weights = _imbalanced_weights(strategy_type, bin_ids, min_bin_id, max_bin_id, active_id, active_id + 1)
+    bid = bin_ids <= active_id
+    weight_x = (weights[~bid] / _bin_prices(bin_ids[~bid], bin_step)).sum()
+    return float(weight_x), float(weights[bid].sum())
+
+def auto_fill_y_by_strategy(
+    active_id: int,
+    bin_step: int,
+    amount_x: int,
+    amount_x_in_active_bin: int,
+    amount_y_in_active_bin: int,
+    min_bin_id: int,
+    max_bin_id: int,
+    strategy_type: StrategyType,
+    balanced: bool = False
+) -> int:
+    '''
+    Port of `autoFillYByStrategy`: the amount of lamport of token Y to pair with `amount_x`. Arguments
+    are those of `to_amounts_both_side_by_strategy`.
+    '''
+    weight_x, weight_y = _fill_weights(active_id, bin_step, min_bin_id, max_bin_id, amount_x_in_active_bin, amount_y_in_active_bin, strategy_type, balanced)
+    kx = amount_x / weight_x if weight_x else 1.0
+    return int(np.floor(kx * weight_y))
+
+def auto_fill_x_by_strategy(
+    active_id: int,
+    bin_step: int,
+    amount_y: int,
+    amount_x_in_active_bin: int,
+    amount_y_in_active_bin: int,
+    min_bin_id: int,
+    max_bin_id: int,
+    strategy_type: StrategyType,
+    balanced: bool = False
+) -> int:
+    '''
+    Port of `autoFillXByStrategy`: the amount of lamport of token X to pair with `amount_y`. Arguments
+    are those of `to_amounts_both_side_by_strategy`.
+    '''
+    weight_x, weight_y = _fill_weights(active_id, bin_step, min_bin_id, max_bin_id, amount_x_in_active_bin, amount_y_in_active_bin, strategy_type, balanced)
+    ky = amount_y / weight_y if weight_y else 1.0
+    return int(np.floor(ky * weight_x))
+
+def _range_fill_weights(
+    active_id: int,
+    bin_step: int,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    amount_x_in_active_bin: int,
+    amount_y_in_active_bin: int,
+    strategy_type: StrategyType,
+    balanced: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    # `_fill_weights` of every range at once: one row per range over the bins all ranges span, with the
+    # bins outside a row's range masked to zero weight.
+    if type(strategy_type) != StrategyType:
+        raise TypeError("strategy_type must be of type `StrategyType`")
+    if (lower > upper).any():
+        raise ValueError("min_bin_id must not be greater than max_bin_id")
+
+    bin_ids = np.arange(lower.min(), upper.max() + 1, dtype=np.int64)[None, :]
+    lo, hi = lower[:, None], upper[:, None]
+    in_range = (bin_ids >= lo) & (bin_ids <= hi)
+    contains_active = (lo <= active_id) & (active_id <= hi)
+    prices = _bin_prices(bin_ids, bin_step)
+
+    if balanced:
+        if strategy_type == StrategyType.SpotBalanced:
+            weights = np.ones(in_range.shape)
+        else:
+            if not contains_active.all():
+                raise ValueError("Invalid strategy params")
+            diff_weight = DEFAULT_MAX_WEIGHT - DEFAULT_MIN_WEIGHT
+            diff_min_weight = np.where(lo < active_id, diff_weight // np.maximum(active_id - lo, 1), 0)
+            diff_max_weight = np.where(hi > active_id, diff_weight // np.maximum(hi - active_id, 1), 0)
+            slope = np.where(bin_ids < active_id, diff_min_weight, diff_max_weight)
+            distance = np.abs(bin_ids - active_id) * slope
+            curve = strategy_type == StrategyType.CurveBalanced
+            weights = (DEFAULT_MAX_WEIGHT - distance if curve else DEFAULT_MIN_WEIGHT + distance).astype(np.float64)
+        weights = np.where(in_range, weights, 0.0)
+        # The active bin is split between X and Y; the split is linear in its weight.
+        fx, fy = _active_bin_weights(active_id, bin_step, 1.0, amount_x_in_active_bin, amount_y_in_active_bin)
+        active_weight = np.where(contains_active[:, 0], weights[:, bin_ids[0] == active_id].sum(axis=1), 0.0)
+        weight_x = np.where(bin_ids > active_id, weights / prices, 0.0).sum(axis=1) + active_weight * fx
+        weight_y = np.where(bin_ids < active_id, weights, 0.0).sum(axis=1) + active_weight * fy
+        return weight_x, weight_y
+
+    # Imbalanced shapes, see `_imbalanced_weights` and `_out_of_range_weights`.
+    bid = bin_ids <= active_id
+    if strategy_type == StrategyType.SpotBalanced:
+        weights = np.ones(in_range.shape)
+    else:
+        ascending = (bin_ids - lo + 1).astype(np.float64)
+        descending = (hi - bin_ids + 1).astype(np.float64)
+        if strategy_type == StrategyType.CurveBalanced:
+            inside = np.where(bid, ascending, descending)
+        else:
+            inside = np.where(bid, active_id - bin_ids + 1, bin_ids - active_id).astype(np.float64)
+        outside = np.where((strategy_type == StrategyType.CurveBalanced) == (active_id < lo), descending, ascending)
+        weights = np.where(contains_active, inside, outside)
+    weights = np.where(in_range, weights, 0.0)
+    weight_x = np.where(bid, 0.0, weights / prices).sum(axis=1)
+    weight_y = np.where(bid, weights, 0.0).sum(axis=1)
+    return weight_x, weight_y
+
+def auto_fill_y_for_ranges(
+    active_id: int,
+    bin_step: int,
+    amount_x: int,
+    ranges: Sequence[Tuple[int, int]],
+    strategy_type: StrategyType,
+    amount_x_in_active_bin: int = 0,
+    amount_y_in_active_bin: int = 0,
+    balanced: bool = False
+) -> np.ndarray:
+    '''
+    `auto_fill_y_by_strategy` over many `(min_bin_id, max_bin_id)` ranges, for what-if comparisons. All
+    ranges are evaluated together as one ranges x bins weight matrix, so the cost grows with the number
+    of ranges times the span they cover.
+    '''
+    bounds = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+    if bounds.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    weight_x, weight_y = _range_fill_weights(
+        active_id, bin_step, bounds[:, 0], bounds[:, 1], amount_x_in_active_bin, amount_y_in_active_bin, strategy_type, balanced
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kx = np.where(weight_x != 0, amount_x / weight_x, 1.0)
+    return np.floor(kx * weight_y).astype(np.uint64)
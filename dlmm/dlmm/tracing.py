@@ -0,0 +1,183 @@
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Set
+from urllib.parse import urlparse
+
+import requests
+
+from .metrics import _rpc_method
+
+TRACE_HEADER = "x-trace-id"
+SPANS_HEADER = "x-trace-spans"
+
+class _Active:
+    __slots__ = ("tracer", "trace_id")
+
+    def __init__(self, tracer: "Tracer", trace_id: str) -> None:
+        self.tracer = tracer
+        self.trace_id = trace_id
+
+_current: ContextVar[Optional[_Active]] = ContextVar("dlmm_trace", default=None)
+
+def current_trace_id() -> Optional[str]:
+    active = _current.get()
+    return active.trace_id if active is not None else None
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+class Tracer:
+    '''
+    Writes traces to `path` as Chrome trace events, viewable as a flame chart in Perfetto
+    (https://ui.perfetto.dev) or chrome://tracing. `trace` starts a trace; inside it `span` times
+    sections, and sessions and clients wrapped with `trace_session` and `trace_client` record every
+    server and RPC call, together with the spans the server returns for that call (on the same host, so
+    both clocks agree).
+
+    Events are appended as each span ends and the JSON array is never closed, which both viewers
+    accept, so the file can be opened while the bot is running.
+
+    Args:
+        path (Optional[str]): The trace file, truncated on start. Tracing is disabled when None.
+        process_name (str): Label of this process in the viewer.
+
+    '''
+    def __init__(self, path: Optional[str], process_name: str = "trader") -> None:
+        self.path = path
+        self.__file = None
+        self.__named: Set[int] = set()
+        self.__lock = threading.Lock()
+        if path is not None:
+            self.__file = open(path, "w")
+            self.__file.write("[\n")
+            self.__name_process(os.getpid(), process_name)
+
+    @property
+    def enabled(self) -> bool:
+        return self.__file is not None
+
+    def __write(self, event: dict) -> None:
+        with self.__lock:
+            if self.__file is None:
+                return
+            self.__file.write(json.dumps(event) + ",\n")
+            self.__file.flush()
+
+    def __name_process(self, pid: int, name: str) -> None:
+        if pid not in self.__named:
+            self.__named.add(pid)
+            self.__write({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}})
+
+    @contextmanager
+    def trace(self, name: str, **args) -> Iterator[Optional[str]]:
+        '''
+        Run the block as a new trace with a root span called `name`, yielding its id. Nested inside
+        another trace the block is only a span of it; with tracing disabled nothing is recorded.
+        '''
+        if not self.enabled:
+            yield None
+            return
+        if _current.get() is not None:
+            with span(name, **args):
+                yield current_trace_id()
+            return
+        token = _current.set(_Active(self, secrets.token_hex(16)))
+        try:
+            with span(name, **args):
+                yield current_trace_id()
+        finally:
+            _current.reset(token)
+
+    def record(self, name: str, trace_id: str, start_us: int, duration_us: int, pid: int, tid: int, args: Optional[dict] = None) -> None:
+        self.__write({
+            "name": name,
+            "ph": "X",
+            "ts": start_us,
+            "dur": duration_us,
+            "pid": pid,
+            "tid": tid,
+            "args": dict(args or {}, trace_id=trace_id)
+        })
+
+    def record_remote(self, trace_id: str, header: str) -> None:
+        '''
+        Record the spans of a server response's `x-trace-spans` header under the server's process.
+        '''
+        try:
+            remote = json.loads(header)
+            pid = int(remote["pid"])
+            spans = remote["spans"]
+        except (ValueError, KeyError, TypeError):
+            return
+        self.__name_process(pid, "dlmm server")
+        for item in spans:
+            self.record(item["name"], trace_id, int(item["ts"]), int(item["dur"]), pid, int(item["lane"]) + 1)
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+@contextmanager
+def span(name: str, **args) -> Iterator[None]:
+    '''
+    Time the block as a span of the current trace; does nothing outside a trace. Also usable as a
+    function decorator.
+    '''
+    active = _current.get()
+    if active is None:
+        yield
+        return
+    start_us, start = _now_us(), time.perf_counter_ns()
+    try:
+        yield
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        duration_us = (time.perf_counter_ns() - start) // 1000
+        active.tracer.record(name, active.trace_id, start_us, duration_us, os.getpid(), threading.get_native_id(), args)
+
+def trace_session(session: requests.Session) -> requests.Session:
+    '''
+    Within a trace, send its id in the `x-trace-id` header of every request of `session`, record each
+    request as a span and add the spans the server returns.
+    '''
+    request = session.request
+
+    def traced(method, url, *args, **kwargs):
+        active = _current.get()
+        if active is None:
+            return request(method, url, *args, **kwargs)
+        kwargs["headers"] = dict(kwargs.get("headers") or {}, **{TRACE_HEADER: active.trace_id})
+        with span(f"{method} {urlparse(url).path}"):
+            response = request(method, url, *args, **kwargs)
+        spans = response.headers.get(SPANS_HEADER)
+        if spans:
+            active.tracer.record_remote(active.trace_id, spans)
+        return response
+
+    session.request = traced
+    return session
+
+def trace_client(client):
+    '''
+    Within a trace, record every request of a `solana.rpc.api.Client` as a span named after its RPC method.
+    '''
+    provider = client._provider
+    make_request = provider.make_request
+
+    def traced(body, *args, **kwargs):
+        if _current.get() is None:
+            return make_request(body, *args, **kwargs)
+        with span(f"rpc {_rpc_method(body)}"):
+            return make_request(body, *args, **kwargs)
+
+    provider.make_request = traced
+    return client
@@ -0,0 +1,186 @@
+import socket
+from typing import Optional, Tuple, Union
+from urllib.parse import unquote, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+UDS_SCHEME = "http+unix"
+
+class _UnixHTTPConnection(HTTPConnection):
+    '''
+    HTTP/1.1 connection that talks to the server over a Unix domain socket instead of TCP.
+    '''
+    def __init__(self, *args, socket_path: str, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.socket_path = socket_path
+
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+class _UnixHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _UnixHTTPConnection
+
+class UnixSocketAdapter(HTTPAdapter):
+    '''
+    Requests adapter that sends every request mounted on it to a single Unix domain socket.
+    '''
+    def __init__(self, socket_path: str, pool_maxsize: int = 10) -> None:
+        self.socket_path = socket_path
+        self.__pool_maxsize = pool_maxsize
+        self.__pool: Optional[_UnixHTTPConnectionPool] = None
+        super().__init__(pool_maxsize=pool_maxsize)
+
+    def _get_pool(self) -> _UnixHTTPConnectionPool:
+        if self.__pool is None:
+            self.__pool = _UnixHTTPConnectionPool(
+                "localhost",
+                maxsize=self.__pool_maxsize,
+                socket_path=self.socket_path
+            )
+        return self.__pool
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        return self._get_pool()
+
+    def get_connection(self, url, proxies=None):
+        return self._get_pool()
+
+    def request_url(self, request, proxies):
+        return request.path_url
+
+    def close(self) -> None:
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool = None
+        super().close()
+
+class Transport:
+    '''
+    Transport describes how the DLMM client reaches the TypeScript server: plain TCP, TLS or a Unix domain socket.
+
+    Responses are compressed by the server when `compression` is on; decoding is done by urllib3, which
+    accepts gzip and deflate, plus br and zstd when `brotli` / `zstandard` are installed. Compression is
+    off by default over a Unix domain socket, where it only costs CPU.
+    '''
+    base_url: str
+    socket_path: Optional[str]
+    verify: Union[bool, str]
+    cert: Optional[Union[str, Tuple[str, str]]]
+    compression: bool
+
+    def __init__(
+        self,
+        base_url: str,
+        socket_path: Optional[str] = None,
+        verify: Union[bool, str] = True,
+        cert: Optional[Union[str, Tuple[str, str]]] = None,
+        compression: Optional[bool] = None
+    ) -> None:
+        if type(base_url) != str:
+            raise TypeError("base_url must be of type `str`")
+
+        if compression is not None and type(compression) != bool:
+            raise TypeError("compression must be of type `bool`")
+
+        self.base_url = base_url.rstrip("/")
+        self.socket_path = socket_path
+        self.verify = verify
+        self.cert = cert
+        self.compression = compression if compression is not None else socket_path is None
+
+    @staticmethod
+    def tcp(host: str = "localhost", port: int = 3000, compression: bool = True) -> "Transport":
+        '''
+        Plain HTTP over TCP, the default for a server started with `npm run start-server`.
+
+        Args:
+            host (str): The host the server listens on.
+            port (int): The port the server listens on.
+            compression (bool): Whether to ask the server for compressed responses.
+
+        '''
+        return Transport(f"http://{host}:{port}", compression=compression)
+
+    @staticmethod
+    def tls(host: str, port: int = 443, verify: Union[bool, str] = True, cert: Optional[Union[str, Tuple[str, str]]] = None, compression: bool = True) -> "Transport":
+        '''
+        HTTPS, for a server running on a different box.
+
+        Args:
+            host (str): The host the server listens on.
+            port (int): The port the server listens on.
+            verify (Union[bool, str]): Whether to verify the server certificate, or the path of a CA bundle to verify it with.
+            cert (Optional[Union[str, Tuple[str, str]]]): Client certificate, either a single file or a (cert, key) pair.
+            compression (bool): Whether to ask the server for compressed responses.
+
+        '''
+        return Transport(f"https://{host}:{port}", verify=verify, cert=cert, compression=compression)
+
+    @staticmethod
+    def uds(socket_path: str, compression: bool = False) -> "Transport":
+        '''
+        HTTP over a Unix domain socket, for a server on the same box started with `DLMM_SOCKET` set.
+
+        Args:
+            socket_path (str): The path of the socket file.
+            compression (bool): Whether to ask the server for compressed responses.
+
+        '''
+        if type(socket_path) != str:
+            raise TypeError("socket_path must be of type `str`")
+
+        return Transport(f"{UDS_SCHEME}://dlmm", socket_path=socket_path, compression=compression)
+
+    @staticmethod
+    def from_url(url: str) -> "Transport":
+        '''
+        Build a transport from a URL. `unix:///path/to/dlmm.sock` selects a Unix domain socket,
+        `https://` selects TLS and anything else is treated as plain HTTP.
+
+        Args:
+            url (str): The server URL.
+
+        '''
+        if type(url) != str:
+            raise TypeError("url must be of type `str`")
+
+        parsed = urlparse(url)
+        if parsed.scheme in ("unix", UDS_SCHEME):
+            return Transport.uds(unquote(parsed.path or parsed.netloc))
+        if parsed.scheme not in ("http", "https"):
+            return Transport(f"http://{url}")
+        return Transport(url)
+
+    @property
+    def is_uds(self) -> bool:
+        return self.socket_path is not None
+
+    def session(self) -> requests.Session:
+        '''
+        Create a `requests.Session` wired to this transport.
+        '''
+        session = requests.Session()
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING if self.compression else "identity"
+        session.verify = self.verify
+        if self.cert is not None:
+            session.cert = self.cert
+        if self.socket_path is not None:
+            session.mount(f"{UDS_SCHEME}://", UnixSocketAdapter(self.socket_path))
+        return session
+
+    def __str__(self) -> str:
+        if self.socket_path is not None:
+            return f"Transport(uds={self.socket_path})"
+        return f"Transport(url={self.base_url})"
@@ -1,8 +1,10 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
 from enum import Enum, IntEnum
 from solders.pubkey import Pubkey
-from typing import Any, List, TypedDict, Optional, Dict
+from typing import Any, Callable, List, Tuple, TypedDict, Optional, Dict
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +60,7 @@ class StrategyParameters:
 
 @dataclass
 class ActiveBin():
+    __slots__ = ("bin_id", "x_amount", "y_amount", "supply", "price", "version", "price_per_token")
     bin_id: int
     x_amount: str
     y_amount: str
@@ -77,6 +80,10 @@ class ActiveBin():
 
 @dataclass
 class PositionBinData():
+    __slots__ = (
+        "bin_id", "price", "price_per_token", "bin_x_Amount", "bin_y_Amount", "bin_liquidity",
+        "position_liquidity", "position_x_amount", "position_y_amount"
+    )
     bin_id: int
     price: str
     price_per_token: str
@@ -130,11 +137,121 @@ class PositionBinData():
             "positionYAmount": self.position_y_amount
         }
 
+def _int_column(values: list) -> np.ndarray:
+    return np.array(values, dtype=np.int64)
+
+def _decimal_column(values: list) -> np.ndarray:
+    # Approximate: prices and UI-scaled amounts, which may be fractional.
+    return np.array(values, dtype=np.float64)
+
+def _exact_column(amounts: List[int]) -> np.ndarray:
+    # u64 amounts fit uint64; u128 liquidity above that is kept as Python ints (object dtype).
+    if all(0 <= amount < 2 ** 64 for amount in amounts):
+        return np.array(amounts, dtype=np.uint64)
+    return np.array(amounts, dtype=object)
+
+def _amount_column(values: list) -> np.ndarray:
+    try:
+        return _exact_column([int(value) for value in values])
+    except ValueError:
+        return _decimal_column(values)
+
+def _hex_column(values: list) -> np.ndarray:
+    return _exact_column([int(value, 16) for value in values])
+
+class _Column:
+    '''
+    A numeric column of `BinColumns`: the field `key` of every row, parsed once by `parse`.
+    '''
+    def __init__(self, key: str, parse: Callable[[list], np.ndarray]) -> None:
+        self.key = key
+        self.parse = parse
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Optional["BinColumns"], owner: type) -> Any:
+        if instance is None:
+            return self
+        return instance._column(self.name, self.key, self.parse)
+
+class BinColumns(Sequence):
+    '''
+    Per-bin data of a response, kept as the parsed JSON rows. Numeric columns are read-only arrays
+    built on first access: bin ids are int64; token amounts and liquidity are exact (uint64, or
+    object arrays of ints past 2**64); prices and the decimal position amounts are float64 and
+    therefore approximate past 2**53. The per-bin objects are only built when indexed or iterated,
+    and then kept.
+
+    Args:
+        rows (List[dict]): The per-bin rows of the response.
+
+    '''
+    _item: type = dict
+
+    def __init__(self, rows: List[dict]) -> None:
+        self._rows = rows
+        self._items: List[Any] = [None] * len(rows)
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if item is None:
+            item = self._items[index] = self._item(self._rows[index])
+        return item
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (BinColumns, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} bins)"
+
+    def _column(self, name: str, key: str, parse: Callable[[list], np.ndarray]) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            try:
+                array = parse([row[key] for row in self._rows])
+            except KeyError:
+                raise AttributeError(f"{key} is required")
+            array.flags.writeable = False
+            self._arrays[name] = array
+        return array
+
+class PositionBins(BinColumns):
+    '''
+    `PositionBinData` of a position, see `BinColumns`.
+    '''
+    _item = PositionBinData
+    bin_ids = _Column("binId", _int_column)
+    prices = _Column("price", _decimal_column)
+    prices_per_token = _Column("pricePerToken", _decimal_column)
+    x_amounts = _Column("positionXAmount", _decimal_column)
+    y_amounts = _Column("positionYAmount", _decimal_column)
+    liquidity = _Column("positionLiquidity", _decimal_column)
+    bin_x_amounts = _Column("binXAmount", _amount_column)
+    bin_y_amounts = _Column("binYAmount", _amount_column)
+    bin_liquidity = _Column("binLiquidity", _amount_column)
+
+    def to_json(self) -> List[dict]:
+        return [bin_data.to_json() for bin_data in self]
+
 @dataclass
 class PositionData():
+    __slots__ = (
+        "total_x_amount", "total_y_amount", "position_bin_data", "last_updated_at", "upper_bin_id", "lower_bin_id",
+        "fee_X", "fee_Y", "reward_one", "reward_two", "fee_owner", "total_claimed_fee_X_amount",
+        "total_claimed_fee_Y_amount", "_amounts"
+    )
     total_x_amount: str
     total_y_amount: str
-    position_bin_data: List[PositionBinData]
+    position_bin_data: PositionBins
     last_updated_at: int
     upper_bin_id: int
     lower_bin_id: int
@@ -176,7 +293,7 @@ class PositionData():
 
         self.total_x_amount = data["totalXAmount"]
         self.total_y_amount = data["totalYAmount"]
-        self.position_bin_data = [PositionBinData(bin_data) for bin_data in data["positionBinData"]]
+        self.position_bin_data = PositionBins(data["positionBinData"])
         self.last_updated_at = data["lastUpdatedAt"]
         self.upper_bin_id = data["upperBinId"]
         self.lower_bin_id = data["lowerBinId"]
@@ -187,12 +304,44 @@ class PositionData():
         self.fee_owner = data["feeOwner"]
         self.total_claimed_fee_X_amount = data["totalClaimedFeeXAmount"]
         self.total_claimed_fee_Y_amount = data["totalClaimedFeeYAmount"]
+        self._amounts: Optional[Tuple[int, int, int, int]] = None
+
+    @property
+    def amounts(self) -> Tuple[int, int, int, int]:
+        '''
+        Fee X, fee Y, reward one and reward two in lamports, parsed once from their hex strings.
+        '''
+        if self._amounts is None:
+            self._amounts = tuple(int(value, 16) if value else 0 for value in (self.fee_X, self.fee_Y, self.reward_one, self.reward_two))
+        return self._amounts
+
+    @property
+    def fee_x_amount(self) -> int:
+        return self.amounts[0]
+
+    @property
+    def fee_y_amount(self) -> int:
+        return self.amounts[1]
+
+    @property
+    def reward_one_amount(self) -> int:
+        return self.amounts[2]
+
+    @property
+    def reward_two_amount(self) -> int:
+        return self.amounts[3]
+
+    def fee_ui_amounts(self, token_x: "TokenReserve", token_y: "TokenReserve") -> Tuple[float, float]:
+        '''
+        Fee X and fee Y scaled by the decimals of the tokens of the pair.
+        '''
+        return token_x.ui_amount(self.fee_x_amount), token_y.ui_amount(self.fee_y_amount)
     
     def to_json(self) -> dict:
         return {
             "totalXAmount": self.total_x_amount,
             "totalYAmount": self.total_y_amount,
-            "positionBinData": [bin_data.to_json() for bin_data in self.position_bin_data],
+            "positionBinData": self.position_bin_data.to_json(),
             "lastUpdatedAt": self.last_updated_at,
             "upperBinId": self.upper_bin_id,
             "lowerBinId": self.lower_bin_id,
@@ -206,6 +355,8 @@ class PositionData():
         }
 
 class Position:
+    __slots__ = ("public_key", "position_data", "version")
+
     def __init__(self, public_key: Pubkey, position_data: PositionData, version: str = "1"):
         self.public_key = public_key
         self.position_data = position_data
@@ -230,15 +381,65 @@ class Position:
         return f"Position(public_key={self.public_key}, version={self.version})"
 
 @dataclass
+class PositionTotals():
+    '''
+    Fees and rewards summed over many positions, in lamports. Each sum is over amounts of a single token,
+    which never exceed its supply, so the u64 columns cannot overflow.
+    '''
+    count: int
+    fee_x: int
+    fee_y: int
+    reward_one: int
+    reward_two: int
+
+    @classmethod
+    def of(cls, positions: Sequence[Position]) -> "PositionTotals":
+        amounts = np.array([position.position_data.amounts for position in positions], dtype=np.uint64).reshape(-1, 4)
+        fee_x, fee_y, reward_one, reward_two = (int(total) for total in amounts.sum(axis=0))
+        return cls(len(positions), fee_x, fee_y, reward_one, reward_two)
+
+    @property
+    def fees_and_rewards(self) -> int:
+        return self.fee_x + self.fee_y + self.reward_one + self.reward_two
+
+    def fee_ui_amounts(self, token_x: "TokenReserve", token_y: "TokenReserve") -> Tuple[float, float]:
+        return token_x.ui_amount(self.fee_x), token_y.ui_amount(self.fee_y)
+
 class GetPositionByUser():
-    active_bin: ActiveBin
-    user_positions: List[Position]
+    '''
+    Positions of a user in one LB pair. Only the decoded top level of the response is kept; `active_bin`
+    and `user_positions` are built on first access, and the bins of each position only when they are
+    used (see `PositionBins`). `position_keys` and `fingerprint` read the response without building
+    any object, which is all an "anything changed?" check needs.
+    '''
+    __slots__ = ("_data", "_active_bin", "_user_positions", "_totals")
 
     def __init__(self, data: dict):
-        self.active_bin = ActiveBin(data["activeBin"])
-        self.user_positions = []
-        if "userPositions" in data:
-            for position_data in data["userPositions"]:
+        # Error bodies (e.g. a 400 with `{}`) must not parse as "no positions".
+        if not isinstance(data, dict) or "activeBin" not in data:
+            raise KeyError("activeBin")
+        self._data = data
+        self._active_bin: Optional[ActiveBin] = None
+        self._user_positions: Optional[List[Position]] = None
+        self._totals: Optional[PositionTotals] = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(active_bin={self.active_bin}, user_positions={len(self._raw_positions())} positions)"
+
+    def _raw_positions(self) -> List[dict]:
+        return self._data.get("userPositions") or []
+
+    @property
+    def active_bin(self) -> ActiveBin:
+        if self._active_bin is None:
+            self._active_bin = ActiveBin(self._data["activeBin"])
+        return self._active_bin
+
+    @property
+    def user_positions(self) -> List[Position]:
+        if self._user_positions is None:
+            self._user_positions = []
+            for position_data in self._raw_positions():
                 try:
                     if "publicKey" in position_data and "positionData" in position_data:
                         position = Position(
@@ -246,12 +447,52 @@ class GetPositionByUser():
                             position_data=PositionData(position_data["positionData"]),
                             version=position_data.get("version", "1")
                         )
-                        self.user_positions.append(position)
+                        self._user_positions.append(position)
                     else:
                         logger.warning(f"Skipping invalid position data: {position_data}")
                 except Exception as e:
                     logger.error(f"Error creating position: {str(e)}")
                     logger.error(f"Position data: {position_data}")
+        return self._user_positions
+
+    @property
+    def totals(self) -> PositionTotals:
+        '''
+        Fees and rewards of `user_positions`, computed once per response.
+        '''
+        if self._totals is None:
+            self._totals = PositionTotals.of(self.user_positions)
+        return self._totals
+
+    @property
+    def position_keys(self) -> List[str]:
+        '''
+        Public keys of the positions, as strings.
+        '''
+        return [position["publicKey"] for position in self._raw_positions() if "publicKey" in position]
+
+    def fingerprint(self) -> tuple:
+        '''
+        The key, last update, amounts, fees and rewards of every position. Equal fingerprints mean
+        nothing a position reports changed between two responses.
+        '''
+        fields = ("lastUpdatedAt", "totalXAmount", "totalYAmount", "feeX", "feeY", "rewardOne", "rewardTwo")
+        return tuple(
+            (position.get("publicKey"),) + tuple(position.get("positionData", {}).get(field) for field in fields)
+            for position in self._raw_positions()
+        )
+
+class PositionChanges(GetPositionByUser):
+    '''
+    Positions changed since a slot, see `DLMM.get_position_changes`. Parsed lazily like `GetPositionByUser`.
+    '''
+    __slots__ = ("closed_positions", "slot", "full")
+
+    def __init__(self, data: dict):
+        super().__init__(data)
+        self.closed_positions = [Pubkey.from_string(key) for key in data.get("closedPositions", [])]
+        self.slot = int(data["slot"])
+        self.full = bool(data.get("full", False))
 
 @dataclass
 class SwapQuote:
@@ -293,6 +534,25 @@ class SwapQuote:
             f"end_price={self.end_price})"
         )
 
+@dataclass
+class SwapQuoteLadderStep:
+    in_amount: int
+    consumed_in_amount: int
+    out_amount: int
+    fee: int
+    protocol_fee: int
+    price_impact: float
+    end_price: float
+
+    def __init__(self, data: dict) -> None:
+        self.in_amount = int(data["inAmount"], 16)
+        self.consumed_in_amount = int(data["consumedInAmount"], 16)
+        self.out_amount = int(data["outAmount"], 16)
+        self.fee = int(data["fee"], 16)
+        self.protocol_fee = int(data["protocolFee"], 16)
+        self.price_impact = float(data["priceImpact"])
+        self.end_price = float(data["endPrice"])
+
 class LBPair:
     bump_seed: List[int]
     bin_step_seed: List[int]
@@ -342,6 +602,12 @@ class TokenReserve():
         self.amount = data["amount"]
         self.decimal = data["decimal"]
 
+    def ui_amount(self, amount: int) -> float:
+        '''
+        `amount` in lamports of this token, scaled by its decimals.
+        '''
+        return amount / 10 ** self.decimal
+
 @dataclass
 class PositionInfo():
     public_key: Pubkey
@@ -370,6 +636,7 @@ class FeeInfo():
 
 @dataclass
 class BinLiquidty():
+    __slots__ = ("bin_id", "x_amount", "y_amount", "supply", "version", "price", "price_per_token")
     bin_id: int
     x_amount: str
     y_amount: str
@@ -400,10 +667,23 @@ class BinLiquidty():
         self.price = data["price"]
         self.price_per_token = data["pricePerToken"]
 
+class BinLiquidityColumns(BinColumns):
+    '''
+    `BinLiquidty` of a bin range, see `BinColumns`. Amounts and supply arrive as hex strings.
+    '''
+    _item = BinLiquidty
+    bin_ids = _Column("binId", _int_column)
+    prices = _Column("price", _decimal_column)
+    prices_per_token = _Column("pricePerToken", _decimal_column)
+    x_amounts = _Column("xAmount", _hex_column)
+    y_amounts = _Column("yAmount", _hex_column)
+    liquidity = _Column("supply", _hex_column)
+
 @dataclass
 class GetBins():
+    __slots__ = ("active_bin", "bin_liquidty")
     active_bin: int
-    bin_liquidty: List[BinLiquidty]
+    bin_liquidty: BinLiquidityColumns
 
     def __init__(self, data: dict) -> None:
         if data.get("activeBin") is None:
@@ -413,4 +693,4 @@ class GetBins():
             raise AttributeError("bins is required")
         
         self.active_bin = int(data["activeBin"])
-        self.bin_liquidty = [BinLiquidty(bin_data) for bin_data in data["bins"]]
\ No newline at end of file
+        self.bin_liquidty = BinLiquidityColumns(data["bins"])
\ No newline at end of file
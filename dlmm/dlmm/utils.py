@@ -1,10 +1,24 @@
-from typing import List
+import json
+from typing import Any, List, Union
 from solders.hash import Hash
 from solders.pubkey import Pubkey
 from solders.keypair import Keypair
 from solana.transaction import Transaction
 from solders.instruction import Instruction, AccountMeta
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads(content: Union[bytes, str]) -> Any:
+    '''
+    Decode a JSON response body, with orjson when it is installed.
+    '''
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
 def convert_to_transaction(response: dict) -> Transaction:
     # 檢查 recentBlockhash 的類型
     if isinstance(response["recentBlockhash"], Hash):
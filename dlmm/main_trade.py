@@ -5,7 +5,22 @@ from solders.pubkey import Pubkey
 from solana.rpc.api import Client
 from solana.transaction import Transaction
 from dlmm.dlmm import DLMM
-from dlmm.types import GetPositionByUser, StrategyType, SwapQuote, StrategyParameters, Position
+from dlmm.cache import ResponseCache
+from dlmm.metadata_cache import PoolMetadataCache
+import threading
+import functools
+import signal
+from dlmm.types import GetPositionByUser, PositionChanges, PositionTotals, StrategyType, SwapQuote, StrategyParameters, Position
+from dlmm import accounts
+from dlmm.bin_book import BinBook
+from dlmm.executor import ChildOrderFailed, ExecutionReport, SlicedSwapExecutor
+from dlmm.quote import QuoteLadder
+from dlmm.screener import PoolScreener
+from dlmm.log_pipeline import JsonLinesFormatter, RateLimitFilter, setup_logging
+from dlmm.metrics import Metrics, instrument_client
+from dlmm.tracing import Tracer, span, trace_client
+from dlmm.profiler import CycleProfiler
+from dlmm.strategy import auto_fill_x_by_strategy, auto_fill_y_by_strategy, to_amounts_both_side_by_strategy
 import time
 from spl.token.instructions import get_associated_token_address, create_associated_token_account, transfer
 from spl.token.constants import TOKEN_PROGRAM_ID
@@ -28,7 +43,7 @@ log_dir = "logs"
 if not os.path.exists(log_dir):
     os.makedirs(log_dir)
 
-# 設置日誌格式
+# 設置日誌格式：控制台為文字，文件為 JSON lines
 log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
 # 設置日誌文件名（使用日期）
@@ -41,23 +56,21 @@ file_handler = TimedRotatingFileHandler(
     interval=1,
     backupCount=30  # 保留30天的日誌
 )
-file_handler.setFormatter(log_format)
+file_handler.setFormatter(JsonLinesFormatter())
 file_handler.suffix = "%Y%m%d"  # 日誌文件後綴格式
 
 # 創建 console handler
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(log_format)
 
-# 配置 root logger
+# 配置 root logger：交易線程只把記錄放入隊列，格式化及寫入由背景線程處理
+# 同一行代碼的 INFO 及以下日誌每秒最多 1 條（可突發 20 條），WARNING 以上不受限
+log_listener = setup_logging(
+    [file_handler, console_handler],
+    level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO),
+    rate_limit=RateLimitFilter(rate=1.0, burst=20)
+)
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
-
-# 移除之前的基礎配置（如果有的話）
-for handler in logger.handlers[:]:
-    if isinstance(handler, logging.StreamHandler) and handler != console_handler:
-        logger.removeHandler(handler)
 
 # 添加一個啟動標記到日誌
 logger.info("="*50)
@@ -88,6 +101,70 @@ def create_sync_native_instruction(native_account: Pubkey) -> Instruction:
         data=data
     )
 
+class BookVenue:
+    """
+    以本地 bin book 報價、在鏈上執行子單的 Venue，供 SlicedSwapExecutor 使用
+    """
+    def __init__(self, trader: "DLMMTrader", book: BinBook, in_token: Pubkey, out_token: Pubkey):
+        self.trader = trader
+        self.book = book
+        self.in_token = in_token
+        self.out_token = out_token
+
+    def slot(self) -> int:
+        return self.trader.client.get_slot().value
+
+    def wait_for_slot(self, slot: int) -> None:
+        while self.slot() < slot:
+            time.sleep(0.4)
+
+    def active_price(self) -> float:
+        # 每個子單前刷新 LbPair 與 bin arrays，報價總是基於最新的 bin book
+        data = accounts.get_multiple_accounts(self.trader.client, [self.book.lb_pair])[0]
+        self.book.apply_lb_pair(data)
+        self.book.sync(self.trader.client)
+        return (1 + self.book.bin_step / accounts.BASIS_POINT_MAX) ** self.book.active_id
+
+    def quote(self, amounts: List[int], swap_for_y: bool) -> QuoteLadder:
+        return self.book.quote(amounts, swap_for_y)
+
+    def _out_balance(self) -> int:
+        ata = get_associated_token_address(self.trader.wallet.pubkey(), self.out_token)
+        try:
+            return int(self.trader.client.get_token_account_balance(ata).value.amount)
+        except Exception:
+            return 0
+
+    def execute(self, amount: int, swap_for_y: bool, min_out_amount: int) -> int:
+        # swap 指令需要從 active bin 到報價終點 bin 之間已初始化的 bin arrays（流動性缺口中的帳戶不存在）
+        end_bin_id = int(self.quote([amount], swap_for_y).end_bin_id[0])
+        bin_arrays = self.book.swap_bin_arrays(end_bin_id)
+
+        before = self._out_balance()
+        swap_tx = self.trader.dlmm.swap(
+            self.in_token,
+            self.out_token,
+            amount,
+            min_out_amount,
+            self.book.lb_pair,
+            self.trader.wallet.pubkey(),
+            bin_arrays
+        )
+        signature = send_transaction_with_priority(self.trader.client, swap_tx, self.trader.wallet, 'high')
+        if not signature or not wait_for_confirmation(self.trader.client, signature):
+            raise ChildOrderFailed(f"Swap of {amount} was not confirmed")
+        return self._out_balance() - before
+
+def traced(name: str):
+    """把 DLMMTrader 的方法作為一個追蹤執行，期間的伺服器及 RPC 呼叫都記錄在同一個追蹤 ID 下"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.trace(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 class DLMMTrader:
     def __init__(self, pool_address: str, rpc_url: str, wallet: Keypair, 
                  total_investment_usdc: float, total_investment_sol: float):
@@ -105,20 +182,36 @@ class DLMMTrader:
             self.pool_address = Pubkey.from_string(pool_address)
             self.rpc_url = rpc_url
             self.wallet = wallet
-            self.client = Client(rpc_url)
+            # 記錄每個 DLMM 端點及 RPC 方法的延遲、大小及錯誤
+            self.metrics = Metrics()
+            # 設定 TRACE_FILE 時，每次交換、添加流動性及退出都會記錄一個追蹤（Chrome trace 格式，可用 Perfetto 開啟）
+            self.tracer = Tracer(os.getenv('TRACE_FILE'))
+            self.client = trace_client(instrument_client(Client(rpc_url), self.metrics))
+            # 監控循環的取樣分析器，由 profile_cycles 啟用，結果寫入 logs/profiles
+            self.profiler = CycleProfiler(os.path.join(log_dir, "profiles"))
             
             # 初始化 DLMM client
             try:
                 logger.info(f"Creating DLMM instance for pool: {pool_address}")
-                self.dlmm = DLMM(self.pool_address, rpc_url)
+                # 同一輪中重複的讀取（active bin、fee info、bins）由快取回應，建立交易後自動失效
+                # 池子元數據（mint、decimals、bin step、reserves）優先從磁碟快取讀取，重啟時不必等待 /dlmm/create
+                self.dlmm = DLMM(
+                    self.pool_address, rpc_url, cache=ResponseCache(), metadata_cache=PoolMetadataCache(), metrics=self.metrics
+                )
                 if not self.dlmm:
                     raise ValueError("Failed to create DLMM instance")
                 logger.info("DLMM instance created successfully")
+                if self.dlmm.metadata_from_cache:
+                    logger.info("Pool metadata loaded from cache, validating against chain in background")
+                    threading.Thread(target=self._validate_pool_metadata, daemon=True).start()
             except Exception as e:
                 logger.error(f"Failed to create DLMM instance: {str(e)}")
                 raise
             
             self.position_history: Dict[str, Dict] = {}
+            # 增量同步的倉位快照及其 slot 游標
+            self._positions: Dict[str, Position] = {}
+            self._positions_slot = 0
             self.total_investment_usdc = total_investment_usdc
             self.total_investment_sol = total_investment_sol
             
@@ -142,6 +235,15 @@ class DLMMTrader:
             logger.error(f"Failed to initialize DLMMTrader: {e}")
             raise
 
+    def _validate_pool_metadata(self) -> None:
+        """在背景中以鏈上狀態校驗快取的池子元數據，不一致時從服務端重新載入"""
+        try:
+            if not self.dlmm.validate_metadata():
+                logger.warning("Cached pool metadata was stale and has been reloaded")
+                self.pool_type = self._determine_pool_type()
+        except Exception as e:
+            logger.error(f"Failed to validate pool metadata: {str(e)}")
+
     def _determine_pool_type(self) -> str:
         """
         確定流動性池的類型
@@ -221,6 +323,7 @@ class DLMMTrader:
             logger.error(f"Error getting token balance: {str(e)}")
             return 0
 
+    @traced("swap")
     def swap_tokens(self, amount: int, is_y_to_x: bool) -> bool:
         """執行代幣交換"""
         try:
@@ -303,6 +406,46 @@ class DLMMTrader:
             logger.error(f"Swap failed: {str(e)}")
             return False
 
+    @traced("swap_sliced")
+    def swap_tokens_sliced(self, amount: int, is_y_to_x: bool, slices: int = 4, slot_interval: int = 10,
+                           max_impact_bps: float = 50, max_price_move_bps: float = 100) -> Optional[ExecutionReport]:
+        """
+        分批執行代幣交換：每個子單前以本地 bin book 重新報價並調整大小，價格不利變動超過上限時取消剩餘部分
+        """
+        try:
+            logger.info(f"Sliced swap {'Y->X' if is_y_to_x else 'X->Y'}, amount: {amount}, slices: {slices}")
+
+            if not self.check_sol_balance():
+                logger.error("Insufficient SOL balance")
+                return None
+
+            from_token = self.dlmm.token_Y if is_y_to_x else self.dlmm.token_X
+            to_token = self.dlmm.token_X if is_y_to_x else self.dlmm.token_Y
+
+            venue = BookVenue(self, self.dlmm.load_bin_book(), from_token.public_key, to_token.public_key)
+            executor = SlicedSwapExecutor(
+                venue,
+                slices=slices,
+                slot_interval=slot_interval,
+                max_impact_bps=max_impact_bps,
+                max_price_move_bps=max_price_move_bps
+            )
+            report = executor.run(amount, not is_y_to_x)
+
+            logger.info(f"Sliced swap filled {report.filled_in}/{report.amount}, "
+                        f"quoted out: {report.quoted_out}, realized out: {report.realized_out}, "
+                        f"one-shot out: {report.one_shot_out}")
+            logger.info(f"Realized vs quoted: {report.realized_vs_quoted_bps:.1f} bps, "
+                        f"vs one-shot: {report.improvement_vs_one_shot_bps:.1f} bps")
+            if report.reason:
+                logger.warning(f"Sliced swap stopped early: {report.reason}")
+            return report
+
+        except Exception as e:
+            logger.error(f"Sliced swap failed: {str(e)}")
+            return None
+
+    @traced("add_liquidity")
     def add_liquidity(self, strategy_type: StrategyType = StrategyType.SpotBalanced) -> Optional[Pubkey]:
         """添加流動性"""
         try:
@@ -400,24 +543,52 @@ class DLMMTrader:
                     logger.error("Insufficient main token balance")
                     return None
 
-                # 根據價格計算另一個代幣所需數量
+                # 按策略的 bin 權重在本地計算另一個代幣所需數量
+                bin_step = self.dlmm.lb_pair.bin_step
+                active_x = int(active_bin.x_amount, 16)
+                active_y = int(active_bin.y_amount, 16)
                 if is_x_main:
-                    other_token_amount = int(main_token_amount * current_price)
+                    other_token_amount = auto_fill_y_by_strategy(
+                        active_bin.bin_id, bin_step, main_token_amount, active_x, active_y,
+                        min_bin_id, max_bin_id, strategy_type
+                    )
                 else:
-                    other_token_amount = int(main_token_amount / current_price)
+                    other_token_amount = auto_fill_x_by_strategy(
+                        active_bin.bin_id, bin_step, main_token_amount, active_x, active_y,
+                        min_bin_id, max_bin_id, strategy_type
+                    )
                 
                 logger.info(f"Initial calculated amounts:")
                 logger.info(f"Main token amount: {main_token_amount}")
                 logger.info(f"Required other token amount: {other_token_amount}")
 
-                # 檢查另一個代幣是否足夠
-                if other_token_amount > other_token_balance:
-                    ratio = other_token_balance / other_token_amount
-                    other_token_amount = int(other_token_balance * buffer_ratio)
+                # 發送前在本地預覽每個 bin 的實際存入數量，並以預覽的總量檢查餘額
+                def preview_deposit(main_amount: int, other_amount: int):
+                    x, y = (main_amount, other_amount) if is_x_main else (other_amount, main_amount)
+                    return x, y, to_amounts_both_side_by_strategy(
+                        active_bin.bin_id, bin_step, min_bin_id, max_bin_id, x, y, active_x, active_y, strategy_type
+                    )
+
+                x_amount, y_amount, preview = preview_deposit(main_token_amount, other_token_amount)
+                previewed_other = preview.total_y if is_x_main else preview.total_x
+                if previewed_other > other_token_balance:
+                    ratio = other_token_balance / previewed_other
+                    other_token_amount = int(other_token_amount * ratio * buffer_ratio)
                     main_token_amount = int(main_token_amount * ratio * buffer_ratio)
                     logger.info(f"Adjusted amounts due to other token balance:")
                     logger.info(f"New main token amount: {main_token_amount}")
                     logger.info(f"New other token amount: {other_token_amount}")
+                    x_amount, y_amount, preview = preview_deposit(main_token_amount, other_token_amount)
+
+                logger.info(f"Previewed deposit: {preview.total_x} token X and {preview.total_y} token Y "
+                            f"over bins {min_bin_id}-{max_bin_id}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Previewed deposit per bin", extra={"fields": {"bins": [
+                        {"binId": bin_id, "amountX": amount_x, "amountY": amount_y}
+                        for bin_id, amount_x, amount_y in zip(
+                            preview.bin_id.tolist(), preview.amount_x.tolist(), preview.amount_y.tolist()
+                        )
+                    ]}})
 
                 # 生成新的倉位密鑰對
                 position_keypair = Keypair()
@@ -431,10 +602,6 @@ class DLMMTrader:
                     params=None
                 )
                 
-                # 準備添加流動性的參數
-                x_amount = main_token_amount if is_x_main else other_token_amount
-                y_amount = other_token_amount if is_x_main else main_token_amount
-                
                 logger.info("=== Adding Liquidity ===")
                 logger.info(f"Adding {x_amount} token X and {y_amount} token Y")
                 
@@ -502,6 +669,7 @@ class DLMMTrader:
             logger.error(f"Error type: {type(e)}")
             return None
 
+    @traced("exit")
     def remove_liquidity_and_claim_rewards(self, position_pubkey: Pubkey) -> bool:
         """移除流動性並領取獎勵"""
         MAX_RETRIES = 5  # 增加最大重試次數
@@ -524,8 +692,8 @@ class DLMMTrader:
                     # 先嘗試領取獎勵
                     try:
                         logger.info(f"Position rewards:")
-                        reward_one = int(position.position_data.reward_one, 16) if position.position_data.reward_one != '00' else 0
-                        reward_two = int(position.position_data.reward_two, 16) if position.position_data.reward_two != '00' else 0
+                        reward_one = position.position_data.reward_one_amount
+                        reward_two = position.position_data.reward_two_amount
                         logger.info(f"Reward One: {reward_one}")
                         logger.info(f"Reward Two: {reward_two}")
                         
@@ -551,7 +719,7 @@ class DLMMTrader:
                         # 繼續執行，即使獎勵領取失敗
                     
                     # 獲取所有 bin IDs
-                    bin_ids = [bin_data.bin_id for bin_data in position.position_data.position_bin_data]
+                    bin_ids = position.position_data.position_bin_data.bin_ids.tolist()
                     logger.info(f"Removing liquidity from bins: {bin_ids}")
                     
                     # 移除流動性
@@ -614,6 +782,13 @@ class DLMMTrader:
         
         return False
 
+    def profile_cycles(self, cycles: int) -> None:
+        """
+        以取樣方式分析接下來 cycles 個監控週期，每個週期寫入一個 collapsed stack 檔案（可用 flamegraph.pl 或 speedscope 開啟），
+        並在日誌中記錄 CPU、網路等待及其他等待的時間。不取鎖也不寫日誌，可在信號處理器中呼叫
+        """
+        self.profiler.profile(cycles)
+
     def get_active_bin_info(self) -> Tuple[int, float]:
         """獲取當前活躍 bin 信息"""
         active_bin = self.dlmm.get_active_bin()
@@ -649,26 +824,16 @@ class DLMMTrader:
             # 獲取 bin 分佈信息
             try:
                 bins = self.dlmm.get_bins_between_lower_and_upper_bound(min_bin, max_bin)
-                logger.info(f"Got bins data: {bins.__dict__ if hasattr(bins, '__dict__') else 'No bins data'}")
+                logger.info(f"Got {len(bins.bin_liquidty) if bins else 0} bins")
                 
-                if not bins or not hasattr(bins, 'bin_liquidty') or not bins.bin_liquidty:
+                if not bins or not bins.bin_liquidty:
                     logger.warning("No valid bins data available, using default distribution")
                     raise ValueError("No valid bins data")
                     
-                # 計算加權價格
-                total_liquidity = 0
-                weighted_price = 0
-                for bin_data in bins.bin_liquidty:
-                    try:
-                        # 直接使用 bin_data 的屬性，不檢查 binId
-                        bin_price = float(bin_data.price_per_token)
-                        bin_liquidity = float(bin_data.supply) if hasattr(bin_data, 'supply') else 1
-                        total_liquidity += bin_liquidity
-                        weighted_price += bin_liquidity * bin_price
-                        logger.debug(f"Processing bin: price={bin_price}, liquidity={bin_liquidity}")
-                    except Exception as e:
-                        logger.warning(f"Error processing bin data: {e}")
-                        continue
+                # 計算加權價格（按列一次計算，不建立每個 bin 的物件）
+                columns = bins.bin_liquidty
+                total_liquidity = float(columns.liquidity.sum())
+                weighted_price = float((columns.liquidity * columns.prices_per_token).sum())
                 
                 if total_liquidity > 0:
                     weighted_price /= total_liquidity
@@ -708,48 +873,57 @@ class DLMMTrader:
             y_amount = int(total_value_usdc * 0.5 * (10 ** self.dlmm.token_Y.decimal))
             return x_amount, y_amount
 
+    def _sync_positions(self) -> PositionChanges:
+        """
+        增量同步倉位: 只拉取自上次同步後賬戶或 bin 有變化的倉位, 返回這次的變化（變化及關閉的倉位）
+        """
+        changes = self.dlmm.get_position_changes(self.wallet.pubkey(), self._positions_slot)
+        if changes.full:
+            self._positions = {}
+        for closed in changes.closed_positions:
+            self._positions.pop(str(closed), None)
+        for pos in changes.user_positions:
+            self._positions[str(pos.public_key)] = pos
+        self._positions_slot = changes.slot
+        return changes
+
     def monitor_position(self, position_pubkey: Pubkey) -> Dict:
         """
         監控倉位狀態和收益
         """
         try:
             logger.info("\n=== Checking Position Status ===")
-            positions = self.dlmm.get_positions_by_user_and_lb_pair(self.wallet.pubkey())
+            changed_positions = self._sync_positions().user_positions
             
-            # 打印完整的倉位信息
-            logger.info("\n=== All User Positions ===")
-            for pos in positions.user_positions:
-                logger.info(f"\nPosition Details:")
-                logger.info(f"Public Key: {pos.public_key}")
-                logger.info(f"Version: {pos.version}")
-                
-                # 打印倉位數據
-                if hasattr(pos, 'position_data'):
-                    logger.info("\nPosition Data:")
-                    logger.info(f"Total X Amount: {pos.position_data.total_x_amount}")
-                    logger.info(f"Total Y Amount: {pos.position_data.total_y_amount}")
-                    logger.info(f"Reward One (raw): {pos.position_data.reward_one}")
-                    logger.info(f"Reward Two (raw): {pos.position_data.reward_two}")
-                    
-                    # 打印 bin 數據
-                    logger.info("\nBin Data:")
-                    for bin_data in pos.position_data.position_bin_data:
-                        logger.info(f"  Bin ID: {bin_data.bin_id}")
-                        logger.info(f"  X Amount: {bin_data.x_amount if hasattr(bin_data, 'x_amount') else 'N/A'}")
-                        logger.info(f"  Y Amount: {bin_data.y_amount if hasattr(bin_data, 'y_amount') else 'N/A'}")
-                        
-                    # 嘗試打印其他可能的屬性
-                    logger.info("\nAdditional Data:")
-                    for attr_name in dir(pos.position_data):
-                        if not attr_name.startswith('_'):  # 跳過私有屬性
-                            try:
-                                value = getattr(pos.position_data, attr_name)
-                                logger.info(f"{attr_name}: {value}")
-                            except Exception as e:
-                                logger.debug(f"Could not get value for {attr_name}: {e}")
+            # 只打印自上次檢查後有變化的倉位
+            logger.info("\n=== Changed User Positions ===")
+            for pos in changed_positions:
+                data = pos.position_data
+                logger.info(
+                    f"Position {pos.public_key}: X {data.total_x_amount}, Y {data.total_y_amount}, "
+                    f"rewards {data.reward_one_amount}/{data.reward_two_amount}",
+                    extra={"fields": {
+                        "position": str(pos.public_key), "version": pos.version,
+                        "totalXAmount": data.total_x_amount, "totalYAmount": data.total_y_amount,
+                        "feeX": data.fee_x_amount, "feeY": data.fee_y_amount,
+                        "rewardOne": data.reward_one_amount, "rewardTwo": data.reward_two_amount
+                    }}
+                )
+                # 逐 bin 及全部屬性的輸出只在 DEBUG 級別才建立
+                if logger.isEnabledFor(logging.DEBUG):
+                    bins = data.position_bin_data
+                    logger.debug(
+                        f"Bins of {pos.public_key}",
+                        extra={"fields": {
+                            "binIds": bins.bin_ids.tolist(),
+                            "xAmounts": bins.x_amounts.tolist(),
+                            "yAmounts": bins.y_amounts.tolist()
+                        }}
+                    )
+                    logger.debug(f"Position data of {pos.public_key}", extra={"fields": data.to_json()})
 
             # 找到特定的倉位
-            position = next((p for p in positions.user_positions if p.public_key == position_pubkey), None)
+            position = self._positions.get(str(position_pubkey))
             
             if not position:
                 logger.error("Position not found")
@@ -758,7 +932,8 @@ class DLMMTrader:
             logger.info("\n=== Raw Position Data ===")
             logger.info(f"Position public key: {position.public_key}")
             logger.info(f"Position version: {position.version}")
-            logger.info(f"Raw position data: {position.position_data.to_json() if hasattr(position.position_data, 'to_json') else position.position_data}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Raw position data", extra={"fields": position.position_data.to_json()})
             
             # 正確解析獎勵數據
             try:
@@ -772,8 +947,8 @@ class DLMMTrader:
                 # 嘗試不同的解析方式
                 try:
                     # 方法1: 直接十六進制轉換
-                    reward_one = int(position.position_data.reward_one, 16) if position.position_data.reward_one and position.position_data.reward_one != '00' else 0
-                    reward_two = int(position.position_data.reward_two, 16) if position.position_data.reward_two and position.position_data.reward_two != '00' else 0
+                    reward_one = position.position_data.reward_one_amount
+                    reward_two = position.position_data.reward_two_amount
                     logger.info(f"Method 1 - Hex conversion:")
                     logger.info(f"Reward one: {reward_one}")
                     logger.info(f"Reward two: {reward_two}")
@@ -869,9 +1044,7 @@ class DLMMTrader:
                         float(position.position_data.total_y_amount) * initial_data['initial_y_price'])
         
         # 添加獎勵收益
-        reward_one = int(position.position_data.reward_one, 16) if position.position_data.reward_one != '00' else 0
-        reward_two = int(position.position_data.reward_two, 16) if position.position_data.reward_two != '00' else 0
-        total_rewards = reward_one + reward_two  # 需要轉換為實際價值
+        total_rewards = position.position_data.reward_one_amount + position.position_data.reward_two_amount  # 需要轉換為實際價值
         
         total_return = (current_value + total_rewards - initial_value) / initial_value
         apy = (total_return / time_diff) if time_diff > 0 else 0
@@ -933,63 +1106,74 @@ class DLMMTrader:
             
             logger.info(f"Successfully added liquidity, position: {position_pubkey}")
             
+            # 倉位以增量同步，每次只下載有變化的倉位；self._positions 保存完整的快照
+            self._positions = {}
+            self._positions_slot = 0
             # 儲存上一次的 bin 數據用於比較
             previous_bin_data = {}
+            total_rewards_fees = 0
             inactive_periods = 0  # 追蹤無活動的週期數
             MAX_INACTIVE_PERIODS = 10  # 最大允許的無活動週期數
             
             while True:
                 try:
-                    positions = self.dlmm.get_positions_by_user_and_lb_pair(self.wallet.pubkey())
-                    logger.info(f"Positions: {positions}")
+                    self.profiler.start_cycle()
+                    changes = self._sync_positions()
+                    # 沒有倉位變化或關閉時，不必展開每個 bin 的數據
+                    if not changes.full and not changes.position_keys and not changes.closed_positions:
+                        logger.info("Positions unchanged since last check")
+                        current_bin_data = previous_bin_data
+                        trading_activity = False
+                    else:
+                        logger.info(
+                            f"Positions at slot {changes.slot}: {len(changes.position_keys)} changed, "
+                            f"{len(changes.closed_positions)} closed, {len(self._positions)} open"
+                        )
                     
-                    # 打印 positions 的詳細信息
-                    logger.info("\n=== Detailed Positions Information ===")
-                    total_rewards_fees = 0
-                    current_bin_data = {}
-                    trading_activity = False
+                        # 打印 positions 的詳細信息
+                        logger.info("\n=== Detailed Positions Information ===")
+                        total_rewards_fees = 0
+                        current_bin_data = {}
+                        trading_activity = False
                     
-                    for i, pos in enumerate(positions.user_positions):
-                        if hasattr(pos, 'position_data'):
-                            logger.info("\nPosition Data:")
-                            logger.info(f"Raw position data (to_json): {pos.position_data.to_json()}")
+                        for i, pos in enumerate(self._positions.values()):
+                            if hasattr(pos, 'position_data'):
+                                if logger.isEnabledFor(logging.DEBUG):
+                                    logger.debug("Raw position data", extra={"fields": pos.position_data.to_json()})
                             
-                            # 收集當前 bin 數據
-                            for bin_info in pos.position_data.position_bin_data:
-                                bin_id = bin_info.bin_id
-                                current_bin_data[bin_id] = {
-                                    'x_amount': float(bin_info.x_amount if hasattr(bin_info, 'x_amount') else 0),
-                                    'y_amount': float(bin_info.y_amount if hasattr(bin_info, 'y_amount') else 0),
-                                    'liquidity': float(bin_info.bin_liquidity if hasattr(bin_info, 'bin_liquidity') else 0)
-                                }
+                                # 收集當前 bin 數據（直接讀取數值列）
+                                bins = pos.position_data.position_bin_data
+                                for bin_id, x_amount, y_amount, liquidity in zip(
+                                    bins.bin_ids.tolist(), bins.bin_x_amounts.tolist(),
+                                    bins.bin_y_amounts.tolist(), bins.bin_liquidity.tolist()
+                                ):
+                                    current_bin_data[bin_id] = {'x_amount': x_amount, 'y_amount': y_amount, 'liquidity': liquidity}
                             
-                            # 比較與上一次的數據
-                            if previous_bin_data:
-                                logger.info("\n=== Trading Activity Analysis ===")
-                                for bin_id, current_data in current_bin_data.items():
-                                    if bin_id in previous_bin_data:
-                                        prev_data = previous_bin_data[bin_id]
-                                        x_change = abs(current_data['x_amount'] - prev_data['x_amount'])
-                                        y_change = abs(current_data['y_amount'] - prev_data['y_amount'])
-                                        liquidity_change = abs(current_data['liquidity'] - prev_data['liquidity'])
+                                # 比較與上一次的數據
+                                if previous_bin_data:
+                                    logger.info("\n=== Trading Activity Analysis ===")
+                                    for bin_id, current_data in current_bin_data.items():
+                                        if bin_id in previous_bin_data:
+                                            prev_data = previous_bin_data[bin_id]
+                                            x_change = abs(current_data['x_amount'] - prev_data['x_amount'])
+                                            y_change = abs(current_data['y_amount'] - prev_data['y_amount'])
+                                            liquidity_change = abs(current_data['liquidity'] - prev_data['liquidity'])
                                         
-                                        logger.info(f"\nBin {bin_id} changes:")
-                                        logger.info(f"X amount change: {x_change}")
-                                        logger.info(f"Y amount change: {y_change}")
-                                        logger.info(f"Liquidity change: {liquidity_change}")
+                                            logger.debug(
+                                                f"Bin {bin_id} changes",
+                                                extra={"fields": {"binId": bin_id, "xChange": x_change, "yChange": y_change, "liquidityChange": liquidity_change}}
+                                            )
                                         
-                                        # 檢查是否有顯著變化
-                                        if x_change > 0.001 or y_change > 0.001 or liquidity_change > 0.001:
-                                            trading_activity = True
+                                            # 只以 bin 流動性的變化判斷交易活動（x/y 數量的變化只作記錄），
+                                            # 與原先決定 MAX_INACTIVE_PERIODS 退出時機的行為一致
+                                            if liquidity_change > 0:
+                                                trading_activity = True
                         
-                            # 處理 fees 和 rewards
-                            fee_x = int(pos.position_data.fee_X, 16) if pos.position_data.fee_X != '00' else 0
-                            fee_y = int(pos.position_data.fee_Y, 16) if pos.position_data.fee_Y != '00' else 0
-                            reward_one = int(pos.position_data.reward_one, 16) if pos.position_data.reward_one != '00' else 0
-                            reward_two = int(pos.position_data.reward_two, 16) if pos.position_data.reward_two != '00' else 0
-                            
-                            total_rewards_fees = fee_x + fee_y + reward_one + reward_two
-                            logger.info(f"\nTotal rewards and fees: {total_rewards_fees}")
+                        # 所有倉位的 fees 和 rewards，每個快照只計算一次
+                        totals = PositionTotals.of(list(self._positions.values()))
+                        total_rewards_fees = totals.fees_and_rewards
+                        fee_x_ui, fee_y_ui = totals.fee_ui_amounts(self.dlmm.token_X, self.dlmm.token_Y)
+                        logger.info(f"\nTotal rewards and fees: {total_rewards_fees} (fee X: {fee_x_ui}, fee Y: {fee_y_ui})")
                     
                     # 更新無活動週期計數
                     if not trading_activity:
@@ -1002,8 +1186,7 @@ class DLMMTrader:
                     # 儲存當前數據用於下次比較
                     previous_bin_data = current_bin_data
                     
-                    position = next((p for p in positions.user_positions if p.public_key == position_pubkey), None)
-                    if not position:
+                    if str(position_pubkey) not in self._positions:
                         logger.error("Position not found")
                         break
                     
@@ -1021,12 +1204,15 @@ class DLMMTrader:
                     except Exception as e:
                         logger.warning(f"Could not get active bin: {e}")
                     
+                    self.profiler.end_cycle()
                     time.sleep(60)  # 每分鐘檢查一次
                     
                 except Exception as e:
                     logger.error(f"Error in monitoring loop: {str(e)}")
+                    self.profiler.end_cycle()
                     time.sleep(60)
                     continue
+            self.profiler.end_cycle()
             
             # 移除流動性並領取獎勵
             if not self.remove_liquidity_and_claim_rewards(position_pubkey):
@@ -1114,6 +1300,7 @@ def load_wallet_from_env() -> Keypair:
     except Exception as e:
         raise ValueError(f"Invalid private key format: {e}")
 
+@span("confirm")
 def wait_for_confirmation(client: Client, signature: str, max_retries: int = 3, delay: int = 5) -> bool:
     """等待交易確認，帶重試機制"""
     for i in range(max_retries):
@@ -1129,6 +1316,7 @@ def wait_for_confirmation(client: Client, signature: str, max_retries: int = 3,
             time.sleep(delay)
     return False
 
+@span("send_transaction")
 def send_transaction_with_priority(
     client: Client, 
     tx: Transaction, 
@@ -1255,6 +1443,31 @@ def wrap_sol(client: Client, user: Keypair, amount: int) -> bool:
         logger.error(f"Failed to wrap SOL: {str(e)}")
         return False
 
+def pick_pool(rpc_url: str, candidates: List[str], default: str) -> str:
+    """
+    從候選池子中挑選評分最高、且含 USDC 或 SOL 的池子
+
+    Args:
+        rpc_url: Solana RPC URL
+        candidates: 候選池子地址
+        default: 篩選失敗或沒有合適池子時使用的池子
+    Returns: 池子地址
+    """
+    try:
+        screener = PoolScreener([Pubkey.from_string(address) for address in candidates])
+        table = screener.refresh(Client(rpc_url))
+        logger.info(f"Screened {len(table)} pools with {screener.last_rpc_calls} RPC calls")
+        usdc = Pubkey.from_string("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v")
+        sol = Pubkey.from_string("So11111111111111111111111111111111111111112")
+        best = screener.top(1, mints=[usdc, sol])
+        if best:
+            logger.info(f"Selected pool {best[0]} from screener")
+            return str(best[0])
+        logger.warning("No screened pool trades USDC or SOL")
+    except Exception as e:
+        logger.error(f"Pool screening failed: {str(e)}")
+    return default
+
 def main():
     
     helius_api_key = 'helius_api_key'
@@ -1265,22 +1478,17 @@ def main():
     POOL_ADDRESS = "9d9mb8kooFfaD3SctgZtkxQypkshx6ezhbKio89ixyy2" #USDC
     TOTAL_INVESTMENT_USDC = 10#50  # 1000 USDC
     TOTAL_INVESTMENT_SOL = 0.001#0.01  # 1 SOL
+    # SCREEN_POOLS：逗號分隔的候選池子，設定時改用篩選器中排名最高的池子
+    SCREEN_POOLS = [address.strip() for address in os.getenv('SCREEN_POOLS', '').split(',') if address.strip()]
+    if SCREEN_POOLS:
+        POOL_ADDRESS = pick_pool(RPC_URL, SCREEN_POOLS, POOL_ADDRESS)
     
     try:
         # 從 .env 加載錢包
         wallet = load_wallet_from_env()
         logger.info(f"Wallet loaded successfully: {wallet.pubkey()}")
         
-        # 添加 RPC 連接測試
-        client = Client(RPC_URL)
-        try:
-            # 測試 RPC 連接
-            client.get_version()
-            logger.info("RPC connection successful")
-        except Exception as e:
-            logger.error(f"Failed to connect to RPC: {e}")
-            return
-            
+        # RPC 連接由下方的 SOL 餘額檢查驗證，不再單獨探測，以縮短啟動時間
         trader = DLMMTrader(
             POOL_ADDRESS, 
             RPC_URL, 
@@ -1289,6 +1497,16 @@ def main():
             TOTAL_INVESTMENT_SOL
         )
         
+        # kill -USR1 <pid> 把指標寫入 logs/metrics.prom；設定 METRICS_PORT 時另以 HTTP 提供 /metrics
+        trader.metrics.dump_on_signal(os.path.join(log_dir, "metrics.prom"))
+        if os.getenv('METRICS_PORT'):
+            trader.metrics.serve(int(os.getenv('METRICS_PORT')))
+        # PROFILE_CYCLES=N 分析前 N 個監控週期；運行中可用 kill -USR2 <pid> 分析接下來的 N 個（預設 3）
+        profile_cycles = int(os.getenv('PROFILE_CYCLES', '0'))
+        if profile_cycles > 0:
+            trader.profile_cycles(profile_cycles)
+        signal.signal(signal.SIGUSR2, lambda signum, frame: trader.profile_cycles(profile_cycles or 3))
+        
         # 檢查池子類型
         if trader.pool_type == 'UNSUPPORTED':
             logger.error("Unsupported pool type - neither USDC nor SOL pair")
@@ -0,0 +1,100 @@
+'''
+Account builders, fakes and a local HTTP server shared by the tests.
+'''
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from solders.pubkey import Pubkey
+from dlmm import accounts
+from dlmm.accounts import LB_CLMM_PROGRAM_ID
+from dlmm.transport import Transport
+
+DISCRIMINATORS = {
+    accounts.LB_PAIR: accounts.LB_PAIR_DISCRIMINATOR,
+    accounts.BIN_ARRAY: accounts.BIN_ARRAY_DISCRIMINATOR,
+}
+
+def account_data(record) -> bytes:
+    '''
+    Raw account data of a decoded record, discriminator first.
+    '''
+    return DISCRIMINATORS[record.dtype] + record.tobytes()
+
+def lb_pair_record(active_id: int = 0, bin_array_indexes=(), bin_step: int = 10) -> np.void:
+    '''
+    A zeroed LbPair with the bitmap bits of `bin_array_indexes` set; other fields are set by the caller.
+    '''
+    record = np.zeros(1, dtype=accounts.LB_PAIR)[0]
+    record["active_id"] = active_id
+    record["bin_step"] = bin_step
+    bitmap = np.zeros(1024, dtype=np.uint8)
+    bitmap[np.asarray(bin_array_indexes, dtype=np.int64) + accounts.BIN_ARRAY_BITMAP_SIZE] = 1
+    record["bin_array_bitmap"] = np.packbits(bitmap, bitorder="little").view("<u8")
+    return record
+
+def lb_pair_data(active_id: int = 0, bin_array_indexes=(), bin_step: int = 10) -> bytes:
+    return account_data(lb_pair_record(active_id, bin_array_indexes, bin_step))
+
+def bin_array_data(index: int, amount_x=0, amount_y=0) -> bytes:
+    record = np.zeros(1, dtype=accounts.BIN_ARRAY)[0]
+    record["index"] = index
+    record["bins"]["amount_x"] = amount_x
+    record["bins"]["amount_y"] = amount_y
+    return account_data(record)
+
+class FakeRpcClient:
+    '''
+    Answers `get_multiple_accounts` from `accounts_by_key`, every account owned by `owner`, and counts
+    the calls.
+    '''
+    def __init__(self, accounts_by_key, owner: Pubkey = LB_CLMM_PROGRAM_ID):
+        self.accounts_by_key = accounts_by_key
+        self.owner = owner
+        self.calls = 0
+
+    def get_multiple_accounts(self, pubkeys):
+        self.calls += 1
+        return SimpleNamespace(value=[
+            SimpleNamespace(data=self.accounts_by_key[k], owner=self.owner) if k in self.accounts_by_key else None
+            for k in pubkeys
+        ])
+
+class FakeProvider:
+    def make_request(self, body, parser):
+        if parser is None:
+            raise ConnectionError("down")
+        return "ok"
+
+class FakeSolanaClient:
+    '''
+    Stands in for `solana.rpc.api.Client`: every request goes through `_provider.make_request`, which
+    fails when no parser is given.
+    '''
+    def __init__(self):
+        self._provider = FakeProvider()
+
+class QuietHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def http_server():
+    '''
+    Start a server for a handler class on a free local port and return a `Transport` to it; servers are
+    shut down after the test.
+    '''
+    servers = []
+
+    def start(handler, compression: bool = False) -> Transport:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return Transport.tcp("127.0.0.1", server.server_address[1], compression=compression)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from solders.pubkey import Pubkey
+from dlmm import accounts
+
+def encode(dtype, discriminator, fill):
+    record = np.zeros(1, dtype=dtype)
+    fill(record[0])
+    return discriminator + record.tobytes()
+
+def test_decode_lb_pair():
+    mint = Pubkey.new_unique()
+
+    def fill(r):
+        r["active_id"] = -1234
+        r["bin_step"] = 25
+        r["parameters"]["base_factor"] = 10000
+        r["v_parameters"]["volatility_accumulator"] = 70000
+        r["token_x_mint"] = np.frombuffer(bytes(mint), dtype=np.uint8)
+        r["bin_array_bitmap"][0] = 1
+        r["bin_array_bitmap"][15] = 1 << 63
+
+    data = encode(accounts.LB_PAIR, accounts.LB_PAIR_DISCRIMINATOR, fill)
+    lb_pair = accounts.decode_lb_pair(data)
+    assert lb_pair["active_id"] == -1234
+    assert lb_pair["bin_step"] == 25
+    assert lb_pair["parameters"]["base_factor"] == 10000
+    assert lb_pair["v_parameters"]["volatility_accumulator"] == 70000
+    assert accounts.to_pubkey(lb_pair["token_x_mint"]) == mint
+    assert accounts.initialized_bin_array_indexes(lb_pair).tolist() == [-512, 511]
+
+def test_decode_bin_array():
+    def fill(r):
+        r["index"] = -3
+        r["bins"]["amount_x"][5] = 42
+        r["bins"]["price"]["hi"][5] = 2
+        r["bins"]["price"]["lo"][5] = 1 << 63
+        r["bins"]["liquidity_supply"]["hi"][5] = 1
+
+    data = encode(accounts.BIN_ARRAY, accounts.BIN_ARRAY_DISCRIMINATOR, fill)
+    bin_array = accounts.decode_bin_array(data)
+    assert bin_array["index"] == -3
+    assert accounts.bin_array_bin_ids(-3)[5] == -205
+    assert accounts.bin_id_to_bin_array_index(-205) == -3
+    assert bin_array["bins"]["amount_x"][5] == 42
+    assert accounts.q64_to_float(bin_array["bins"]["price"])[5] == 2.5
+    assert accounts.u128_to_int(bin_array["bins"]["liquidity_supply"][5]) == 1 << 64
+
+    both = accounts.decode_bin_arrays([data, data])
+    assert both["bins"]["amount_x"][:, 5].tolist() == [42, 42]
+
+def test_decode_position_v2():
+    def fill(r):
+        r["lower_bin_id"] = 100
+        r["upper_bin_id"] = 169
+        r["liquidity_shares"]["lo"][3] = 7
+        r["fee_infos"]["fee_x_pending"][3] = 11
+
+    position = accounts.decode_position_v2(encode(accounts.POSITION_V2, accounts.POSITION_V2_DISCRIMINATOR, fill))
+    assert (position["lower_bin_id"], position["upper_bin_id"]) == (100, 169)
+    assert accounts.u128_to_int(position["liquidity_shares"][3]) == 7
+    assert position["fee_infos"]["fee_x_pending"][3] == 11
+
+def test_bitmap_extension_indexes():
+    def fill_pair(r):
+        r["bin_array_bitmap"][8] = 1
+
+    def fill_extension(r):
+        r["positive_bin_array_bitmap"][0][0] = 1
+        r["negative_bin_array_bitmap"][1][0] = 2
+
+    lb_pair = accounts.decode_lb_pair(encode(accounts.LB_PAIR, accounts.LB_PAIR_DISCRIMINATOR, fill_pair))
+    extension = accounts.decode_bin_array_bitmap_extension(encode(
+        accounts.BIN_ARRAY_BITMAP_EXTENSION,
+        accounts.BIN_ARRAY_BITMAP_EXTENSION_DISCRIMINATOR,
+        fill_extension
+    ))
+    assert accounts.initialized_bin_array_indexes(lb_pair, extension).tolist() == [-1026, 0, 512]
+
+def test_rejects_other_accounts():
+    data = encode(accounts.BIN_ARRAY, accounts.BIN_ARRAY_DISCRIMINATOR, lambda r: None)
+    with pytest.raises(ValueError):
+        accounts.decode_position_v2(data)
+    with pytest.raises(ValueError):
+        accounts.decode_bin_array(data[:100])
@@ -0,0 +1,81 @@
+import numpy as np
+from solders.pubkey import Pubkey
+from dlmm import accounts
+from dlmm.bin_book import BinBook
+from .conftest import FakeRpcClient, bin_array_data, lb_pair_data
+
+POOL = Pubkey.new_unique()
+
+def seeded_book():
+    # Active bin 5: X sits in bins 5..69, Y in bins -70..5.
+    x = np.where(np.arange(70) >= 5, 100, 0)
+    y_0 = np.where(np.arange(70) <= 5, 200, 0)
+    return BinBook.from_accounts(
+        POOL,
+        lb_pair_data(5, [-1, 0]),
+        [bin_array_data(0, x, y_0), bin_array_data(-1, 0, 300)]
+    )
+
+def test_range_queries():
+    book = seeded_book()
+    assert len(book) == 140
+    assert book.bin_array_indexes.tolist() == [-1, 0]
+
+    bins = book.bins_around_active_bin(2, 1)
+    assert bins["bin_id"].tolist() == [3, 4, 5, 6]
+    assert bins["amount_x"].tolist() == [0, 0, 100, 100]
+    assert bins["amount_y"].tolist() == [200, 200, 200, 0]
+    assert np.isclose(bins["price"][0], 1.001 ** 3)
+
+    assert book.bins_between(-72, -69)["bin_id"].tolist() == [-70, -69]
+    assert book.liquidity_between(-70, 5) == (100, 70 * 300 + 6 * 200)
+
+    prices = book.bins_between_prices(1.001 ** -2, 1.001 ** 2)
+    assert prices["bin_id"].tolist() == [-2, -1, 0, 1, 2]
+
+def test_depth():
+    book = seeded_book()
+    ids, cumulative = book.depth(swap_for_y=True, max_bins=8)
+    assert ids.tolist() == [5, 4, 3, 2, 1, 0, -1, -2]
+    assert cumulative.tolist() == [200, 400, 600, 800, 1000, 1200, 1500, 1800]
+
+    ids, cumulative = book.depth(swap_for_y=False, max_bins=3)
+    assert ids.tolist() == [5, 6, 7]
+    assert cumulative.tolist() == [100, 200, 300]
+
+def test_incremental_updates():
+    book = seeded_book()
+    book.apply_account(bin_array_data(0, 1, 1))
+    assert book.liquidity_between(0, 69) == (70, 70)
+
+    book.apply_account(lb_pair_data(-3, [-1, 0, 1]))
+    assert book.active_id == -3
+    assert book.missing_bin_arrays() == [1]
+    book.apply_account(bin_array_data(1, 5, 0))
+    assert book.missing_bin_arrays() == []
+    assert book.bin_array_indexes.tolist() == [-1, 0, 1]
+    assert book.liquidity_between(70, 139) == (350, 0)
+
+def test_load():
+    data = {
+        POOL: lb_pair_data(5, [-1, 0]),
+        accounts.derive_bin_array(POOL, 0): bin_array_data(0, 1, 2),
+        accounts.derive_bin_array(POOL, -1): bin_array_data(-1, 3, 4),
+    }
+    client = FakeRpcClient(data)
+    book = BinBook.load(client, POOL)
+    assert client.calls == 2
+    assert book.liquidity_between(-70, 69) == (70 * 4, 70 * 6)
+    assert book.addresses()[2:] == [accounts.derive_bin_array(POOL, -1), accounts.derive_bin_array(POOL, 0)]
+
+def test_swap_bin_arrays_skip_gaps():
+    # Arrays -2, 1 and 2 are initialized; -1 and 0 are a gap with no accounts.
+    book = BinBook.from_accounts(
+        POOL,
+        lb_pair_data(150, [-2, 1, 2]),
+        [bin_array_data(-2, 0, 100), bin_array_data(1, 100, 100), bin_array_data(2, 100, 0)]
+    )
+    assert book.swap_bin_arrays(-100) == [accounts.derive_bin_array(POOL, i) for i in (2, 1, -2)]
+    assert book.swap_bin_arrays(100) == [accounts.derive_bin_array(POOL, i) for i in (2, 1)]
+    book.active_id = 100
+    assert book.swap_bin_arrays(200) == [accounts.derive_bin_array(POOL, i) for i in (1, 2)]
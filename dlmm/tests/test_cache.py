@@ -0,0 +1,77 @@
+from dlmm.cache import ResponseCache, cached, invalidates
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class Client:
+    # Stands in for `DLMM`: the decorators only need `self.cache`.
+    def __init__(self, cache):
+        self.cache = cache
+        self.calls = 0
+
+    @cached
+    def get_active_bin(self):
+        self.calls += 1
+        return {"binId": self.calls}
+
+    @cached
+    def get_bins_around_active_bin(self, left, right):
+        self.calls += 1
+        return (left, right, self.calls)
+
+    @invalidates
+    def swap(self):
+        return "tx"
+
+def test_ttl_and_counters():
+    clock = Clock()
+    client = Client(ResponseCache(ttls={"get_active_bin": 1.0}, clock=clock))
+    assert client.get_active_bin() == {"binId": 1}
+    assert client.get_active_bin() == {"binId": 1}
+    clock.now = 1.5
+    assert client.get_active_bin() == {"binId": 2}
+    stats = client.cache.stats["get_active_bin"]
+    assert (stats.hits, stats.misses) == (1, 2)
+    assert client.cache.totals.hit_ratio == 1 / 3
+
+def test_arguments_are_part_of_the_key():
+    client = Client(ResponseCache())
+    assert client.get_bins_around_active_bin(5, 5) == (5, 5, 1)
+    assert client.get_bins_around_active_bin(5, 6) == (5, 6, 2)
+    assert client.get_bins_around_active_bin(5, 5) == (5, 5, 1)
+
+def test_transaction_builders_invalidate():
+    client = Client(ResponseCache())
+    client.get_active_bin()
+    assert client.swap() == "tx"
+    assert client.cache.version == 1
+    assert client.get_active_bin() == {"binId": 2}
+
+def test_slot_lag():
+    client = Client(ResponseCache(max_slot_lag=2))
+    client.cache.observe_slot(100)
+    client.get_active_bin()
+    client.cache.observe_slot(102)
+    assert client.get_active_bin() == {"binId": 1}
+    client.cache.observe_slot(103)
+    assert client.get_active_bin() == {"binId": 2}
+
+def test_lru_eviction():
+    client = Client(ResponseCache(max_entries=2))
+    client.get_bins_around_active_bin(1, 1)
+    client.get_bins_around_active_bin(2, 2)
+    client.get_bins_around_active_bin(1, 1)
+    client.get_bins_around_active_bin(3, 3)
+    assert len(client.cache) == 2
+    assert client.cache.stats["get_bins_around_active_bin"].evictions == 1
+    # (2, 2) was the least recently used.
+    assert client.get_bins_around_active_bin(2, 2) == (2, 2, 4)
+
+def test_disabled_without_cache():
+    client = Client(None)
+    client.get_active_bin()
+    assert client.get_active_bin() == {"binId": 2}
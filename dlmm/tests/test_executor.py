@@ -0,0 +1,88 @@
+import numpy as np
+from dlmm import accounts
+from dlmm.executor import SimulatedPool, SlicedSwapExecutor
+from dlmm.quote import swap_quote_ladder
+
+BIN_STEP = 25
+NOW = 1_700_000_000
+ACTIVE_ID = 35
+
+def lb_pair():
+    record = np.zeros(1, dtype=accounts.LB_PAIR)[0]
+    record["active_id"] = ACTIVE_ID
+    record["bin_step"] = BIN_STEP
+    record["parameters"]["base_factor"] = 10000
+    record["parameters"]["filter_period"] = 30
+    record["parameters"]["decay_period"] = 600
+    record["parameters"]["reduction_factor"] = 5000
+    record["parameters"]["variable_fee_control"] = 7500
+    record["parameters"]["max_volatility_accumulator"] = 150000
+    record["parameters"]["protocol_share"] = 500
+    record["v_parameters"]["last_update_timestamp"] = NOW - 60
+    return record
+
+def bin_array(index: int):
+    # A thin book: the same small amount on every bin.
+    record = np.zeros(1, dtype=accounts.BIN_ARRAY)[0]
+    record["index"] = index
+    ids = accounts.bin_array_bin_ids(index)
+    prices = [int((1 + BIN_STEP / 10000) ** int(i) * 2 ** 64) for i in ids]
+    record["bins"]["price"]["lo"] = [p & (2 ** 64 - 1) for p in prices]
+    record["bins"]["price"]["hi"] = [p >> 64 for p in prices]
+    record["bins"]["amount_x"] = np.where(ids > ACTIVE_ID, 10 ** 8, 0)
+    record["bins"]["amount_y"] = np.where(ids <= ACTIVE_ID, 10 ** 8, 0)
+    return record
+
+def pool(on_slot=None):
+    return SimulatedPool(lb_pair(), [bin_array(i) for i in (-1, 0, 1)], slot=100, timestamp=NOW, on_slot=on_slot)
+
+def test_simulated_swap_matches_quote_and_moves_the_pool():
+    simulated = pool()
+    amount = 10 ** 9
+    quoted = simulated.quote([amount], True)
+    assert simulated.swap(amount, True) == quoted.out_amount[0]
+    assert int(simulated.lb_pair["active_id"]) == quoted.end_bin_id[0]
+    # The same amount again gets a worse price from the drained bins.
+    assert simulated.quote([amount], True).out_amount[0] < quoted.out_amount[0]
+
+def test_sliced_swap_beats_one_shot_when_liquidity_refills():
+    original = pool()
+    refill_bins = original.bin_arrays["bins"].copy()
+
+    def refill(simulated, slot):
+        # Market makers put the book back every few slots.
+        if slot % 5 == 0:
+            simulated.bin_arrays["bins"] = refill_bins
+            simulated.lb_pair["active_id"] = ACTIVE_ID
+
+    amount = 4 * 10 ** 9
+    one_shot = swap_quote_ladder(original.lb_pair, list(original.bin_arrays), [amount], True, NOW).out_amount[0]
+    report = SlicedSwapExecutor(pool(refill), slices=4, max_impact_bps=10000).run(amount, True)
+
+    assert not report.cancelled
+    assert report.filled_in == amount
+    assert report.one_shot_out == one_shot
+    assert [c.status for c in report.children] == ["filled"] * 4
+    assert report.realized_out == report.quoted_out
+    assert report.realized_vs_quoted_bps == 0
+    assert report.realized_out > one_shot
+    assert report.improvement_vs_one_shot_bps > 0
+
+def test_adverse_price_move_cancels_the_rest():
+    def crash(simulated, slot):
+        if slot == 105:
+            simulated.lb_pair["active_id"] = ACTIVE_ID - 10
+
+    report = SlicedSwapExecutor(pool(crash), slices=4, max_impact_bps=10000, max_price_move_bps=100).run(4 * 10 ** 9, True)
+    assert report.cancelled
+    assert "against the order" in report.reason
+    assert len(report.children) == 1
+    assert report.unfilled == 3 * 10 ** 9
+
+def test_child_is_halved_to_fit_the_impact_bound():
+    report = SlicedSwapExecutor(pool(), slices=1, max_impact_bps=30).run(4 * 10 ** 9, True)
+    child = report.children[0]
+    assert child.status == "filled"
+    assert child.amount_in < 4 * 10 ** 9
+    assert -child.price_impact * 100 <= 30
+    assert report.unfilled > 0
@@ -0,0 +1,82 @@
+import numpy as np
+from dlmm import accounts
+from dlmm.fee import FEE_PRECISION, FeeModel, active_fee_rates
+from .conftest import account_data
+
+BIN_STEP = 25
+NOW = 1_700_000_000
+
+def lb_pair(active_id: int = 100, last_update: int = NOW - 60):
+    record = np.zeros(1, dtype=accounts.LB_PAIR)[0]
+    record["active_id"] = active_id
+    record["bin_step"] = BIN_STEP
+    record["parameters"]["base_factor"] = 10000
+    record["parameters"]["filter_period"] = 30
+    record["parameters"]["decay_period"] = 600
+    record["parameters"]["reduction_factor"] = 5000
+    record["parameters"]["variable_fee_control"] = 7500
+    record["parameters"]["max_volatility_accumulator"] = 150000
+    record["parameters"]["protocol_share"] = 500
+    record["v_parameters"]["volatility_accumulator"] = 40000
+    record["v_parameters"]["index_reference"] = active_id
+    record["v_parameters"]["last_update_timestamp"] = last_update
+    return record
+
+def reference_rate(volatility_accumulator: int) -> int:
+    # getTotalFee of the SDK.
+    variable = (7500 * (volatility_accumulator * BIN_STEP) ** 2 + 99_999_999_999) // 100_000_000_000
+    return min(10000 * BIN_STEP * 10 + variable, 100_000_000)
+
+def test_project_follows_the_volatility_accumulator():
+    model = FeeModel(lb_pair())
+    # 60s since the last swap: within the decay period, the reference is halved.
+    rates = model.project(8, swap_for_y=True, timestamp=NOW)
+    expected = [reference_rate(min(20000 + n * 10000, 150000)) for n in range(8)]
+    assert rates.tolist() == expected
+    assert model.dynamic_fee(NOW) == expected[0] / FEE_PRECISION * 100
+
+def test_reference_decays_and_filters():
+    # Past the decay period the reference is reset.
+    assert FeeModel(lb_pair(last_update=NOW - 601)).project(1, True, NOW).tolist() == [reference_rate(0)]
+    # Within the filter period the previous index reference is kept.
+    model = FeeModel(lb_pair(active_id=103, last_update=NOW - 10))
+    model.lb_pair["v_parameters"]["index_reference"] = 100
+    model.lb_pair["v_parameters"]["volatility_reference"] = 5000
+    assert model.project(2, False, NOW).tolist() == [reference_rate(35000), reference_rate(45000)]
+
+def test_apply_lb_pair_reports_changes():
+    record = lb_pair()
+    model = FeeModel(record)
+    assert not model.apply_lb_pair(account_data(record))
+    record["active_id"] = 101
+    assert model.apply_lb_pair(account_data(record))
+    assert model.active_id == 101
+
+def test_fee_info():
+    info = FeeModel(lb_pair()).fee_info()
+    assert info.base_fee_rate_percentage == 0.25
+    assert info.max_fee_rate_percentage == 10
+    assert info.protocol_fee_percentage == 5
+
+def test_active_fee_rates_match_fee_model():
+    pairs = np.array([
+        lb_pair(),
+        lb_pair(last_update=NOW - 601),
+        lb_pair(active_id=103, last_update=NOW - 10),
+    ], dtype=accounts.LB_PAIR)
+    pairs[2]["v_parameters"]["index_reference"] = 100
+    pairs[2]["v_parameters"]["volatility_reference"] = 5000
+    expected = [int(FeeModel(pair).fee_rates(np.array([pair["active_id"]]), NOW)[0]) for pair in pairs]
+    assert active_fee_rates(pairs, NOW).tolist() == expected
+
+def test_active_fee_rates_are_exact_for_large_accumulators():
+    pairs = np.array([lb_pair(last_update=NOW - 10), lb_pair(last_update=NOW - 10)], dtype=accounts.LB_PAIR)
+    pairs["bin_step"] = 1
+    pairs["parameters"]["base_factor"] = 1
+    pairs["parameters"]["variable_fee_control"] = 1
+    pairs["parameters"]["max_volatility_accumulator"] = 2**32 - 1
+    # The square is 400 past a multiple of 10**11, which float64 rounds away.
+    pairs["v_parameters"]["volatility_reference"] = [2_500_000_020, 2_500_000_000]
+    expected = [int(FeeModel(pair).fee_rates(np.array([pair["active_id"]]), NOW)[0]) for pair in pairs]
+    assert expected == [10 + 62_500_002, 10 + 62_500_000]
+    assert active_fee_rates(pairs, NOW).tolist() == expected
@@ -0,0 +1,55 @@
+import json
+import logging
+from dlmm.log_pipeline import JsonLinesFormatter, RateLimitFilter, setup_logging
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+def record(lineno: int, level: int = logging.INFO, msg: str = "message", args=()):
+    return logging.LogRecord("trader", level, "main_trade.py", lineno, msg, args, None)
+
+def test_json_lines_include_fields():
+    entry = record(10, msg="Swapped %d", args=(5,))
+    entry.fields = {"position": "abc", "feeX": 7}
+    line = json.loads(JsonLinesFormatter().format(entry))
+    assert line["message"] == "Swapped 5"
+    assert line["level"] == "INFO"
+    assert (line["position"], line["feeX"]) == ("abc", 7)
+
+def test_rate_limit_per_call_site():
+    clock = Clock()
+    limit = RateLimitFilter(rate=1.0, burst=2, clock=clock)
+    assert [limit.filter(record(10)) for _ in range(4)] == [True, True, False, False]
+    # Another call site has its own bucket, warnings are never dropped.
+    assert limit.filter(record(11))
+    assert limit.filter(record(10, logging.WARNING))
+    clock.now = 1.0
+    passed = record(10)
+    assert limit.filter(passed)
+    assert passed.suppressed == 2
+
+def test_records_are_written_by_the_listener():
+    handler = ListHandler()
+    handler.setFormatter(JsonLinesFormatter())
+    logger = logging.getLogger("test_log_pipeline")
+    logger.propagate = False
+    listener = setup_logging([handler], logging.INFO, RateLimitFilter(burst=1), logger)
+    try:
+        for n in range(3):
+            logger.info("poll %d", n, extra={"fields": {"n": n}})
+        logger.debug("dropped")
+    finally:
+        listener.stop()
+    assert [json.loads(line)["n"] for line in handler.lines] == [0]
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+from solders.pubkey import Pubkey
+from dlmm.accounts import LB_CLMM_PROGRAM_ID
+from dlmm.dlmm import DLMM, DLMM_CLIENT
+from dlmm.metadata_cache import PoolMetadataCache
+from dlmm.transport import Transport
+from .conftest import FakeRpcClient, QuietHandler, account_data, lb_pair_record
+
+POOL = Pubkey.new_unique()
+MINT_X, MINT_Y = Pubkey.new_unique(), Pubkey.new_unique()
+RESERVE_X, RESERVE_Y = Pubkey.new_unique(), Pubkey.new_unique()
+
+def metadata(bin_step: int = 25):
+    return {
+        "lbPair": {
+            "bumpSeed": [255], "binStepSeed": [bin_step, 0], "pairType": 0, "activeId": 10, "binStep": bin_step,
+            "status": 0, "requireBaseFactorSeed": 0, "baseFactorSeed": [16, 39], "tokenXMint": str(MINT_X),
+            "tokenYMint": str(MINT_Y), "padding1": [], "padding2": [], "baseKey": str(Pubkey.default())
+        },
+        "tokenX": {"publicKey": str(MINT_X), "reserve": str(RESERVE_X), "amount": "0", "decimal": 9},
+        "tokenY": {"publicKey": str(MINT_Y), "reserve": str(RESERVE_Y), "amount": "0", "decimal": 6}
+    }
+
+def lb_pair_data(bin_step: int = 25) -> bytes:
+    record = lb_pair_record(bin_step=bin_step)
+    record["token_x_mint"] = np.frombuffer(bytes(MINT_X), dtype=np.uint8)
+    record["token_y_mint"] = np.frombuffer(bytes(MINT_Y), dtype=np.uint8)
+    record["reserve_x"] = np.frombuffer(bytes(RESERVE_X), dtype=np.uint8)
+    record["reserve_y"] = np.frombuffer(bytes(RESERVE_Y), dtype=np.uint8)
+    return account_data(record)
+
+def test_round_trip_through_disk(tmp_path):
+    path = str(tmp_path / "cache" / "pools.json")
+    PoolMetadataCache(path).put(POOL, metadata())
+    entry = PoolMetadataCache(path).get(POOL)
+    assert entry["tokenX"]["decimal"] == 9
+    assert entry["programId"] == str(LB_CLMM_PROGRAM_ID)
+
+def test_unreadable_file_is_ignored(tmp_path):
+    path = tmp_path / "pools.json"
+    path.write_text("{not json")
+    assert PoolMetadataCache(str(path)).get(POOL) is None
+
+def test_validate_against_chain(tmp_path):
+    cache = PoolMetadataCache(str(tmp_path / "pools.json"))
+    cache.put(POOL, metadata())
+    assert cache.validate(FakeRpcClient({POOL: lb_pair_data()}), POOL)
+    # A different bin step, or an account of another program, evicts the entry.
+    assert not cache.validate(FakeRpcClient({POOL: lb_pair_data(bin_step=100)}), POOL)
+    assert cache.get(POOL) is None
+    cache.put(POOL, metadata())
+    assert not cache.validate(FakeRpcClient({POOL: lb_pair_data()}, owner=Pubkey.new_unique()), POOL)
+    assert cache.get(POOL) is None
+
+def test_client_starts_from_cache_without_server(tmp_path):
+    cache = PoolMetadataCache(str(tmp_path / "pools.json"))
+    cache.put(POOL, metadata())
+    # Nothing listens on this port: the client must not call /dlmm/create.
+    dlmm = DLMM(POOL, "http://localhost:1", Transport.tcp("127.0.0.1", 1), metadata_cache=cache)
+    assert dlmm.metadata_from_cache
+    assert dlmm.token_X.public_key == MINT_X
+    assert dlmm.lb_pair.bin_step == 25
+
+class CreateMultipleHandler(QuietHandler):
+    requests = []
+
+    def do_POST(self):
+        addresses = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["poolAddresses"]
+        CreateMultipleHandler.requests.append((self.path, self.headers.get("pool"), addresses))
+        body = json.dumps([metadata(bin_step=len(address) % 50 + 1) for address in addresses]).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def test_create_multiple_batches_requests(http_server, tmp_path):
+    transport = http_server(CreateMultipleHandler, compression=True)
+    cache = PoolMetadataCache(str(tmp_path / "pools.json"))
+    cache.put(POOL, metadata())
+    pools = [Pubkey.new_unique() for _ in range(5)]
+    dlmms = DLMM_CLIENT.create_multiple([POOL] + pools, "http://localhost:1", transport, cache, chunk_size=2)
+
+    # The cached pool is not requested; the other five take three requests without a pool header.
+    assert [len(addresses) for _, _, addresses in CreateMultipleHandler.requests] == [2, 2, 1]
+    assert all(path == "/dlmm/create-multiple" and pool is None for path, pool, _ in CreateMultipleHandler.requests)
+    assert [dlmm.pool_address for dlmm in dlmms] == [POOL] + pools
+    assert dlmms[0].metadata_from_cache and not dlmms[1].metadata_from_cache
+    assert dlmms[1].lb_pair.bin_step == len(str(pools[0])) % 50 + 1
+    assert all(cache.get(pool) is not None for pool in pools)
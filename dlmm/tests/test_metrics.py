@@ -0,0 +1,85 @@
+import os
+import signal
+import time
+
+import pytest
+from solders.rpc.requests import GetSlot
+from dlmm.cache import ResponseCache
+from dlmm.metrics import Histogram, Metrics, instrument_client, instrument_session
+from .conftest import FakeSolanaClient, QuietHandler
+
+class Handler(QuietHandler):
+    def do_GET(self):
+        status = 500 if self.path == "/dlmm/fail" else 200
+        body = b"x" * 1000
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def test_histogram_buckets():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 0, 1]
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(1.0) == float("inf")
+
+def test_session_and_client_are_instrumented(http_server):
+    transport = http_server(Handler)
+    metrics = Metrics()
+    session = instrument_session(transport.session(), metrics)
+    session.get(f"{transport.base_url}/dlmm/get-active-bin")
+    session.get(f"{transport.base_url}/dlmm/get-active-bin")
+    session.get(f"{transport.base_url}/dlmm/fail")
+
+    client = instrument_client(FakeSolanaClient(), metrics)
+    assert client._provider.make_request(GetSlot(), str) == "ok"
+    with pytest.raises(ConnectionError):
+        client._provider.make_request(GetSlot(), None)
+
+    summary = metrics.summary()
+    assert summary["/dlmm/get-active-bin"]["calls"] == 2
+    assert summary["/dlmm/fail"]["errors"] == 1
+    assert metrics.rpc_counts() == {"getSlot": 2}
+    text = metrics.prometheus()
+    assert 'dlmm_response_size_bytes_bucket{endpoint="/dlmm/get-active-bin",le="1024"} 2' in text
+    assert 'solana_rpc_errors_total{method="getSlot"} 1' in text
+
+def test_cache_hit_ratio_and_dump_on_signal(tmp_path):
+    cache = ResponseCache()
+    cache.lookup("get_active_bin", (), lambda: 1)
+    cache.lookup("get_active_bin", (), lambda: 1)
+    metrics = Metrics()
+    metrics.track_cache(cache, "pool")
+    path = str(tmp_path / "metrics.prom")
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        metrics.dump_on_signal(path)
+        # The signal may arrive while the main thread is recording a call.
+        with metrics._Metrics__lock:
+            os.kill(os.getpid(), signal.SIGUSR1)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with open(path) as f:
+        assert 'dlmm_cache_hit_ratio{cache="pool",method="get_active_bin"} 0.5000' in f.read()
+
+def test_samples_follow_their_type_line():
+    cache = ResponseCache()
+    cache.lookup("get_active_bin", (), lambda: 1)
+    cache.lookup("get_fee_info", (), lambda: 1)
+    metrics = Metrics()
+    metrics.track_cache(cache, "pool")
+    metrics.observe("/dlmm/get-active-bin", 0.01, 100, False)
+    family, families = None, []
+    for line in metrics.prometheus().splitlines():
+        if line.startswith("# TYPE "):
+            family = line.split()[2]
+            families.append(family)
+        else:
+            name = line.split("{")[0].split(" ")[0]
+            assert name in (family, f"{family}_bucket", f"{family}_sum", f"{family}_count"), line
+    assert len(families) == len(set(families))
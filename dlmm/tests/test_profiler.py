@@ -0,0 +1,63 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+import pytest
+from dlmm.profiler import CycleProfiler
+
+def busy(seconds: float) -> int:
+    total, end = 0, time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+def read_delayed(delay: float) -> bytes:
+    left, right = socket.socketpair()
+    threading.Timer(delay, right.sendall, (b"x",)).start()
+    try:
+        with left.makefile("rb") as f:
+            return f.read(1)
+    finally:
+        left.close()
+        right.close()
+
+def test_profiles_requested_cycles_only(tmp_path):
+    directory = str(tmp_path)
+    profiler = CycleProfiler(directory, interval=0.005)
+    profiler.start_cycle()
+    profiler.profile(1)
+    profiler.start_cycle()
+    busy(0.2)
+    assert read_delayed(0.2) == b"x"
+    profile = profiler.end_cycle()
+    profiler.start_cycle()
+    profiler.end_cycle()
+
+    assert [p.cycle for p in profiler.profiles] == [2]
+    assert os.listdir(directory) == ["cycle-0002.collapsed"]
+    assert profile.cpu > 0.1 and profile.network > 0.1
+    assert profile.hot_spots(1)[0][0] == "test_profiler.py:busy"
+    with open(profile.path) as f:
+        lines = f.read().splitlines()
+    assert any(line.startswith("[network];") and "test_profiler.py:read_delayed" in line for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profile.samples
+
+def test_interval_must_be_float(tmp_path):
+    with pytest.raises(TypeError):
+        CycleProfiler(str(tmp_path), interval=1)
+
+def test_armed_from_signal_handler(tmp_path):
+    profiler = CycleProfiler(str(tmp_path), interval=0.005)
+    previous = signal.getsignal(signal.SIGUSR2)
+    try:
+        signal.signal(signal.SIGUSR2, lambda signum, frame: profiler.profile(1))
+        os.kill(os.getpid(), signal.SIGUSR2)
+    finally:
+        signal.signal(signal.SIGUSR2, previous)
+    profiler.start_cycle()
+    busy(0.02)
+    assert profiler.end_cycle().cycle == 1
+    profiler.start_cycle()
+    assert profiler.end_cycle() is None
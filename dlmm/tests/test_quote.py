@@ -0,0 +1,91 @@
+import numpy as np
+from dlmm import accounts
+from dlmm.quote import FEE_PRECISION, swap_quote_ladder
+
+BIN_STEP = 25
+NOW = 1_700_000_000
+
+def lb_pair(active_id: int):
+    record = np.zeros(1, dtype=accounts.LB_PAIR)[0]
+    record["active_id"] = active_id
+    record["bin_step"] = BIN_STEP
+    record["parameters"]["base_factor"] = 10000
+    record["parameters"]["filter_period"] = 30
+    record["parameters"]["decay_period"] = 600
+    record["parameters"]["reduction_factor"] = 5000
+    record["parameters"]["variable_fee_control"] = 7500
+    record["parameters"]["max_volatility_accumulator"] = 150000
+    record["parameters"]["protocol_share"] = 500
+    record["v_parameters"]["volatility_accumulator"] = 20000
+    record["v_parameters"]["last_update_timestamp"] = NOW - 60
+    return record
+
+def bin_array(index: int, rng):
+    record = np.zeros(1, dtype=accounts.BIN_ARRAY)[0]
+    record["index"] = index
+    ids = accounts.bin_array_bin_ids(index)
+    prices = [int((1 + BIN_STEP / 10000) ** int(i) * 2 ** 64) for i in ids]
+    record["bins"]["price"]["lo"] = [p & (2 ** 64 - 1) for p in prices]
+    record["bins"]["price"]["hi"] = [p >> 64 for p in prices]
+    record["bins"]["amount_x"] = rng.integers(0, 10 ** 9, 70)
+    record["bins"]["amount_y"] = rng.integers(0, 10 ** 9, 70)
+    # A few empty bins, which the walk skips.
+    record["bins"]["amount_x"][::7] = 0
+    record["bins"]["amount_y"][::7] = 0
+    return record
+
+def reference(pair, arrays, amount, swap_for_y):
+    # Straight port of DLMM.swapQuote with isPartialFill, one bin at a time.
+    s, v = pair["parameters"], pair["v_parameters"]
+    active = int(pair["active_id"])
+    index_reference = active
+    volatility_reference = int(v["volatility_accumulator"]) * int(s["reduction_factor"]) // 10000
+    bins = {}
+    for array in arrays:
+        for bin_id, b in zip(accounts.bin_array_bin_ids(int(array["index"])), array["bins"]):
+            bins[int(bin_id)] = (int(b["amount_x"]), int(b["amount_y"]), accounts.u128_to_int(b["price"]))
+    left, out, fee, protocol = amount, 0, 0, 0
+    bin_id = active
+    while left > 0 and bin_id in bins:
+        vol = min(volatility_reference + abs(index_reference - bin_id) * 10000, int(s["max_volatility_accumulator"]))
+        rate = min(10000 * BIN_STEP * 10 + (7500 * (vol * BIN_STEP) ** 2 + 99_999_999_999) // 100_000_000_000, 100_000_000)
+        x, y, price = bins[bin_id]
+        max_out = y if swap_for_y else x
+        if max_out:
+            max_in = -(-(max_out << 64) // price) if swap_for_y else -(-(max_out * price) >> 64)
+            max_fee = -(-(max_in * rate) // (FEE_PRECISION - rate))
+            if left > max_in + max_fee:
+                left -= max_in + max_fee
+                out += max_out
+                fee += max_fee
+                protocol += max_fee * 500 // 10000
+            else:
+                f = -(-(left * rate) // FEE_PRECISION)
+                o = ((left - f) * price) >> 64 if swap_for_y else ((left - f) << 64) // price
+                out += min(o, max_out)
+                fee += f
+                protocol += f * 500 // 10000
+                left = 0
+        bin_id += -1 if swap_for_y else 1
+    return amount - left, out, fee, protocol
+
+def test_ladder_matches_bin_by_bin_quote():
+    rng = np.random.default_rng(7)
+    pair = lb_pair(active_id=35)
+    arrays = [bin_array(i, rng) for i in (-1, 0, 1)]
+    amounts = [0, 1, 10 ** 6, 5 * 10 ** 8, 3 * 10 ** 9, 4 * 10 ** 10, 10 ** 15]
+    for swap_for_y in (True, False):
+        ladder = swap_quote_ladder(pair, arrays, amounts, swap_for_y, timestamp=NOW)
+        for i, amount in enumerate(amounts):
+            expected = reference(pair, arrays, amount, swap_for_y)
+            got = (ladder.consumed_in_amount[i], ladder.out_amount[i], ladder.fee[i], ladder.protocol_fee[i])
+            assert got == expected, (swap_for_y, amount)
+        # Bigger swaps never get a better price.
+        assert np.all(np.diff(ladder.price_impact[1:]) <= 1e-9)
+        assert ladder.consumed_in_amount[-1] < amounts[-1]
+
+def test_ladder_without_liquidity():
+    ladder = swap_quote_ladder(lb_pair(0), [], [10, 20], True, timestamp=NOW)
+    assert ladder.consumed_in_amount.tolist() == [0, 0]
+    assert ladder.out_amount.tolist() == [0, 0]
+    assert ladder.bins_crossed == 0
@@ -0,0 +1,53 @@
+import numpy as np
+from solders.pubkey import Pubkey
+from dlmm import accounts
+from dlmm.screener import PoolScreener
+from .conftest import FakeRpcClient, account_data, bin_array_data, lb_pair_record
+
+NOW = 1_700_000_000
+USDC = Pubkey.new_unique()
+
+def lb_pair_data(active_id: int = 5, base_factor: int = 10000, status: int = 0, reward_rate: int = 0, quote: Pubkey = USDC):
+    record = lb_pair_record(active_id)
+    record["status"] = status
+    record["parameters"]["base_factor"] = base_factor
+    record["token_y_mint"] = np.frombuffer(bytes(quote), dtype=np.uint8)
+    record["reward_infos"]["reward_rate"]["hi"][0] = reward_rate
+    record["reward_infos"]["reward_duration_end"][0] = NOW + 3600
+    return account_data(record)
+
+def add_pool(accounts_by_key, amount_y: int = 100, **kwargs) -> Pubkey:
+    pool = Pubkey.new_unique()
+    accounts_by_key[pool] = lb_pair_data(**kwargs)
+    accounts_by_key[accounts.derive_bin_array(pool, 0)] = bin_array_data(0, amount_y=amount_y)
+    return pool
+
+def test_ranks_by_fee_depth_and_emission():
+    state = {}
+    cheap = add_pool(state, base_factor=5000)
+    best = add_pool(state, base_factor=20000, amount_y=300, reward_rate=1)
+    deep = add_pool(state, base_factor=10000, amount_y=500)
+    disabled = add_pool(state, base_factor=50000, status=1)
+    empty = add_pool(state, base_factor=50000, amount_y=0)
+    missing = Pubkey.new_unique()
+    client = FakeRpcClient(state)
+
+    screener = PoolScreener([cheap, best, deep, disabled, empty, missing], depth_bins=2)
+    table = screener.refresh(client, NOW)
+    assert screener.top(3) == [best, deep, cheap]
+    assert client.calls == screener.last_rpc_calls == 2
+    # Bins 3..7 around the active bin count as depth.
+    assert table["depth_y"].tolist() == [1500, 2500, 500]
+    assert table["fee_rate"][0] == 20000 * 10 * 10 / 1e9
+    assert screener.top(mints=[USDC]) == [best, deep, cheap]
+    assert screener.top(mints=[Pubkey.new_unique()]) == []
+
+def test_budget_rotates_through_pools():
+    state = {}
+    pools = [add_pool(state, base_factor=100 * (n + 1)) for n in range(250)]
+    client = FakeRpcClient(state)
+    screener = PoolScreener(pools, max_rpc_calls=4)
+    assert len(screener.refresh(client, NOW)) == 200
+    assert screener.last_rpc_calls == 4
+    assert len(screener.refresh(client, NOW)) == 250
+    assert screener.top(1) == [pools[-1]]
@@ -0,0 +1,97 @@
+from decimal import Decimal, getcontext
+
+import numpy as np
+import pytest
+from dlmm.strategy import auto_fill_x_by_strategy, auto_fill_y_by_strategy, auto_fill_y_for_ranges, to_amounts_both_side_by_strategy
+from dlmm.types import StrategyType
+
+BIN_STEP = 20
+ACTIVE_ID = 100
+
+def reference_both_side(active_id, amount_x, amount_y, weights):
+    # toAmountBothSide of the SDK in decimals, for an empty active bin inside the range.
+    getcontext().prec = 40
+    price = lambda i: (1 + Decimal(BIN_STEP) / 10000) ** i
+    p0 = price(active_id)
+    wx0 = Decimal(weights[active_id]) / (p0 * 2)
+    wy0 = Decimal(weights[active_id]) / 2
+    total_x = wx0 + sum(Decimal(w) / price(i) for i, w in weights.items() if i > active_id)
+    total_y = wy0 + sum(Decimal(w) for i, w in weights.items() if i < active_id)
+    k = min(Decimal(amount_x) / total_x, Decimal(amount_y) / total_y)
+    result = {}
+    for i, w in weights.items():
+        if i < active_id:
+            result[i] = (0, int(k * w))
+        elif i > active_id:
+            result[i] = (int(k * w / price(i)), 0)
+        else:
+            result[i] = (int(k * wx0), int(k * wy0))
+    return result
+
+def assert_close(amounts, expected):
+    for i, (x, y) in expected.items():
+        row = int(np.flatnonzero(amounts.bin_id == i)[0])
+        assert abs(int(amounts.amount_x[row]) - x) <= 1
+        assert abs(int(amounts.amount_y[row]) - y) <= 1
+
+def test_spot_balanced_matches_sdk():
+    amounts = to_amounts_both_side_by_strategy(ACTIVE_ID, BIN_STEP, 90, 110, 10 ** 9, 10 ** 9, 0, 0, StrategyType.SpotBalanced, balanced=True)
+    expected = reference_both_side(ACTIVE_ID, 10 ** 9, 10 ** 9, {i: 1 for i in range(90, 111)})
+    assert_close(amounts, expected)
+    assert amounts.total_x <= 10 ** 9 and amounts.total_y <= 10 ** 9
+
+def test_curve_balanced_matches_sdk():
+    # Weights of toWeightCurve for [96, 104] around bin 100: slopes of 1800 // 4.
+    weights = {i: 2000 - abs(ACTIVE_ID - i) * 450 for i in range(96, 105)}
+    amounts = to_amounts_both_side_by_strategy(ACTIVE_ID, BIN_STEP, 96, 104, 5 * 10 ** 8, 10 ** 9, 0, 0, StrategyType.CurveBalanced, balanced=True)
+    assert_close(amounts, reference_both_side(ACTIVE_ID, 5 * 10 ** 8, 10 ** 9, weights))
+
+def test_bid_ask_balanced_requires_active_bin_in_range():
+    with pytest.raises(ValueError):
+        to_amounts_both_side_by_strategy(ACTIVE_ID, BIN_STEP, 101, 110, 10 ** 9, 10 ** 9, 0, 0, StrategyType.BidAsk, balanced=True)
+
+def test_imbalanced_sides_are_independent():
+    amounts = to_amounts_both_side_by_strategy(ACTIVE_ID, BIN_STEP, 94, 106, 6 * 10 ** 9, 7 * 10 ** 8, 0, 0, StrategyType.SpotBalanced)
+    bid = amounts.bin_id <= ACTIVE_ID
+    assert np.all(amounts.amount_x[bid] == 0)
+    assert np.all(amounts.amount_y[~bid] == 0)
+    # Y evenly over the 7 bid bins, X over the 6 ask bins weighted by 1 / price.
+    assert np.all(amounts.amount_y[bid] == 10 ** 8)
+    assert abs(amounts.total_x - 6 * 10 ** 9) <= 6
+    assert np.all(np.diff(amounts.amount_x[~bid].astype(np.int64)) < 0)
+
+def test_imbalanced_single_sided_x_puts_active_bin_on_ask_side():
+    amounts = to_amounts_both_side_by_strategy(ACTIVE_ID, BIN_STEP, 94, 106, 10 ** 9, 0, 0, 0, StrategyType.BidAsk)
+    assert amounts.total_y == 0
+    assert amounts.amount_x[amounts.bin_id == ACTIVE_ID][0] > 0
+    # BidAsk grows away from the active bin.
+    ask = amounts.amount_x[amounts.bin_id >= ACTIVE_ID].astype(np.int64)
+    assert np.all(np.diff(ask) > 0)
+
+def test_auto_fill_round_trips():
+    args = (0, 0, 90, 110, StrategyType.CurveBalanced)
+    for balanced in (True, False):
+        amount_y = auto_fill_y_by_strategy(ACTIVE_ID, BIN_STEP, 10 ** 9, *args, balanced=balanced)
+        amount_x = auto_fill_x_by_strategy(ACTIVE_ID, BIN_STEP, amount_y, *args, balanced=balanced)
+        assert abs(amount_x - 10 ** 9) <= 2
+        amounts = to_amounts_both_side_by_strategy(ACTIVE_ID, BIN_STEP, 90, 110, 10 ** 9, amount_y, 0, 0, StrategyType.CurveBalanced, balanced)
+        assert abs(amounts.total_x - 10 ** 9) <= 21
+        assert abs(amounts.total_y - amount_y) <= 21
+
+def test_auto_fill_for_ranges():
+    ranges = [(ACTIVE_ID - n, ACTIVE_ID + n) for n in (1, 5, 20)]
+    filled = auto_fill_y_for_ranges(ACTIVE_ID, BIN_STEP, 10 ** 9, ranges, StrategyType.SpotBalanced)
+    assert filled.tolist() == [auto_fill_y_by_strategy(ACTIVE_ID, BIN_STEP, 10 ** 9, 0, 0, lower, upper, StrategyType.SpotBalanced) for lower, upper in ranges]
+
+def test_auto_fill_for_ranges_matches_every_shape():
+    # Ranges around, below and above the active bin, with a non-empty active bin.
+    ranges = [(ACTIVE_ID - 3, ACTIVE_ID + 8), (ACTIVE_ID - 30, ACTIVE_ID), (ACTIVE_ID + 2, ACTIVE_ID + 9), (ACTIVE_ID - 9, ACTIVE_ID - 2)]
+    for strategy_type in StrategyType:
+        for balanced in (False, True):
+            usable = ranges if not balanced or strategy_type == StrategyType.SpotBalanced else ranges[:2]
+            filled = auto_fill_y_for_ranges(ACTIVE_ID, BIN_STEP, 10 ** 9, usable, strategy_type, 500, 300, balanced)
+            expected = [
+                auto_fill_y_by_strategy(ACTIVE_ID, BIN_STEP, 10 ** 9, 500, 300, lower, upper, strategy_type, balanced)
+                for lower, upper in usable
+            ]
+            assert filled.tolist() == expected
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from solders.rpc.requests import GetSlot
+from dlmm.tracing import TRACE_HEADER, SPANS_HEADER, Tracer, current_trace_id, span, trace_client, trace_session
+from .conftest import FakeSolanaClient, QuietHandler
+
+SERVER_PID = 4242
+
+class Handler(QuietHandler):
+    def do_GET(self):
+        trace_id = self.headers.get(TRACE_HEADER)
+        self.send_response(200)
+        if trace_id:
+            spans = [{"name": "DLMM.create", "ts": 1, "dur": 5, "lane": 0}, {"name": "rpc getAccountInfo", "ts": 2, "dur": 3, "lane": 1}]
+            self.send_header(SPANS_HEADER, json.dumps({"pid": SERVER_PID, "dropped": 0, "spans": spans}))
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+def read_events(path):
+    # The array is left open while tracing.
+    with open(path) as f:
+        return json.loads(f.read().rstrip().rstrip(",") + "]")
+
+def test_trace_spans_server_and_rpc_calls(http_server, tmp_path):
+    transport = http_server(Handler)
+    path = str(tmp_path / "trace.json")
+    tracer = Tracer(path)
+    try:
+        session = trace_session(transport.session())
+        client = trace_client(FakeSolanaClient())
+        session.get(f"{transport.base_url}/dlmm/untraced")
+        with tracer.trace("exit", position="abc") as trace_id:
+            session.get(f"{transport.base_url}/dlmm/create")
+            client._provider.make_request(GetSlot(), str)
+            with pytest.raises(ValueError):
+                with span("confirm"):
+                    raise ValueError("timeout")
+        assert current_trace_id() is None
+    finally:
+        tracer.close()
+
+    spans = {event["name"]: event for event in read_events(path) if event["ph"] == "X"}
+    assert set(spans) == {"exit", "GET /dlmm/create", "DLMM.create", "rpc getAccountInfo", "rpc getSlot", "confirm"}
+    assert all(event["args"]["trace_id"] == trace_id for event in spans.values())
+    assert spans["exit"]["args"]["position"] == "abc"
+    assert spans["confirm"]["args"]["error"] == "ValueError"
+    assert (spans["rpc getAccountInfo"]["pid"], spans["rpc getAccountInfo"]["tid"]) == (SERVER_PID, 2)
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(None)
+    with tracer.trace("swap") as trace_id:
+        with span("quote"):
+            pass
+    assert trace_id is None and current_trace_id() is None
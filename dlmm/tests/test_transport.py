@@ -0,0 +1,57 @@
+import gzip
+import json
+import socketserver
+import threading
+from dlmm.transport import Transport
+from .conftest import QuietHandler
+
+class EchoHandler(QuietHandler):
+    def do_GET(self):
+        body = json.dumps({
+            "path": self.path,
+            "pool": self.headers.get("pool"),
+            "acceptEncoding": self.headers.get("Accept-Encoding")
+        }).encode()
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        return "uds"
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def test_from_url():
+    assert Transport.from_url("http://localhost:3000").base_url == "http://localhost:3000"
+    assert Transport.from_url("localhost:3000").base_url == "http://localhost:3000"
+    assert Transport.from_url("https://dlmm.example.com/").base_url == "https://dlmm.example.com"
+
+    uds = Transport.from_url("unix:///tmp/dlmm.sock")
+    assert uds.is_uds
+    assert uds.socket_path == "/tmp/dlmm.sock"
+
+def test_uds_round_trip(tmp_path):
+    socket_path = str(tmp_path / "dlmm.sock")
+    server = UnixServer(socket_path, EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        transport = Transport.uds(socket_path)
+        session = transport.session()
+        session.headers.update({"pool": "pool"})
+        for _ in range(3):
+            result = session.get(f"{transport.base_url}/dlmm/get-active-bin").json()
+            assert result == {"path": "/dlmm/get-active-bin", "pool": "pool", "acceptEncoding": "identity"}
+
+        compressed = Transport.uds(socket_path, compression=True)
+        response = compressed.session().get(f"{compressed.base_url}/dlmm/get-bin-arrays")
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.json()["path"] == "/dlmm/get-bin-arrays"
+        assert "gzip" in response.json()["acceptEncoding"]
+    finally:
+        server.shutdown()
+        server.server_close()
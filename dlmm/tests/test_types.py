@@ -0,0 +1,145 @@
+import json
+import pytest
+from solders.pubkey import Pubkey
+from dlmm.utils import loads
+from dlmm.types import GetBins, GetPositionByUser, PositionBinData, PositionChanges, TokenReserve
+
+POSITION = str(Pubkey.new_unique())
+CLOSED = str(Pubkey.new_unique())
+
+def active_bin():
+    return {
+        "binId": 10,
+        "xAmount": "1000",
+        "yAmount": "2000",
+        "supply": "3000",
+        "price": "1.5",
+        "version": 1,
+        "pricePerToken": "150"
+    }
+
+def position_bin(bin_id: int):
+    return {
+        "binId": bin_id,
+        "price": "1.5",
+        "pricePerToken": "150",
+        "binXAmount": "1000",
+        "binYAmount": "2000",
+        "binLiquidity": "3000",
+        "positionLiquidity": "300",
+        "positionXAmount": "100",
+        "positionYAmount": "200"
+    }
+
+def position(public_key: str = POSITION, lower: int = 8, upper: int = 12):
+    return {
+        "publicKey": public_key,
+        "positionData": {
+            "totalXAmount": "500",
+            "totalYAmount": "1000",
+            "positionBinData": [position_bin(i) for i in range(lower, upper + 1)],
+            "lastUpdatedAt": "1700000000",
+            "upperBinId": upper,
+            "lowerBinId": lower,
+            "feeX": "7",
+            "feeY": "9",
+            "rewardOne": "0",
+            "rewardTwo": "0",
+            "feeOwner": str(Pubkey.default()),
+            "totalClaimedFeeXAmount": "0",
+            "totalClaimedFeeYAmount": "0"
+        },
+        "version": 2
+    }
+
+def test_get_position_by_user():
+    result = GetPositionByUser({"activeBin": active_bin(), "userPositions": [position()]})
+    assert result.active_bin.bin_id == 10
+    assert len(result.user_positions) == 1
+    assert str(result.user_positions[0].public_key) == POSITION
+    assert [b.bin_id for b in result.user_positions[0].position_data.position_bin_data] == [8, 9, 10, 11, 12]
+
+def test_position_changes():
+    changes = PositionChanges({
+        "activeBin": active_bin(),
+        "userPositions": [position()],
+        "closedPositions": [CLOSED],
+        "slot": 250000000,
+        "full": False
+    })
+    assert changes.slot == 250000000
+    assert not changes.full
+    assert [str(p.public_key) for p in changes.user_positions] == [POSITION]
+    assert changes.closed_positions == [Pubkey.from_string(CLOSED)]
+
+def test_position_changes_full():
+    changes = PositionChanges({"activeBin": active_bin(), "userPositions": [], "slot": 1, "full": True})
+    assert changes.full
+    assert changes.user_positions == []
+    assert changes.closed_positions == []
+
+def test_position_bin_columns():
+    bins = GetPositionByUser({"activeBin": active_bin(), "userPositions": [position()]}).user_positions[0].position_data.position_bin_data
+    assert bins.bin_ids.tolist() == [8, 9, 10, 11, 12]
+    assert bins.x_amounts.sum() == 500
+    assert bins.liquidity.dtype.name == "float64"
+    # Per-bin objects are built on access only, and kept.
+    assert bins._items == [None] * 5
+    assert isinstance(bins[-1], PositionBinData) and bins[-1] is bins[4]
+    assert bins[1:3] == [bins[1], bins[2]]
+    assert bins.to_json()[0] == position_bin(8)
+
+def test_bin_liquidity_columns():
+    rows = [{"binId": i, "xAmount": "64", "yAmount": "0", "supply": "ff", "version": 1, "price": "1.5", "pricePerToken": "150"} for i in range(3)]
+    bins = GetBins({"activeBin": 1, "bins": rows}).bin_liquidty
+    assert bins.x_amounts.tolist() == [100, 100, 100]
+    assert bins.liquidity.tolist() == [255, 255, 255]
+    assert bins[0].supply == "ff"
+    assert not hasattr(bins[0], "__dict__")
+
+def test_amount_columns_are_exact():
+    rows = [{"binId": 0, "xAmount": hex(2 ** 53 + 1), "yAmount": "0", "supply": hex(2 ** 70 + 1), "version": 1, "price": "1", "pricePerToken": "1"}]
+    bins = GetBins({"activeBin": 0, "bins": rows}).bin_liquidty
+    assert bins.x_amounts.tolist() == [2 ** 53 + 1]
+    assert bins.liquidity.tolist() == [2 ** 70 + 1]
+
+def test_positions_are_parsed_lazily():
+    body = json.dumps({"activeBin": active_bin(), "userPositions": [position(), {"publicKey": CLOSED}]}).encode()
+    result = GetPositionByUser(loads(body))
+    assert result.position_keys == [POSITION, CLOSED]
+    assert result._user_positions is None and result._active_bin is None
+    # The invalid entry is skipped once positions are built.
+    assert [str(p.public_key) for p in result.user_positions] == [POSITION]
+    assert result.user_positions is result.user_positions
+
+def test_error_bodies_are_rejected():
+    for body in ({}, {"error": "bad request"}, "Internal error"):
+        with pytest.raises(KeyError):
+            GetPositionByUser(body)
+    with pytest.raises(KeyError):
+        PositionChanges({"slot": 5})
+
+def test_fingerprint():
+    first = GetPositionByUser({"activeBin": active_bin(), "userPositions": [position()]})
+    same = GetPositionByUser({"activeBin": active_bin(), "userPositions": [position()]})
+    assert first.fingerprint() == same.fingerprint()
+    moved = position()
+    moved["positionData"]["feeX"] = "8"
+    assert first.fingerprint() != GetPositionByUser({"activeBin": active_bin(), "userPositions": [moved]}).fingerprint()
+
+def test_fee_and_reward_amounts():
+    second = position(str(Pubkey.new_unique()))
+    second["positionData"].update({"feeX": "ff", "rewardOne": "0a", "rewardTwo": ""})
+    result = GetPositionByUser({"activeBin": active_bin(), "userPositions": [position(), second]})
+    data = result.user_positions[1].position_data
+    assert (data.fee_x_amount, data.fee_y_amount, data.reward_one_amount, data.reward_two_amount) == (255, 9, 10, 0)
+    assert data.amounts is data.amounts
+
+    token_x = TokenReserve({"publicKey": POSITION, "reserve": CLOSED, "amount": "0", "decimal": 2})
+    token_y = TokenReserve({"publicKey": POSITION, "reserve": CLOSED, "amount": "0", "decimal": 0})
+    assert data.fee_ui_amounts(token_x, token_y) == (2.55, 9)
+
+    totals = result.totals
+    assert (totals.count, totals.fee_x, totals.fee_y, totals.reward_one, totals.reward_two) == (2, 262, 18, 10, 0)
+    assert totals.fees_and_rewards == 290
+    assert result.totals is totals
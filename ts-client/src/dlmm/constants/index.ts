@@ -58,6 +58,8 @@ export const MAX_BIN_PER_TX = 69;
 
 export const MAX_ACTIVE_BIN_SLIPPAGE = 3;
 
+export const U64_MAX = new BN("18446744073709551615");
+
 export const ILM_BASE = new PublicKey(
   "MFGQxwAmB91SwuYX36okv2Qmdc9aMuHTwWGUrp4AtB1"
 );
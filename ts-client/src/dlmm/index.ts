@@ -36,6 +36,7 @@ import {
   POSITION_FEE,
   PRECISION,
   SCALE_OFFSET,
+  U64_MAX,
 } from "./constants";
 import { DlmmSdkError } from "./error";
 import {
@@ -129,6 +130,7 @@ import {
   SwapParams,
   SwapQuote,
   SwapQuoteExactOut,
+  SwapQuoteLadderStep,
   SwapWithPriceImpactParams,
   TInitializePositionAndAddLiquidityParams,
   TInitializePositionAndAddLiquidityParamsByStrategy,
@@ -1492,6 +1494,26 @@ export class DLMM {
       throw new Error("Error fetching positions");
     }
 
+    const userPositionsV2 = await this.getPositionsFromAccounts(positionsV2);
+
+    return {
+      activeBin,
+      userPositions: userPositionsV2,
+    };
+  }
+
+  /**
+   * The function `getPositionsFromAccounts` turns already fetched position accounts of this pair into
+   * `LbPosition`s, fetching the bin arrays they span in one batched call. It lets callers that keep
+   * their own set of position accounts skip the `getProgramAccounts` scan done by
+   * `getPositionsByUserAndLbPair`.
+   * @param positionsV2 - The position accounts, as returned by `program.account.positionV2.all`.
+   * @returns The function `getPositionsFromAccounts` returns a Promise that resolves to an array of
+   * `LbPosition` objects, in the same order as `positionsV2`.
+   */
+  public async getPositionsFromAccounts(
+    positionsV2: Array<{ publicKey: PublicKey; account: PositionV2 }>
+  ): Promise<Array<LbPosition>> {
     const binArrayPubkeySetV2 = new Set<string>();
     positionsV2.forEach(({ account: { upperBinId, lowerBinId, lbPair } }) => {
       const lowerBinArrayIndex = binIdToBinArrayIndex(new BN(lowerBinId));
@@ -1590,10 +1612,7 @@ export class DLMM {
       })
     );
 
-    return {
-      activeBin,
-      userPositions: userPositionsV2,
-    };
+    return userPositionsV2;
   }
 
   public async quoteCreatePosition({ strategy }: TQuoteCreatePositionParams) {
@@ -3271,6 +3290,169 @@ export class DLMM {
     };
   }
 
+  /**
+   * The `swapQuoteLadder` function quotes many input amounts in a single walk over the bins, so its
+   * cost grows with the number of bins crossed by the largest amount rather than with the number of
+   * amounts. Each step matches what `swapQuote` with `isPartialFill` would return for that amount.
+   * @param
+   *    - `inAmounts`: Amounts of lamport to swap in, in any order.
+   *    - `swapForY`: Swap token X to Y when it is true, else reversed.
+   *    - `binArrays`: binArrays for swapQuote.
+   * @returns {SwapQuoteLadderStep[]} One step per amount, in the order of `inAmounts`.
+   * @throws {DlmmSdkError}
+   */
+  public swapQuoteLadder(
+    inAmounts: BN[],
+    swapForY: boolean,
+    binArrays: BinArrayAccount[]
+  ): SwapQuoteLadderStep[] {
+    const currentTimestamp = Date.now() / 1000;
+    const vParameterClone = Object.assign({}, this.lbPair.vParameters);
+    const binStep = this.lbPair.binStep;
+    const sParameters = this.lbPair.parameters;
+    let activeId = new BN(this.lbPair.activeId);
+
+    this.updateReference(
+      activeId.toNumber(),
+      vParameterClone,
+      sParameters,
+      currentTimestamp
+    );
+
+    const order = inAmounts
+      .map((amount, i) => ({ amount, i }))
+      .sort((a, b) => a.amount.cmp(b.amount));
+    const steps: SwapQuoteLadderStep[] = new Array(inAmounts.length);
+
+    let next = 0;
+    let consumed = new BN(0);
+    let outAmount = new BN(0);
+    let feeAmount = new BN(0);
+    let protocolFeeAmount = new BN(0);
+    let startBin: Bin | null = null;
+    let lastFilledActiveBinId = activeId;
+
+    const settle = (
+      i: number,
+      inAmount: BN,
+      stepConsumed: BN,
+      stepOut: BN,
+      stepFee: BN,
+      stepProtocolFee: BN,
+      endBinId: BN
+    ) => {
+      let priceImpact = new Decimal(0);
+      if (startBin && !stepConsumed.isZero()) {
+        const outAmountWithoutSlippage = getOutAmount(
+          startBin,
+          stepConsumed.sub(
+            computeFeeFromAmount(binStep, sParameters, vParameterClone, stepConsumed)
+          ),
+          swapForY
+        );
+        if (!outAmountWithoutSlippage.isZero()) {
+          priceImpact = new Decimal(stepOut.toString())
+            .sub(new Decimal(outAmountWithoutSlippage.toString()))
+            .div(new Decimal(outAmountWithoutSlippage.toString()))
+            .mul(new Decimal(100));
+        }
+      }
+      steps[i] = {
+        inAmount,
+        consumedInAmount: stepConsumed,
+        outAmount: stepOut,
+        fee: stepFee,
+        protocolFee: stepProtocolFee,
+        priceImpact,
+        endPrice: getPriceOfBinByBinId(endBinId.toNumber(), binStep),
+      };
+    };
+
+    // Amounts of zero are settled before the walk.
+    while (next < order.length && order[next].amount.isZero()) {
+      const { amount, i } = order[next++];
+      settle(i, amount, new BN(0), new BN(0), new BN(0), new BN(0), activeId);
+    }
+
+    while (next < order.length) {
+      const binArrayAccountToSwap = findNextBinArrayWithLiquidity(
+        swapForY,
+        activeId,
+        this.lbPair,
+        this.binArrayBitmapExtension?.account ?? null,
+        binArrays
+      );
+      if (binArrayAccountToSwap == null) break;
+
+      this.updateVolatilityAccumulator(
+        vParameterClone,
+        sParameters,
+        activeId.toNumber()
+      );
+
+      if (isBinIdWithinBinArray(activeId, binArrayAccountToSwap.account.index)) {
+        const bin = getBinFromBinArray(
+          activeId.toNumber(),
+          binArrayAccountToSwap.account
+        );
+        // Whole bin: an amount larger than anything the bin can absorb.
+        const full = swapExactInQuoteAtBin(
+          bin,
+          binStep,
+          sParameters,
+          vParameterClone,
+          U64_MAX,
+          swapForY
+        );
+
+        if (!full.amountIn.isZero()) {
+          if (!startBin) startBin = bin;
+          lastFilledActiveBinId = activeId;
+
+          // Amounts that run out inside this bin.
+          while (
+            next < order.length &&
+            order[next].amount.sub(consumed).lte(full.amountIn)
+          ) {
+            const { amount, i } = order[next++];
+            const partial = swapExactInQuoteAtBin(
+              bin,
+              binStep,
+              sParameters,
+              vParameterClone,
+              amount.sub(consumed),
+              swapForY
+            );
+            settle(
+              i,
+              amount,
+              amount,
+              outAmount.add(partial.amountOut),
+              feeAmount.add(partial.fee),
+              protocolFeeAmount.add(partial.protocolFee),
+              activeId
+            );
+          }
+
+          consumed = consumed.add(full.amountIn);
+          outAmount = outAmount.add(full.amountOut);
+          feeAmount = feeAmount.add(full.fee);
+          protocolFeeAmount = protocolFeeAmount.add(full.protocolFee);
+        }
+      }
+
+      activeId = swapForY ? activeId.sub(new BN(1)) : activeId.add(new BN(1));
+    }
+
+    // Not enough liquidity in the given bin arrays: partial fills.
+    while (next < order.length) {
+      const { amount, i } = order[next++];
+      settle(i, amount, consumed, outAmount, feeAmount, protocolFeeAmount, lastFilledActiveBinId);
+    }
+
+    return steps;
+  }
+
   public async swapExactOut({
     inToken,
     outToken,
@@ -246,6 +246,16 @@ export interface SwapQuote {
   endPrice: Decimal;
 }
 
+export interface SwapQuoteLadderStep {
+  inAmount: BN;
+  consumedInAmount: BN;
+  outAmount: BN;
+  fee: BN;
+  protocolFee: BN;
+  priceImpact: Decimal;
+  endPrice: Decimal;
+}
+
 export interface SwapQuoteExactOut {
   inAmount: BN;
   outAmount: BN;
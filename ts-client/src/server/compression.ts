@@ -0,0 +1,64 @@
+import { NextFunction, Request, Response } from 'express';
+import zlib from 'zlib';
+
+type Encoding = 'zstd' | 'br' | 'gzip';
+
+// zstd is only available from Node 22.15 / 23.8 onwards.
+const zstdCompress: ((buf: Buffer, cb: (err: Error | null, out: Buffer) => void) => void) | undefined =
+  (zlib as any).zstdCompress;
+
+const ENCODERS: Record<Encoding, (buf: Buffer, cb: (err: Error | null, out: Buffer) => void) => void> = {
+  zstd: (buf, cb) => zstdCompress(buf, cb),
+  br: (buf, cb) => zlib.brotliCompress(buf, {
+    params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 4 },
+  }, cb),
+  gzip: (buf, cb) => zlib.gzip(buf, { level: 6 }, cb),
+};
+
+const PREFERENCE: Encoding[] = zstdCompress ? ['zstd', 'br', 'gzip'] : ['br', 'gzip'];
+
+/**
+ * Pick the best encoding the client accepts, honouring `q=0`.
+ */
+export function negotiateEncoding(acceptEncoding: string | undefined): Encoding | null {
+  if (!acceptEncoding) return null;
+  const accepted = new Map<string, number>();
+  for (const part of acceptEncoding.split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';');
+    const q = params.map((p) => p.trim()).find((p) => p.startsWith('q='));
+    accepted.set(name, q ? parseFloat(q.slice(2)) : 1);
+  }
+  return PREFERENCE.find((e) => (accepted.get(e) ?? 0) > 0) ?? null;
+}
+
+/**
+ * Compress string and Buffer responses of at least `threshold` bytes with the negotiated encoding.
+ * Compression runs on the libuv thread pool so large bin-array payloads do not block the event loop.
+ */
+export function compression(threshold: number = 1024) {
+  return (req: Request, res: Response, next: NextFunction) => {
+    const encoding = negotiateEncoding(req.headers['accept-encoding'] as string | undefined);
+    if (!encoding) return next();
+
+    const send = res.send.bind(res);
+    res.send = ((body: any) => {
+      // Objects go through res.json, which calls res.send again with a string.
+      if (typeof body !== 'string' && !Buffer.isBuffer(body)) return send(body);
+
+      const raw = Buffer.isBuffer(body) ? body : Buffer.from(body);
+      if (raw.length < threshold || res.getHeader('Content-Encoding')) return send(body);
+
+      if (!res.getHeader('Content-Type')) {
+        res.type(typeof body === 'string' ? 'json' : 'bin');
+      }
+      ENCODERS[encoding](raw, (err, compressed) => {
+        if (err) return send(body);
+        res.setHeader('Content-Encoding', encoding);
+        res.vary('Accept-Encoding');
+        send(compressed);
+      });
+      return res;
+    }) as Response['send'];
+    next();
+  };
+}
@@ -1,9 +1,21 @@
 import { Connection, PublicKey } from '@solana/web3.js';
 import express from 'express';
+import fs from 'fs';
+import https from 'https';
 import { DLMM } from '../dlmm';
-import { BinArrayAccount, LbPosition } from '../dlmm/types';
+import { BinArrayAccount, BinLiquidity, LbPosition } from '../dlmm/types';
 import { BN } from 'bn.js';
-import { convertToPosition } from './utils';
+import { convertToPosition, safeStringify } from './utils';
+import { SingleFlight, readKey } from './singleFlight';
+import { projectDlmm, selectFields } from './serializers';
+import { compression } from './compression';
+import { TASKS } from './tasks';
+import { QueueFullError, WorkerPool } from './workerPool';
+import { PositionIndex } from './positionIndex';
+import { PositionChanges } from './positionChanges';
+import { ServerMetrics, requestLogger } from './metrics';
+import { Trace, traced, tracedFetch, tracing } from './tracing';
+import os from 'os';
 
 declare global {
   namespace Express {
@@ -11,20 +23,42 @@ declare global {
       pool: PublicKey;
       rpc: string;
       connect: Connection;
+      trace?: Trace;
     }
   }
 }
 
 const app = express();
+// Identical concurrent reads share one upstream call; DLMM_READ_CACHE_TTL_MS > 0 also caches the result.
+const reads = new SingleFlight(parseInt(process.env.DLMM_READ_CACHE_TTL_MS ?? '0'));
+const metrics = new ServerMetrics();
+metrics.trackCache('reads', reads);
+app.use(metrics.middleware());
+// Requests with an x-trace-id header get their DLMM.create, worker and RPC spans back in x-trace-spans.
+app.use(tracing());
 app.use(express.urlencoded());
 app.use(express.json());
+// Negotiated zstd/br/gzip for responses of at least DLMM_COMPRESSION_THRESHOLD bytes.
+if (process.env.DLMM_COMPRESSION !== 'off') {
+  app.use(compression(parseInt(process.env.DLMM_COMPRESSION_THRESHOLD ?? '1024')));
+}
+// Request logging is off by default: DLMM_LOG_SAMPLE=0.01 logs 1% of requests, DLMM_LOG_BODY=on adds their bodies.
+app.use(requestLogger(parseFloat(process.env.DLMM_LOG_SAMPLE ?? '0'), process.env.DLMM_LOG_BODY === 'on'));
+// Registered before the middleware below, which needs an `rpc` header.
+app.get('/metrics', (req, res) => {
+  res.type('text/plain; version=0.0.4').send(metrics.render());
+});
 app.use(function (req, res, next) {
-  console.log(req.method, req.url);
-  console.log(req.body);
-
-  req.pool = new PublicKey(req.headers.pool as string);
+  // Routes that span many pools are called without a `pool` header.
+  if (req.headers.pool) {
+    req.pool = new PublicKey(req.headers.pool as string);
+  }
   req.rpc = req.headers.rpc as string;
-  req.connect = new Connection(req.rpc, 'finalized');
+  req.connect = new Connection(req.rpc, {
+    commitment: 'finalized',
+    fetchMiddleware: metrics.rpcCounter(req),
+    ...(req.trace ? { fetch: tracedFetch(req.trace) } : {}),
+  });
   next();
 })
 
@@ -32,43 +66,79 @@ app.get('/', (req, res) => {
   res.send('Hello World!');
 });
 
-function safeStringify(obj: Record<string, any>): string {
-  const seen = new WeakSet();
-  return JSON.stringify(obj, (key, value) => {
-    if (typeof value === "bigint") {
-      return value.toString();
-    }
-    if (typeof value === "object" && value !== null) {
-      if (seen.has(value)) {
-        return;
-      }
-      seen.add(value);
+// Serialize a read response, honouring an optional `?fields=a.b,c` selector.
+const serialize = (req: express.Request, value: any) =>
+  safeStringify(selectFields(value, req.query.fields as string | undefined));
+
+// BN-heavy routes run on worker threads so a large quote does not stall cheap reads.
+// DLMM_WORKERS=0 runs them on the main event loop instead.
+const workerCount = parseInt(process.env.DLMM_WORKERS ?? String(Math.max(1, os.cpus().length - 1)));
+const workers = workerCount > 0
+  ? new WorkerPool(workerCount, parseInt(process.env.DLMM_WORKER_QUEUE ?? '64'))
+  : null;
+
+// Position accounts per (rpc, pool, user) kept in memory by subscriptions instead of a scan per read.
+// DLMM_POSITION_INDEX=off falls back to the scan.
+const positionIndex = process.env.DLMM_POSITION_INDEX !== 'off'
+  ? new PositionIndex(
+    parseInt(process.env.DLMM_POSITION_RECONCILE_MS ?? '60000'),
+    10 * 60_000,
+    'finalized',
+    2 * 60_000,
+    metrics.rpcCounter('position-index')
+  )
+  : null;
+// Fingerprints of served positions, for `sinceSlot` delta reads.
+const positionChanges = new PositionChanges();
+
+const createDlmm = (req: express.Request, poolAddress: PublicKey) =>
+  traced(req.trace, 'DLMM.create', () => DLMM.create(req.connect, poolAddress));
+
+async function runCpuTask(req: express.Request, res: express.Response, task: string) {
+  try {
+    // Worker threads use their own Connection, so their RPC calls are inside this span only; they
+    // count them and report the counts back with the result.
+    const payload = await traced(req.trace, `task ${task}`, () => workers
+      ? workers.run(task, req.rpc, req.pool.toBase58(), req.body, (calls) => metrics.addRpcCalls(req, calls))
+      : TASKS[task](req.connect, req.pool, req.body));
+    return res.status(200).send(payload);
+  }
+  catch (error) {
+    console.log(error)
+    if (error instanceof QueueFullError) {
+      return res.status(503).send({ error: error.message });
     }
-    return value;
-  });
+    return res.status(400).send(error)
+  }
 }
 
 app.get('/dlmm/create', async (req, res) => {
   try {
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    return res.status(200).send(safeStringify(dlmm));
+    const payload = await reads.do(readKey(req), async () => {
+      const poolAddress = req.pool;
+      const dlmm = await createDlmm(req, poolAddress);
+      return serialize(req, projectDlmm(dlmm));
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     return res.status(400).send(error)
   }
 })
 
-// app.get('/dlmm/create-multiple', async (req, res) => {
-//   try {
-//     const poolAddresses = req.pool;
-//     const dlmm = await DLMM.createMultiple(req.connect, poolAddresses);
-//     return res.status(200).send(safeStringify(dlmm));
-//   }
-//   catch (error) {
-//     return res.status(400).send(error)
-//   }
-// })
+// Body: { poolAddresses: string[] }. DLMM.createMultiple loads every LbPair, bitmap extension,
+// reserve and mint with chunked getMultipleAccounts, a handful of RPC calls for hundreds of pools.
+app.post('/dlmm/create-multiple', async (req, res) => {
+  try {
+    const poolAddresses: PublicKey[] = (req.body.poolAddresses ?? []).map((address: string) => new PublicKey(address));
+    const dlmms = await traced(req.trace, 'DLMM.createMultiple', () => DLMM.createMultiple(req.connect, poolAddresses));
+    return res.status(200).send(serialize(req, dlmms.map(projectDlmm)));
+  }
+  catch (error) {
+    console.log(error)
+    return res.status(400).send(error)
+  }
+})
 
 app.get('/dlmm/get-all-lb-pair-positions-by-user', async (req, res) => {
   try {
@@ -116,10 +186,13 @@ app.post("/dlmm/create-customizable-permissionless-lb-pair", async (req, res) =>
 
 app.get("/dlmm/get-active-bin", async (req, res) => {
   try {
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const activeBin = await dlmm.getActiveBin();
-    return res.status(200).send(safeStringify(activeBin));
+    const payload = await reads.do(readKey(req), async () => {
+      const poolAddress = req.pool;
+      const dlmm = await createDlmm(req, poolAddress);
+      const activeBin = await dlmm.getActiveBin();
+      return serialize(req, activeBin);
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -132,7 +205,7 @@ app.post("/dlmm/from-price-per-lamport", async (req, res) => {
     const pricePerLamport = req.body.price;
 
     const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const from = dlmm.fromPricePerLamport(pricePerLamport);
     return res.status(200).send({ price: from });
   }
@@ -147,7 +220,7 @@ app.post("/dlmm/to-price-per-lamport", async (req, res) => {
     const price = req.body.price;
 
     const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const to = dlmm.toPricePerLamport(price);
     return res.status(200).send({ price: to });
   }
@@ -159,76 +232,55 @@ app.post("/dlmm/to-price-per-lamport", async (req, res) => {
 
 app.post("/dlmm/initialize-position-and-add-liquidity-by-strategy", async (req, res) => {
   try {
-    const positionPublicKey = req.body.positionPubKey;
-    const userPublicKey = req.body.userPublicKey;
-    const totalXAmount = new BN(req.body.totalXAmount);
-    const totalYAmount = new BN(req.body.totalYAmount);
-    const maxBinId = req.body.maxBinId;
-    const minBinId = req.body.minBinId;
-    const strategyType = parseInt(req.body.strategyType);
-    const data = {
-      positionPubKey: new PublicKey(positionPublicKey),
-      user: new PublicKey(userPublicKey),
-      totalXAmount,
-      totalYAmount,
-      strategy: {
-        maxBinId,
-        minBinId,
-        strategyType
-      }
-    }
-
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const position = await dlmm.initializePositionAndAddLiquidityByStrategy(data);
-    return res.status(200).send(safeStringify(position));
+    // The new position account only exists once the caller sends the transaction; reads look it up
+    // directly until it does.
+    positionIndex?.expect(req.rpc, req.pool, new PublicKey(req.body.userPublicKey), new PublicKey(req.body.positionPubKey));
   }
   catch (error) {
     console.log(error)
     return res.status(400).send(error)
   }
+  return runCpuTask(req, res, 'initializePositionAndAddLiquidityByStrategy');
 })
 
 app.post("/dlmm/add-liquidity-by-strategy", async (req, res) => {
-  try {
-    const positionPublicKey = req.body.positionPubKey;
-    const userPublicKey = req.body.userPublicKey;
-    const totalXAmount = new BN(req.body.totalXAmount);
-    const totalYAmount = new BN(req.body.totalYAmount);
-    const maxBinId = req.body.maxBinId;
-    const minBinId = req.body.minBinId;
-    const strategyType = parseInt(req.body.strategyType);
-    const data = {
-      positionPubKey: new PublicKey(positionPublicKey),
-      user: new PublicKey(userPublicKey),
-      totalXAmount,
-      totalYAmount,
-      strategy: {
-        maxBinId,
-        minBinId,
-        strategyType
-      }
-    }
-
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const position = await dlmm.addLiquidityByStrategy(data);
-    return res.status(200).send(safeStringify(position));
-  }
-  catch (error) {
-    console.log(error)
-    return res.status(400).send(error)
-  }
+  return runCpuTask(req, res, 'addLiquidityByStrategy');
 })
 
 app.post("/dlmm/get-positions-by-user-and-lb-pair", async (req, res) => {
   try {
     const userPublicKey = req.body.userPublicKey;
+    // With `sinceSlot` only positions whose account or bins changed since that slot are returned,
+    // along with closed positions and the current `slot` to use as the next cursor.
+    const sinceSlot = req.body.sinceSlot;
+
+    const payload = await reads.do(readKey(req), async () => {
+      const poolAddress = req.pool;
+      const user = new PublicKey(userPublicKey);
+      const [dlmm, slot] = await Promise.all([
+        createDlmm(req, poolAddress),
+        sinceSlot !== undefined ? req.connect.getSlot() : Promise.resolve(0),
+      ]);
+
+      let positions: { activeBin: BinLiquidity; userPositions: LbPosition[] };
+      if (!positionIndex) {
+        positions = await dlmm.getPositionsByUserAndLbPair(user);
+      } else {
+        const [activeBin, accounts] = await Promise.all([
+          dlmm.getActiveBin(),
+          positionIndex.get(req.rpc, dlmm, user),
+        ]);
+        positions = { activeBin, userPositions: await dlmm.getPositionsFromAccounts(accounts) };
+      }
 
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const positions = await dlmm.getPositionsByUserAndLbPair(new PublicKey(userPublicKey));
-    return res.status(200).send(safeStringify(positions));
+      if (sinceSlot === undefined) {
+        return serialize(req, positions);
+      }
+      const key = [req.rpc, poolAddress.toBase58(), userPublicKey].join('|');
+      const delta = positionChanges.delta(key, slot, Number(sinceSlot), positions.userPositions);
+      return serialize(req, { activeBin: positions.activeBin, ...delta });
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -245,7 +297,7 @@ app.post("/dlmm/remove-liquidity", async (req, res) => {
     const shouldClaimAndClose = req.body.shouldClaimAndClose;
 
     const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const removeTxs = await dlmm.removeLiquidity({
       position: new PublicKey(positionPublicKey),
       user: new PublicKey(userPublicKey),
@@ -267,7 +319,7 @@ app.post("/dlmm/close-position", async (req, res) => {
     const position = convertToPosition(req.body.position)
 
     const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const closeTx = await dlmm.closePosition({ owner, position });
     return res.status(200).send(safeStringify(closeTx));
   }
@@ -282,28 +334,31 @@ app.post("/dlmm/get-bin-array-for-swap", async (req, res) => {
     const swapYtoX = Boolean(req.body.swapYtoX);
     const count = parseInt(req.body.count);
 
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const binArray = (await dlmm.getBinArrayForSwap(swapYtoX, count)).map(bin => ({
-      publicKey: bin.publicKey,
-      account: {
-        ...bin.account,
-        index: bin.account.index.toString('hex'),
-        bins: bin.account.bins.map(b => ({
-          amountX: b.amountX.toString('hex'),
-          amountXIn: b.amountXIn.toString('hex'),
-          amountY: b.amountY.toString('hex'),
-          amountYIn: b.amountYIn.toString('hex'),
-          feeAmountXPerTokenStored: b.feeAmountXPerTokenStored.toString('hex'),
-          feeAmountYPerTokenStored: b.feeAmountYPerTokenStored.toString('hex'),
-          liquiditySupply: b.liquiditySupply.toString('hex'),
-          price: b.price.toString('hex'),
-          rewardPerTokenStored: b.rewardPerTokenStored.map(r => r.toString('hex')),
-        })),
-      }
-    }));
+    const payload = await reads.do(readKey(req), async () => {
+      const poolAddress = req.pool;
+      const dlmm = await createDlmm(req, poolAddress);
+      const binArray = (await dlmm.getBinArrayForSwap(swapYtoX, count)).map(bin => ({
+        publicKey: bin.publicKey,
+        account: {
+          ...bin.account,
+          index: bin.account.index.toString('hex'),
+          bins: bin.account.bins.map(b => ({
+            amountX: b.amountX.toString('hex'),
+            amountXIn: b.amountXIn.toString('hex'),
+            amountY: b.amountY.toString('hex'),
+            amountYIn: b.amountYIn.toString('hex'),
+            feeAmountXPerTokenStored: b.feeAmountXPerTokenStored.toString('hex'),
+            feeAmountYPerTokenStored: b.feeAmountYPerTokenStored.toString('hex'),
+            liquiditySupply: b.liquiditySupply.toString('hex'),
+            price: b.price.toString('hex'),
+            rewardPerTokenStored: b.rewardPerTokenStored.map(r => r.toString('hex')),
+          })),
+        }
+      }));
+      return serialize(req, binArray);
+    });
 
-    return res.status(200).send(safeStringify(binArray));
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -312,41 +367,11 @@ app.post("/dlmm/get-bin-array-for-swap", async (req, res) => {
 })
 
 app.post("/dlmm/swap-quote", async (req, res) => {
-  try {
-    const swapYtoX = req.body.swapYToX;
-    const swapAmount = new BN(req.body.amount);
-    const allowedSlippage = new BN(req.body.allowedSlippage);
-    const binArrays: BinArrayAccount[] = req.body.binArrays.map(bin => ({
-      publicKey: new PublicKey(bin['publicKey']),
-      account: {
-        ...bin['account'],
-        index: new BN(bin['account']['index'], 16),
-        lbPair: new PublicKey(bin['account']['lbPair']),
-        bins: bin['account']['bins'].map(b => ({
-          amountX: new BN(b['amountX'], 16),
-          amountXIn: new BN(b['amountXIn'], 16),
-          amountY: new BN(b['amountY'], 16),
-          amountYIn: new BN(b['amountYIn'], 16),
-          feeAmountXPerTokenStored: new BN(b['feeAmountXPerTokenStored'], 16),
-          feeAmountYPerTokenStored: new BN(b['feeAmountYPerTokenStored'], 16),
-          liquiditySupply: new BN(b['liquiditySupply'], 16),
-          price: new BN(b['price'], 16),
-          rewardPerTokenStored: b['rewardPerTokenStored'].map(r => new BN(r, 16)),
-        })),
-      },
-    }));
-    const isPartialFill = req.body.isPartialFilled;
+  return runCpuTask(req, res, 'swapQuote');
+})
 
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    // const binArrays = await dlmm.getBinArrayForSwap(swapYtoX, 10); // TEMP SOLUTION
-    const quote = dlmm.swapQuote(swapAmount, swapYtoX, allowedSlippage, binArrays, isPartialFill);
-    return res.status(200).send(safeStringify(quote));
-  }
-  catch (error) {
-    console.log(error)
-    return res.status(400).send(error)
-  }
+app.post("/dlmm/swap-quote-ladder", async (req, res) => {
+  return runCpuTask(req, res, 'swapQuoteLadder');
 })
 
 app.post("/dlmm/swap", async (req, res) => {
@@ -360,7 +385,7 @@ app.post("/dlmm/swap", async (req, res) => {
     const binArraysPubkey = req.body.binArrays.map((bin: string) => new PublicKey(bin));
 
     const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const swap = await dlmm.swap({
       inToken,
       outToken,
@@ -381,7 +406,7 @@ app.post("/dlmm/swap", async (req, res) => {
 app.get("/dlmm/refetch-states", async (req, res) => {
   try {
     const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     await dlmm.refetchStates();
     return res.status(200).send("Refetched states successfully");
   }
@@ -393,27 +418,30 @@ app.get("/dlmm/refetch-states", async (req, res) => {
 
 app.get("/dlmm/get-bin-arrays", async (req, res) => {
   try {
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const binArray = (await dlmm.getBinArrays()).map(bin => ({
-      publicKey: bin.publicKey,
-      account: {
-        ...bin.account,
-        index: bin.account.index.toString('hex'),
-        bins: bin.account.bins.map(b => ({
-          amountX: b.amountX.toString('hex'),
-          amountXIn: b.amountXIn.toString('hex'),
-          amountY: b.amountY.toString('hex'),
-          amountYIn: b.amountYIn.toString('hex'),
-          feeAmountXPerTokenStored: b.feeAmountXPerTokenStored.toString('hex'),
-          feeAmountYPerTokenStored: b.feeAmountYPerTokenStored.toString('hex'),
-          liquiditySupply: b.liquiditySupply.toString('hex'),
-          price: b.price.toString('hex'),
-          rewardPerTokenStored: b.rewardPerTokenStored.map(r => r.toString('hex')),
-        })),
-      }
-    }));
-    return res.status(200).send(safeStringify(binArray));
+    const payload = await reads.do(readKey(req), async () => {
+      const poolAddress = req.pool;
+      const dlmm = await createDlmm(req, poolAddress);
+      const binArray = (await dlmm.getBinArrays()).map(bin => ({
+        publicKey: bin.publicKey,
+        account: {
+          ...bin.account,
+          index: bin.account.index.toString('hex'),
+          bins: bin.account.bins.map(b => ({
+            amountX: b.amountX.toString('hex'),
+            amountXIn: b.amountXIn.toString('hex'),
+            amountY: b.amountY.toString('hex'),
+            amountYIn: b.amountYIn.toString('hex'),
+            feeAmountXPerTokenStored: b.feeAmountXPerTokenStored.toString('hex'),
+            feeAmountYPerTokenStored: b.feeAmountYPerTokenStored.toString('hex'),
+            liquiditySupply: b.liquiditySupply.toString('hex'),
+            price: b.price.toString('hex'),
+            rewardPerTokenStored: b.rewardPerTokenStored.map(r => r.toString('hex')),
+          })),
+        }
+      }));
+      return serialize(req, binArray);
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -423,10 +451,13 @@ app.get("/dlmm/get-bin-arrays", async (req, res) => {
 
 app.get("/dlmm/get-fee-info", async (req, res) => {
   try {
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const feeInfo = dlmm.getFeeInfo();
-    return res.status(200).send(safeStringify(feeInfo));
+    const payload = await reads.do(readKey(req), async () => {
+      const poolAddress = req.pool;
+      const dlmm = await createDlmm(req, poolAddress);
+      const feeInfo = dlmm.getFeeInfo();
+      return serialize(req, feeInfo);
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -436,10 +467,13 @@ app.get("/dlmm/get-fee-info", async (req, res) => {
 
 app.get("/dlmm/get-dynamic-fee", async (req, res) => {
   try {
-    const poolAddress = req.pool;
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const dynamicFee = dlmm.getDynamicFee();
-    return res.status(200).send({ fee: dynamicFee.toString() });
+    const payload = await reads.do(readKey(req), async () => {
+      const poolAddress = req.pool;
+      const dlmm = await createDlmm(req, poolAddress);
+      const dynamicFee = dlmm.getDynamicFee();
+      return serialize(req, { fee: dynamicFee.toString() });
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -453,7 +487,7 @@ app.post("/dlmm/get-bin-id-from-price", async (req, res) => {
     const price = req.body.price;
     const min = Boolean(req.body.min);
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const binId = dlmm.getBinIdFromPrice(price, min);
     return res.status(200).send({ binId });
   }
@@ -469,9 +503,12 @@ app.post("/dlmm/get-bins-around-active-bin", async (req, res) => {
     const numberOfBinsToTheLeft = parseInt(req.body.numberOfBinsToTheLeft);
     const numberOfBinsToTheRight = parseInt(req.body.numberOfBinsToTheRight);
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const bins = await dlmm.getBinsAroundActiveBin(numberOfBinsToTheLeft, numberOfBinsToTheRight);
-    return res.status(200).send(safeStringify(bins));
+    const payload = await reads.do(readKey(req), async () => {
+      const dlmm = await createDlmm(req, poolAddress);
+      const bins = await dlmm.getBinsAroundActiveBin(numberOfBinsToTheLeft, numberOfBinsToTheRight);
+      return serialize(req, bins);
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -485,9 +522,12 @@ app.post("/dlmm/get-bins-between-min-and-max-price", async (req, res) => {
     const minPrice = req.body.minPrice;
     const maxPrice = req.body.maxPrice;
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const bins = await dlmm.getBinsBetweenMinAndMaxPrice(minPrice, maxPrice);
-    return res.status(200).send(safeStringify(bins));
+    const payload = await reads.do(readKey(req), async () => {
+      const dlmm = await createDlmm(req, poolAddress);
+      const bins = await dlmm.getBinsBetweenMinAndMaxPrice(minPrice, maxPrice);
+      return serialize(req, bins);
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -501,9 +541,12 @@ app.post("/dlmm/get-bins-between-lower-and-upper-bound", async (req, res) => {
     const lowerBound = parseInt(req.body.lowerBound);
     const upperBound = parseInt(req.body.upperBound);
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
-    const bins = await dlmm.getBinsBetweenLowerAndUpperBound(lowerBound, upperBound);
-    return res.status(200).send(safeStringify(bins));
+    const payload = await reads.do(readKey(req), async () => {
+      const dlmm = await createDlmm(req, poolAddress);
+      const bins = await dlmm.getBinsBetweenLowerAndUpperBound(lowerBound, upperBound);
+      return serialize(req, bins);
+    });
+    return res.status(200).send(payload);
   }
   catch (error) {
     console.log(error)
@@ -517,7 +560,7 @@ app.post("/dlmm/claim-lm-reward", async (req, res) => {
     const owner = new PublicKey(req.body.owner);
     const position = convertToPosition(req.body.position);
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const tx = await dlmm.claimLMReward({ owner, position });
     return res.status(200).send(safeStringify(tx));
   }
@@ -533,7 +576,7 @@ app.post("/dlmm/claim-all-lm-rewards", async (req, res) => {
     const owner = new PublicKey(req.body.owner);
     const positions = req.body.positions.map(convertToPosition);
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const tx = await dlmm.claimAllLMRewards({ owner, positions });
     return res.status(200).send(safeStringify(tx));
   }
@@ -549,7 +592,7 @@ app.post("/dlmm/claim-swap-fee", async (req, res) => {
     const owner = new PublicKey(req.body.owner);
     const position = convertToPosition(req.body.position);
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const tx = await dlmm.claimSwapFee({ owner, position });
     return res.status(200).send(safeStringify(tx));
   }
@@ -565,7 +608,7 @@ app.post("/dlmm/claim-all-swap-fee", async (req, res) => {
     const owner = new PublicKey(req.body.owner);
     const positions = req.body.positions.map(convertToPosition);
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const tx = await dlmm.claimAllSwapFee({ owner, positions });
     return res.status(200).send(safeStringify(tx));
   }
@@ -581,7 +624,7 @@ app.post("/dlmm/claim-all-rewards", async (req, res) => {
     const owner = new PublicKey(req.body.owner);
     const positions = req.body.positions.map(convertToPosition);
 
-    const dlmm = await DLMM.create(req.connect, poolAddress);
+    const dlmm = await createDlmm(req, poolAddress);
     const tx = await dlmm.claimAllRewards({ owner, positions });
     return res.status(200).send(safeStringify(tx));
   }
@@ -591,7 +634,38 @@ app.post("/dlmm/claim-all-rewards", async (req, res) => {
   }
 })
 
+// DLMM_SOCKET: listen on a Unix domain socket instead of TCP (co-located trader).
+// DLMM_TLS_CERT / DLMM_TLS_KEY: serve HTTPS on PORT (trader on another box).
+const socketPath = process.env.DLMM_SOCKET;
+const port = parseInt(process.env.PORT ?? '3000');
 
-app.listen(3000, () => {
-  console.log('Server is running on http://localhost:3000');
-});
\ No newline at end of file
+if (socketPath) {
+  if (fs.existsSync(socketPath)) {
+    fs.unlinkSync(socketPath);
+  }
+  const server = app.listen(socketPath, () => {
+    console.log(`Server is running on unix://${socketPath}`);
+  });
+  const cleanup = () => {
+    server.close();
+    if (fs.existsSync(socketPath)) {
+      fs.unlinkSync(socketPath);
+    }
+    process.exit(0);
+  };
+  process.on('SIGINT', cleanup);
+  process.on('SIGTERM', cleanup);
+}
+else if (process.env.DLMM_TLS_CERT && process.env.DLMM_TLS_KEY) {
+  https.createServer({
+    cert: fs.readFileSync(process.env.DLMM_TLS_CERT),
+    key: fs.readFileSync(process.env.DLMM_TLS_KEY),
+  }, app).listen(port, () => {
+    console.log(`Server is running on https://localhost:${port}`);
+  });
+}
+else {
+  app.listen(port, () => {
+    console.log(`Server is running on http://localhost:${port}`);
+  });
+}
\ No newline at end of file
@@ -0,0 +1,191 @@
+import { Request, Response, NextFunction } from "express";
+import { monitorEventLoopDelay, IntervalHistogram } from "perf_hooks";
+import { SingleFlight } from "./singleFlight";
+
+const LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30];
+
+class Histogram {
+  public counts: number[] = new Array(LATENCY_BUCKETS.length + 1).fill(0);
+  public sum = 0;
+  public count = 0;
+
+  public observe(value: number) {
+    let i = 0;
+    while (i < LATENCY_BUCKETS.length && value > LATENCY_BUCKETS[i]) i++;
+    this.counts[i]++;
+    this.sum += value;
+    this.count++;
+  }
+
+  public lines(name: string, labels: string): string[] {
+    const lines: string[] = [];
+    let cumulative = 0;
+    LATENCY_BUCKETS.forEach((bound, i) => {
+      cumulative += this.counts[i];
+      lines.push(`${name}_bucket{${labels},le="${bound}"} ${cumulative}`);
+    });
+    lines.push(`${name}_bucket{${labels},le="+Inf"} ${this.count}`);
+    lines.push(`${name}_sum{${labels}} ${this.sum.toFixed(6)}`);
+    lines.push(`${name}_count{${labels}} ${this.count}`);
+    return lines;
+  }
+}
+
+/**
+ * Methods of a JSON-RPC request body, single or batched.
+ */
+export function rpcMethods(body: any): string[] {
+  try {
+    const parsed = JSON.parse(body ?? "{}");
+    return (Array.isArray(parsed) ? parsed : [parsed]).map((call) => call.method ?? "unknown");
+  } catch (error) {
+    return ["unknown"];
+  }
+}
+
+const label = (value: string) => value.replace(/\\/g, "\\\\").replace(/"/g, '\\"');
+
+/**
+ * Route of a request for labels: the matched route pattern, so that unknown paths cannot blow up the
+ * number of series.
+ */
+export const routeOf = (req: Request): string => req.route?.path ?? "unmatched";
+
+/**
+ * Server metrics in the Prometheus text format: latency histograms and errors per route, requests in
+ * flight, upstream RPC calls per route and method, SingleFlight hit ratios and event-loop lag.
+ */
+export class ServerMetrics {
+  private latency = new Map<string, Histogram>();
+  private errors = new Map<string, number>();
+  private rpcCalls = new Map<string, number>();
+  private caches = new Map<string, SingleFlight>();
+  private loopDelay: IntervalHistogram;
+  public inFlight = 0;
+
+  constructor(loopResolutionMs: number = 20) {
+    this.loopDelay = monitorEventLoopDelay({ resolution: loopResolutionMs });
+    this.loopDelay.enable();
+  }
+
+  /**
+   * Times every request from arrival until its response is finished or the connection closes.
+   */
+  public middleware() {
+    return (req: Request, res: Response, next: NextFunction) => {
+      const start = process.hrtime.bigint();
+      this.inFlight++;
+      let done = false;
+      const finish = () => {
+        if (done) return;
+        done = true;
+        this.inFlight--;
+        const route = `${req.method} ${routeOf(req)}`;
+        const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+        if (!this.latency.has(route)) this.latency.set(route, new Histogram());
+        this.latency.get(route)!.observe(seconds);
+        if (res.statusCode >= 400) this.errors.set(route, (this.errors.get(route) ?? 0) + 1);
+      };
+      res.on("finish", finish);
+      res.on("close", finish);
+      next();
+    };
+  }
+
+  /**
+   * A web3.js `fetchMiddleware` counting the JSON-RPC calls made while serving `req`, by method. A
+   * string labels calls made outside any request, e.g. `position-index`.
+   */
+  public rpcCounter(req: Request | string) {
+    return (info: any, init: any, fetch: (...args: any[]) => void) => {
+      const route = typeof req === "string" ? req : `${req.method} ${routeOf(req)}`;
+      for (const method of rpcMethods(init?.body)) {
+        this.countRpcCall(route, method, 1);
+      }
+      fetch(info, init);
+    };
+  }
+
+  /**
+   * Count calls made for `req` elsewhere, e.g. by a worker thread with its own Connection.
+   */
+  public addRpcCalls(req: Request, calls: Record<string, number>) {
+    const route = `${req.method} ${routeOf(req)}`;
+    for (const [method, count] of Object.entries(calls ?? {})) {
+      this.countRpcCall(route, method, count);
+    }
+  }
+
+  private countRpcCall(route: string, method: string, count: number) {
+    const key = `${route}|${method}`;
+    this.rpcCalls.set(key, (this.rpcCalls.get(key) ?? 0) + count);
+  }
+
+  public trackCache(name: string, cache: SingleFlight) {
+    this.caches.set(name, cache);
+  }
+
+  public render(): string {
+    const lines: string[] = [];
+    lines.push("# TYPE dlmm_http_request_duration_seconds histogram");
+    for (const [route, histogram] of this.latency) {
+      lines.push(...histogram.lines("dlmm_http_request_duration_seconds", `route="${label(route)}"`));
+    }
+    lines.push("# TYPE dlmm_http_request_errors_total counter");
+    for (const [route, count] of this.errors) {
+      lines.push(`dlmm_http_request_errors_total{route="${label(route)}"} ${count}`);
+    }
+    lines.push("# TYPE dlmm_http_requests_in_flight gauge");
+    lines.push(`dlmm_http_requests_in_flight ${this.inFlight}`);
+
+    lines.push("# TYPE dlmm_rpc_calls_total counter");
+    for (const [key, count] of this.rpcCalls) {
+      const [route, method] = key.split("|");
+      lines.push(`dlmm_rpc_calls_total{route="${label(route)}",method="${label(method)}"} ${count}`);
+    }
+
+    // Each family's TYPE line is followed by all of its samples.
+    const cacheFamilies: [string, string, (cache: SingleFlight) => string | number][] = [
+      ["dlmm_read_cache_hits_total", "counter", (cache) => cache.hits],
+      ["dlmm_read_cache_misses_total", "counter", (cache) => cache.misses],
+      ["dlmm_read_cache_coalesced_total", "counter", (cache) => cache.coalesced],
+      ["dlmm_read_cache_hit_ratio", "gauge", (cache) => {
+        const served = cache.hits + cache.coalesced;
+        const total = served + cache.misses;
+        return total ? (served / total).toFixed(4) : 0;
+      }],
+    ];
+    for (const [family, type, value] of cacheFamilies) {
+      lines.push(`# TYPE ${family} ${type}`);
+      for (const [name, cache] of this.caches) {
+        lines.push(`${family}{cache="${name}"} ${value(cache)}`);
+      }
+    }
+
+    // monitorEventLoopDelay reports nanoseconds.
+    lines.push("# TYPE nodejs_eventloop_lag_seconds gauge");
+    for (const quantile of [50, 90, 99]) {
+      lines.push(`nodejs_eventloop_lag_seconds{quantile="${quantile / 100}"} ${(this.loopDelay.percentile(quantile) / 1e9).toFixed(6)}`);
+    }
+    lines.push("# TYPE nodejs_eventloop_lag_max_seconds gauge");
+    lines.push(`nodejs_eventloop_lag_max_seconds ${(this.loopDelay.max / 1e9).toFixed(6)}`);
+    return lines.join("\n") + "\n";
+  }
+}
+
+/**
+ * Log a sample of requests: a fraction `sampleRate` of them, with their body (cut to `maxBodyLength`
+ * characters) when `logBody` is set. Off by default.
+ */
+export function requestLogger(sampleRate: number, logBody: boolean, maxBodyLength: number = 2048) {
+  return (req: Request, res: Response, next: NextFunction) => {
+    if (sampleRate > 0 && Math.random() < sampleRate) {
+      console.log(req.method, req.url);
+      if (logBody && req.body !== undefined) {
+        const body = JSON.stringify(req.body);
+        console.log(body.length > maxBodyLength ? `${body.slice(0, maxBodyLength)}... (${body.length} chars)` : body);
+      }
+    }
+    next();
+  };
+}
@@ -0,0 +1,97 @@
+import { createHash } from 'crypto';
+import { LbPosition } from '../dlmm/types';
+import { safeStringify } from './utils';
+
+type Tracked = {
+  // Slot at which tracking started; older cursors cannot be answered with a delta.
+  createdSlot: number;
+  positions: Map<string, { fingerprint: string; changedSlot: number }>;
+  closed: Map<string, number>;
+  lastUsedAt: number;
+};
+
+export type PositionDelta = {
+  // True when `userPositions` is the full set and the caller should replace its state.
+  full: boolean;
+  userPositions: LbPosition[];
+  closedPositions: string[];
+  slot: number;
+};
+
+/**
+ * Remembers a fingerprint of every position served per (rpc, pool, user) and the slot at which it
+ * last changed. A position's data covers both its own account and the bins it spans, so a change to
+ * either shows up as a new fingerprint. `delta` then returns only what changed since a cursor slot.
+ *
+ * Positions observed in the same slot as the cursor are returned again: delivery is at-least-once.
+ * A closed position is forgotten once a read's cursor is past the slot it closed at, and keys nobody
+ * read for `idleMs` are dropped, their next read answered with the full set.
+ */
+export class PositionChanges {
+  // In order of last use, least recent first.
+  private tracked = new Map<string, Tracked>();
+
+  constructor(private maxEntries: number = 1000, private idleMs: number = 10 * 60_000) { }
+
+  public get size() {
+    return this.tracked.size;
+  }
+
+  public delta(key: string, slot: number, sinceSlot: number, positions: LbPosition[]): PositionDelta {
+    const now = Date.now();
+    let tracked = this.tracked.get(key);
+    if (tracked) {
+      this.tracked.delete(key);
+    } else {
+      tracked = { createdSlot: slot, positions: new Map(), closed: new Map(), lastUsedAt: now };
+    }
+    tracked.lastUsedAt = now;
+    this.tracked.set(key, tracked);
+    this.evict(now);
+
+    const seen = new Set<string>();
+    for (const position of positions) {
+      const address = position.publicKey.toBase58();
+      const fingerprint = createHash('sha1')
+        .update(safeStringify(position.positionData))
+        .digest('hex');
+      seen.add(address);
+      tracked.closed.delete(address);
+      const previous = tracked.positions.get(address);
+      if (!previous || previous.fingerprint !== fingerprint) {
+        tracked.positions.set(address, { fingerprint, changedSlot: slot });
+      }
+    }
+    tracked.positions.forEach((_, address) => {
+      if (!seen.has(address)) {
+        tracked.positions.delete(address);
+        tracked.closed.set(address, slot);
+      }
+    });
+
+    if (sinceSlot < tracked.createdSlot) {
+      return { full: true, userPositions: positions, closedPositions: [], slot };
+    }
+
+    const closedPositions: string[] = [];
+    tracked.closed.forEach((closedSlot, address) => {
+      if (closedSlot >= sinceSlot) closedPositions.push(address);
+      else tracked.closed.delete(address);
+    });
+    return {
+      full: false,
+      userPositions: positions.filter(
+        (p) => tracked.positions.get(p.publicKey.toBase58()).changedSlot >= sinceSlot
+      ),
+      closedPositions,
+      slot,
+    };
+  }
+
+  private evict(now: number) {
+    for (const [key, tracked] of this.tracked) {
+      if (this.tracked.size <= this.maxEntries && now - tracked.lastUsedAt <= this.idleMs) break;
+      this.tracked.delete(key);
+    }
+  }
+}
@@ -0,0 +1,243 @@
+import { Commitment, Connection, FetchMiddleware, PublicKey } from '@solana/web3.js';
+import { BorshAccountsCoder } from '@coral-xyz/anchor';
+import { bs58 } from '@coral-xyz/anchor/dist/cjs/utils/bytes';
+import { DLMM } from '../dlmm';
+import { IDL } from '../dlmm/idl';
+import { PositionV2 } from '../dlmm/types';
+
+type IndexedPosition = { publicKey: PublicKey; account: PositionV2 };
+
+type Entry = {
+  rpc: string;
+  // Known from the first read; an entry created by `expect` has none until then.
+  programId: PublicKey | null;
+  pool: PublicKey;
+  user: PublicKey;
+  positions: Map<string, IndexedPosition>;
+  subscriptions: Map<string, number>;
+  // Set when the account set may be out of date (first read, failed scan) and a scan is due.
+  stale: boolean;
+  // Positions being opened that no read has found yet, with the time to give up on each.
+  pending: Map<string, number>;
+  scanning: Promise<void> | null;
+  lastScanAt: number;
+  lastUsedAt: number;
+};
+
+const coder = new BorshAccountsCoder(IDL);
+
+/**
+ * Keeps the position accounts of each (rpc, pool, user) in memory so position reads do not run a
+ * `getProgramAccounts` scan every time. An entry is seeded with one scan, then each known position
+ * account is followed with `onAccountChange`; closed positions drop out as soon as their account is
+ * emptied. New positions are picked up by a reconcile scan every `reconcileMs`; a position announced
+ * with `expect` is fetched directly on every read until it exists or `pendingMs` have passed, since a
+ * scan that lands before its account is finalized misses it. Entries nobody read for `idleMs` are
+ * unsubscribed and dropped.
+ */
+export class PositionIndex {
+  private entries = new Map<string, Entry>();
+  private connections = new Map<string, Connection>();
+  private timer: NodeJS.Timeout;
+
+  public scans = 0;
+  public updates = 0;
+
+  constructor(
+    private reconcileMs: number = 60_000,
+    private idleMs: number = 10 * 60_000,
+    private commitment: Commitment = 'finalized',
+    private pendingMs: number = 2 * 60_000,
+    private fetchMiddleware?: FetchMiddleware
+  ) {
+    this.timer = setInterval(() => this.sweep(), Math.min(reconcileMs, idleMs));
+    this.timer.unref();
+  }
+
+  /**
+   * Position accounts of `user` in the pool of `dlmm`, from memory once the entry is seeded.
+   */
+  public async get(rpc: string, dlmm: DLMM, user: PublicKey): Promise<IndexedPosition[]> {
+    const entry = this.entry(rpc, dlmm.pubkey, user);
+    entry.programId = dlmm.program.programId;
+    entry.lastUsedAt = Date.now();
+    if (entry.stale) {
+      await this.scan(entry);
+    }
+    if (entry.pending.size) {
+      await this.fetchPending(entry);
+    }
+    return Array.from(entry.positions.values());
+  }
+
+  /**
+   * Announce a position about to be opened, e.g. when building its transaction, so reads look it up
+   * directly until it exists instead of waiting for the next reconcile scan.
+   */
+  public expect(rpc: string, pool: PublicKey, user: PublicKey, position: PublicKey) {
+    const entry = this.entry(rpc, pool, user);
+    entry.pending.set(position.toBase58(), Date.now() + this.pendingMs);
+  }
+
+  public get size() {
+    return this.entries.size;
+  }
+
+  public close() {
+    clearInterval(this.timer);
+    this.entries.forEach((entry) => this.drop(entry));
+    this.entries.clear();
+  }
+
+  private key(rpc: string, pool: PublicKey, user: PublicKey) {
+    return [rpc, pool.toBase58(), user.toBase58()].join('|');
+  }
+
+  private connection(rpc: string) {
+    let connection = this.connections.get(rpc);
+    if (!connection) {
+      connection = new Connection(rpc, { commitment: this.commitment, fetchMiddleware: this.fetchMiddleware });
+      this.connections.set(rpc, connection);
+    }
+    return connection;
+  }
+
+  private entry(rpc: string, pool: PublicKey, user: PublicKey): Entry {
+    const key = this.key(rpc, pool, user);
+    let entry = this.entries.get(key);
+    if (!entry) {
+      entry = {
+        rpc,
+        programId: null,
+        pool,
+        user,
+        positions: new Map(),
+        subscriptions: new Map(),
+        stale: true,
+        pending: new Map(),
+        scanning: null,
+        lastScanAt: 0,
+        lastUsedAt: Date.now(),
+      };
+      this.entries.set(key, entry);
+    }
+    return entry;
+  }
+
+  private scan(entry: Entry): Promise<void> {
+    if (!entry.scanning) {
+      entry.scanning = this.doScan(entry).finally(() => {
+        entry.scanning = null;
+      });
+    }
+    return entry.scanning;
+  }
+
+  private async doScan(entry: Entry) {
+    // Positions added while the scan is in flight, e.g. by `fetchPending`, are not in its result.
+    const known = new Set(entry.positions.keys());
+    const accounts = await this.connection(entry.rpc).getProgramAccounts(entry.programId, {
+      filters: [
+        { memcmp: coder.memcmp('positionV2') },
+        { memcmp: { bytes: bs58.encode(entry.pool.toBuffer()), offset: 8 } },
+        { memcmp: { bytes: bs58.encode(entry.user.toBuffer()), offset: 8 + 32 } },
+      ],
+    });
+    this.scans++;
+
+    const seen = new Set<string>();
+    for (const { pubkey, account } of accounts) {
+      const address = pubkey.toBase58();
+      seen.add(address);
+      this.track(entry, pubkey, account.data);
+    }
+    // Positions closed while a subscription was missed.
+    known.forEach((address) => {
+      if (!seen.has(address)) this.forget(entry, address);
+    });
+
+    entry.stale = false;
+    entry.lastScanAt = Date.now();
+  }
+
+  private async fetchPending(entry: Entry) {
+    const now = Date.now();
+    entry.pending.forEach((expiresAt, address) => {
+      if (entry.positions.has(address) || now >= expiresAt) entry.pending.delete(address);
+    });
+    if (!entry.pending.size) return;
+
+    const pubkeys = Array.from(entry.pending.keys()).map((address) => new PublicKey(address));
+    const infos = await this.connection(entry.rpc).getMultipleAccountsInfo(pubkeys);
+    infos.forEach((info, i) => {
+      if (!info || info.data.length === 0 || !info.owner.equals(entry.programId)) return;
+      try {
+        this.track(entry, pubkeys[i], info.data);
+      } catch (error) {
+        // Not a position; it stays pending until it expires.
+      }
+    });
+  }
+
+  private track(entry: Entry, pubkey: PublicKey, data: Buffer) {
+    const address = pubkey.toBase58();
+    entry.positions.set(address, {
+      publicKey: pubkey,
+      account: coder.decode('positionV2', data),
+    });
+    entry.pending.delete(address);
+    if (!entry.subscriptions.has(address)) {
+      entry.subscriptions.set(address, this.subscribe(entry, pubkey));
+    }
+  }
+
+  private subscribe(entry: Entry, pubkey: PublicKey): number {
+    const address = pubkey.toBase58();
+    return this.connection(entry.rpc).onAccountChange(pubkey, (info) => {
+      this.updates++;
+      if (info.data.length === 0 || info.lamports === 0) {
+        this.forget(entry, address);
+        return;
+      }
+      try {
+        entry.positions.set(address, {
+          publicKey: pubkey,
+          account: coder.decode('positionV2', info.data),
+        });
+      } catch (error) {
+        // Not a position any more; let the next scan sort it out.
+        entry.stale = true;
+      }
+    }, this.commitment);
+  }
+
+  private forget(entry: Entry, address: string) {
+    entry.positions.delete(address);
+    const id = entry.subscriptions.get(address);
+    if (id !== undefined) {
+      entry.subscriptions.delete(address);
+      this.connection(entry.rpc).removeAccountChangeListener(id).catch(() => { });
+    }
+  }
+
+  private drop(entry: Entry) {
+    Array.from(entry.subscriptions.keys()).forEach((address) => this.forget(entry, address));
+  }
+
+  private sweep() {
+    const now = Date.now();
+    this.entries.forEach((entry, key) => {
+      if (now - entry.lastUsedAt > this.idleMs) {
+        this.drop(entry);
+        this.entries.delete(key);
+        return;
+      }
+      if (entry.programId && now - entry.lastScanAt >= this.reconcileMs) {
+        this.scan(entry).catch((error) => {
+          console.log(error);
+          entry.stale = true;
+        });
+      }
+    });
+  }
+}
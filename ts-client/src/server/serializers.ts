@@ -0,0 +1,79 @@
+import { DLMM } from '../dlmm';
+import { LbPair, TokenReserve } from '../dlmm/types';
+
+/**
+ * Purpose-built projections of SDK objects. They emit only what the Python `types.LBPair` and
+ * `types.TokenReserve` read, instead of walking the whole DLMM instance (program, connection, IDL)
+ * with `safeStringify`.
+ */
+export const projectLbPair = (lbPair: LbPair) => ({
+  bumpSeed: lbPair.bumpSeed,
+  binStepSeed: lbPair.binStepSeed,
+  pairType: lbPair.pairType,
+  activeId: lbPair.activeId,
+  binStep: lbPair.binStep,
+  status: lbPair.status,
+  requireBaseFactorSeed: lbPair.requireBaseFactorSeed,
+  baseFactorSeed: lbPair.baseFactorSeed,
+  tokenXMint: lbPair.tokenXMint.toBase58(),
+  tokenYMint: lbPair.tokenYMint.toBase58(),
+  padding1: lbPair.padding1,
+  padding2: lbPair.padding2,
+  baseKey: lbPair.baseKey.toBase58(),
+});
+
+export const projectTokenReserve = (token: TokenReserve) => ({
+  publicKey: token.publicKey.toBase58(),
+  reserve: token.reserve.toBase58(),
+  amount: token.amount.toString(),
+  decimal: token.decimal,
+});
+
+export const projectDlmm = (dlmm: DLMM) => ({
+  publicKey: dlmm.pubkey.toBase58(),
+  lbPair: projectLbPair(dlmm.lbPair),
+  tokenX: projectTokenReserve(dlmm.tokenX),
+  tokenY: projectTokenReserve(dlmm.tokenY),
+});
+
+/**
+ * Keep only the requested fields of a response. `fields` is the raw `?fields=` query value: a
+ * comma separated list of dotted paths, e.g. `activeBin.binId,userPositions.publicKey`. Arrays are
+ * projected element-wise. Without `fields` the value is returned untouched.
+ */
+export function selectFields(value: any, fields?: string | string[]): any {
+  if (!fields) return value;
+  const paths = (Array.isArray(fields) ? fields.join(',') : fields)
+    .split(',')
+    .map((f) => f.trim())
+    .filter((f) => f.length > 0)
+    .map((f) => f.split('.'));
+  if (!paths.length) return value;
+  return pick(value, paths);
+}
+
+function pick(value: any, paths: string[][]): any {
+  if (Array.isArray(value)) {
+    return value.map((item) => pick(item, paths));
+  }
+  if (typeof value !== 'object' || value === null) {
+    return value;
+  }
+
+  const grouped = new Map<string, string[][]>();
+  for (const [head, ...rest] of paths) {
+    if (!(head in value)) continue;
+    const children = grouped.get(head) ?? [];
+    children.push(rest);
+    grouped.set(head, children);
+  }
+
+  const result: Record<string, any> = {};
+  grouped.forEach((children, key) => {
+    // A bare key keeps the whole subtree even if deeper paths were also requested.
+    result[key] = children.some((c) => c.length === 0)
+      ? value[key]
+      : pick(value[key], children);
+  });
+  return result;
+}
@@ -0,0 +1,72 @@
+import { createHash } from "crypto";
+import { Request } from "express";
+
+type CachedResult = {
+  payload: string;
+  expiresAt: number;
+};
+
+/**
+ * Deduplicates identical concurrent reads: callers asking for the same key while an upstream
+ * call is in flight share its result instead of starting their own RPC fan-out. With a positive
+ * `ttlMs` the serialized result is also kept for that long.
+ */
+export class SingleFlight {
+  private inFlight = new Map<string, Promise<string>>();
+  private results = new Map<string, CachedResult>();
+
+  public hits = 0;
+  public misses = 0;
+  public coalesced = 0;
+
+  constructor(private ttlMs: number = 0, private maxEntries: number = 1000) { }
+
+  public async do(key: string, fn: () => Promise<string>): Promise<string> {
+    if (this.ttlMs > 0) {
+      const cached = this.results.get(key);
+      if (cached && cached.expiresAt > Date.now()) {
+        this.hits++;
+        return cached.payload;
+      }
+      this.results.delete(key);
+    }
+
+    const pending = this.inFlight.get(key);
+    if (pending) {
+      this.coalesced++;
+      return pending;
+    }
+
+    this.misses++;
+    const call = fn()
+      .then((payload) => {
+        if (this.ttlMs > 0) {
+          if (this.results.size >= this.maxEntries) {
+            const oldest = this.results.keys().next().value;
+            this.results.delete(oldest);
+          }
+          this.results.set(key, { payload, expiresAt: Date.now() + this.ttlMs });
+        }
+        return payload;
+      })
+      .finally(() => {
+        this.inFlight.delete(key);
+      });
+    this.inFlight.set(key, call);
+    return call;
+  }
+
+  public clear() {
+    this.results.clear();
+  }
+}
+
+/**
+ * Key of a read request: route (with its query, e.g. `fields=`), pool, rpc and a hash of the body.
+ */
+export function readKey(req: Request): string {
+  const bodyHash = createHash("sha1")
+    .update(JSON.stringify(req.body ?? {}))
+    .digest("hex");
+  return [req.url, req.pool.toBase58(), req.rpc, bodyHash].join("|");
+}
@@ -0,0 +1,85 @@
+import { Connection, PublicKey } from '@solana/web3.js';
+import { BN } from 'bn.js';
+import { DLMM } from '../dlmm';
+import { BinArrayAccount } from '../dlmm/types';
+import { safeStringify } from './utils';
+
+/**
+ * CPU-heavy route handlers. They only depend on the rpc, the pool and the request body so they can
+ * run either on the main event loop or inside a worker thread, and they return the serialized
+ * response body.
+ */
+export type Task = (connect: Connection, pool: PublicKey, body: any) => Promise<string>;
+
+export const parseBinArrays = (rawBinArrays: any[]): BinArrayAccount[] => rawBinArrays.map(bin => ({
+  publicKey: new PublicKey(bin['publicKey']),
+  account: {
+    ...bin['account'],
+    index: new BN(bin['account']['index'], 16),
+    lbPair: new PublicKey(bin['account']['lbPair']),
+    bins: bin['account']['bins'].map(b => ({
+      amountX: new BN(b['amountX'], 16),
+      amountXIn: new BN(b['amountXIn'], 16),
+      amountY: new BN(b['amountY'], 16),
+      amountYIn: new BN(b['amountYIn'], 16),
+      feeAmountXPerTokenStored: new BN(b['feeAmountXPerTokenStored'], 16),
+      feeAmountYPerTokenStored: new BN(b['feeAmountYPerTokenStored'], 16),
+      liquiditySupply: new BN(b['liquiditySupply'], 16),
+      price: new BN(b['price'], 16),
+      rewardPerTokenStored: b['rewardPerTokenStored'].map(r => new BN(r, 16)),
+    })),
+  },
+}));
+
+const toStrategyData = (body: any) => ({
+  positionPubKey: new PublicKey(body.positionPubKey),
+  user: new PublicKey(body.userPublicKey),
+  totalXAmount: new BN(body.totalXAmount),
+  totalYAmount: new BN(body.totalYAmount),
+  strategy: {
+    maxBinId: body.maxBinId,
+    minBinId: body.minBinId,
+    strategyType: parseInt(body.strategyType)
+  }
+});
+
+export const swapQuote: Task = async (connect, pool, body) => {
+  const swapYtoX = body.swapYToX;
+  const swapAmount = new BN(body.amount);
+  const allowedSlippage = new BN(body.allowedSlippage);
+  const binArrays = parseBinArrays(body.binArrays);
+  const isPartialFill = body.isPartialFilled;
+
+  const dlmm = await DLMM.create(connect, pool);
+  const quote = dlmm.swapQuote(swapAmount, swapYtoX, allowedSlippage, binArrays, isPartialFill);
+  return safeStringify(quote);
+};
+
+export const swapQuoteLadder: Task = async (connect, pool, body) => {
+  const swapYtoX = body.swapYToX;
+  const amounts = (body.amounts as any[]).map((amount) => new BN(amount));
+  const binArrays = parseBinArrays(body.binArrays);
+
+  const dlmm = await DLMM.create(connect, pool);
+  const ladder = dlmm.swapQuoteLadder(amounts, swapYtoX, binArrays);
+  return safeStringify(ladder);
+};
+
+export const initializePositionAndAddLiquidityByStrategy: Task = async (connect, pool, body) => {
+  const dlmm = await DLMM.create(connect, pool);
+  const position = await dlmm.initializePositionAndAddLiquidityByStrategy(toStrategyData(body));
+  return safeStringify(position);
+};
+
+export const addLiquidityByStrategy: Task = async (connect, pool, body) => {
+  const dlmm = await DLMM.create(connect, pool);
+  const position = await dlmm.addLiquidityByStrategy(toStrategyData(body));
+  return safeStringify(position);
+};
+
+export const TASKS: Record<string, Task> = {
+  swapQuote,
+  swapQuoteLadder,
+  initializePositionAndAddLiquidityByStrategy,
+  addLiquidityByStrategy,
+};
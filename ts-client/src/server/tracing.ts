@@ -0,0 +1,101 @@
+import { Request, Response, NextFunction } from "express";
+import { performance } from "perf_hooks";
+import { rpcMethods } from "./metrics";
+
+/** Trace id sent by the client; requests without it are not traced. */
+export const TRACE_HEADER = "x-trace-id";
+/** Spans recorded while serving a traced request, returned to the client as JSON. */
+export const SPANS_HEADER = "x-trace-spans";
+
+// Keeps the spans header well under common header size limits.
+const MAX_SPANS = 200;
+
+type Span = {
+  name: string;
+  ts: number;
+  dur: number;
+  lane: number;
+};
+
+const nowUs = () => Math.round((performance.timeOrigin + performance.now()) * 1000);
+
+/**
+ * Spans of one traced request, timestamped in microseconds since the epoch. Overlapping spans, e.g.
+ * RPC calls issued with Promise.all, get separate lanes so they can be drawn side by side.
+ */
+export class Trace {
+  public spans: Span[] = [];
+  public dropped = 0;
+  private lanes: boolean[] = [];
+
+  constructor(public id: string) { }
+
+  /** Open a span; the returned function closes it. */
+  public start(name: string): () => void {
+    let lane = this.lanes.indexOf(false);
+    if (lane < 0) {
+      lane = this.lanes.length;
+      this.lanes.push(true);
+    } else {
+      this.lanes[lane] = true;
+    }
+    const ts = nowUs();
+    let open = true;
+    return () => {
+      if (!open) return;
+      open = false;
+      this.lanes[lane] = false;
+      if (this.spans.length < MAX_SPANS) {
+        this.spans.push({ name, ts, dur: nowUs() - ts, lane });
+      } else {
+        this.dropped++;
+      }
+    };
+  }
+}
+
+/**
+ * Run `fn` inside a span of `trace`, or just run it when the request is not traced.
+ */
+export async function traced<T>(trace: Trace | undefined, name: string, fn: () => Promise<T>): Promise<T> {
+  if (!trace) return fn();
+  const end = trace.start(name);
+  try {
+    return await fn();
+  } finally {
+    end();
+  }
+}
+
+/**
+ * A `fetch` for web3.js Connections recording one span per JSON-RPC request, named after its method(s).
+ */
+export function tracedFetch(trace: Trace) {
+  const fetch = (globalThis as any).fetch;
+  return (info: any, init: any) =>
+    traced(trace, `rpc ${rpcMethods(init?.body).join(",")}`, () => fetch(info, init));
+}
+
+/**
+ * Starts a trace for requests carrying the trace header. The spans recorded until the response head
+ * is written, starting with one for the whole route, are returned in the spans header.
+ */
+export function tracing() {
+  return (req: Request, res: Response, next: NextFunction) => {
+    const id = req.headers[TRACE_HEADER];
+    if (typeof id !== "string" || !/^[0-9a-f]{1,64}$/.test(id)) return next();
+
+    const trace = new Trace(id);
+    req.trace = trace;
+    const start = nowUs();
+    const writeHead = res.writeHead;
+    res.writeHead = function (this: Response, ...args: any[]) {
+      trace.spans.unshift({ name: `${req.method} ${req.route?.path ?? req.path}`, ts: start, dur: nowUs() - start, lane: 0 });
+      // The route span sits on lane 0; move the others below it.
+      for (const span of trace.spans.slice(1)) span.lane++;
+      res.setHeader(SPANS_HEADER, JSON.stringify({ pid: process.pid, dropped: trace.dropped, spans: trace.spans }));
+      return writeHead.apply(this, args as any);
+    } as any;
+    next();
+  };
+}
@@ -18,4 +18,20 @@ export const convertToPosition = (rawPosition: any): LbPosition => {
           totalClaimedFeeYAmount: new BN(rawPosition.positionData.totalClaimedFeeYAmount, 16),
         },
       }
-}
\ No newline at end of file
+}
+
+export function safeStringify(obj: Record<string, any>): string {
+  const seen = new WeakSet();
+  return JSON.stringify(obj, (key, value) => {
+    if (typeof value === "bigint") {
+      return value.toString();
+    }
+    if (typeof value === "object" && value !== null) {
+      if (seen.has(value)) {
+        return;
+      }
+      seen.add(value);
+    }
+    return value;
+  });
+}
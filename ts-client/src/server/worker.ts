@@ -0,0 +1,68 @@
+import { Connection, PublicKey } from '@solana/web3.js';
+import { AsyncLocalStorage } from 'async_hooks';
+import { parentPort } from 'worker_threads';
+import { TASKS } from './tasks';
+import { rpcMethods } from './metrics';
+
+export type WorkerRequest = {
+  id: number;
+  task: string;
+  rpc: string;
+  pool: string;
+  body: any;
+};
+
+export type WorkerResponse = {
+  id: number;
+  payload?: string;
+  error?: Record<string, any>;
+  // JSON-RPC calls the task made, by method.
+  rpcCalls: Record<string, number>;
+};
+
+const connections = new Map<string, Connection>();
+// Tasks run concurrently on a shared Connection; each counts its own calls.
+const taskCalls = new AsyncLocalStorage<Record<string, number>>();
+
+const countCalls = (info: any, init: any, fetch: (...args: any[]) => void) => {
+  const calls = taskCalls.getStore();
+  if (calls) {
+    for (const method of rpcMethods(init?.body)) {
+      calls[method] = (calls[method] ?? 0) + 1;
+    }
+  }
+  fetch(info, init);
+};
+
+const getConnection = (rpc: string) => {
+  let connection = connections.get(rpc);
+  if (!connection) {
+    connection = new Connection(rpc, { commitment: 'finalized', fetchMiddleware: countCalls });
+    connections.set(rpc, connection);
+  }
+  return connection;
+};
+
+const serializeError = (error: any): Record<string, any> => {
+  if (error instanceof Error) {
+    return { ...error, name: error.name, message: error.message };
+  }
+  return { message: String(error) };
+};
+
+parentPort?.on('message', async ({ id, task, rpc, pool, body }: WorkerRequest) => {
+  let response: WorkerResponse;
+  const rpcCalls: Record<string, number> = {};
+  try {
+    const run = TASKS[task];
+    if (!run) {
+      throw new Error(`Unknown task ${task}`);
+    }
+    const payload = await taskCalls.run(rpcCalls, () => run(getConnection(rpc), new PublicKey(pool), body));
+    response = { id, payload, rpcCalls };
+  }
+  catch (error) {
+    response = { id, error: serializeError(error), rpcCalls };
+  }
+  parentPort?.postMessage(response);
+});
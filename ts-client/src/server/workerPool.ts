@@ -0,0 +1,135 @@
+import path from 'path';
+import { Worker } from 'worker_threads';
+import type { WorkerRequest, WorkerResponse } from './worker';
+
+type Job = {
+  request: WorkerRequest;
+  resolve: (payload: string) => void;
+  reject: (error: any) => void;
+  onRpcCalls?: (calls: Record<string, number>) => void;
+};
+
+type PoolWorker = {
+  worker: Worker;
+  running: Map<number, Job>;
+};
+
+export class QueueFullError extends Error {
+  constructor(queueSize: number) {
+    super(`Worker queue is full (${queueSize} tasks waiting)`);
+    this.name = 'QueueFullError';
+  }
+}
+
+/**
+ * Fixed-size pool of worker threads for the CPU-heavy routes. Each worker runs up to
+ * `concurrency` tasks at once (tasks still await RPC calls); further tasks wait in a bounded FIFO
+ * queue and are rejected with `QueueFullError` once `maxQueue` tasks are waiting. The RPC calls a
+ * task made are reported to its `onRpcCalls`, whether it succeeded or failed.
+ */
+export class WorkerPool {
+  private workers: PoolWorker[] = [];
+  private queue: Job[] = [];
+  private nextId = 0;
+
+  constructor(
+    public readonly size: number,
+    private maxQueue: number = 64,
+    private concurrency: number = 4
+  ) {
+    for (let i = 0; i < size; i++) {
+      this.workers.push(this.spawn());
+    }
+  }
+
+  public get queued() {
+    return this.queue.length;
+  }
+
+  public get running() {
+    return this.workers.reduce((sum, w) => sum + w.running.size, 0);
+  }
+
+  public run(
+    task: string,
+    rpc: string,
+    pool: string,
+    body: any,
+    onRpcCalls?: (calls: Record<string, number>) => void
+  ): Promise<string> {
+    return new Promise((resolve, reject) => {
+      const job = {
+        request: { id: this.nextId++, task, rpc, pool, body },
+        resolve,
+        reject,
+        onRpcCalls,
+      };
+      if (!this.dispatch(job)) {
+        if (this.queue.length >= this.maxQueue) {
+          return reject(new QueueFullError(this.queue.length));
+        }
+        this.queue.push(job);
+      }
+    });
+  }
+
+  public async close() {
+    const workers = this.workers;
+    this.workers = [];
+    await Promise.all(workers.map(({ worker }) => worker.terminate()));
+  }
+
+  private dispatch(job: Job): boolean {
+    let target: PoolWorker | null = null;
+    for (const w of this.workers) {
+      if (w.running.size < this.concurrency && (!target || w.running.size < target.running.size)) {
+        target = w;
+      }
+    }
+    if (!target) return false;
+
+    target.running.set(job.request.id, job);
+    target.worker.postMessage(job.request);
+    return true;
+  }
+
+  private drain() {
+    while (this.queue.length && this.dispatch(this.queue[0])) {
+      this.queue.shift();
+    }
+  }
+
+  private spawn(): PoolWorker {
+    const extension = path.extname(__filename);
+    const worker = new Worker(path.join(__dirname, `worker${extension}`), {
+      execArgv: extension === '.ts' ? ['-r', 'ts-node/register'] : undefined,
+    });
+    const poolWorker: PoolWorker = { worker, running: new Map() };
+
+    worker.on('message', ({ id, payload, error, rpcCalls }: WorkerResponse) => {
+      const job = poolWorker.running.get(id);
+      if (!job) return;
+      poolWorker.running.delete(id);
+      job.onRpcCalls?.(rpcCalls);
+      if (error) job.reject(error);
+      else job.resolve(payload);
+      this.drain();
+    });
+
+    // A crashed worker fails its in-flight tasks and is replaced.
+    const replace = (error: any) => {
+      const index = this.workers.indexOf(poolWorker);
+      if (index === -1) return;
+      poolWorker.running.forEach((job) => job.reject(error));
+      poolWorker.running.clear();
+      this.workers[index] = this.spawn();
+      this.drain();
+    };
+    worker.on('error', replace);
+    worker.on('exit', (code) => {
+      if (code !== 0) replace(new Error(`Worker stopped with exit code ${code}`));
+    });
+
+    return poolWorker;
+  }
+}
@@ -0,0 +1,99 @@
+import { Keypair } from "@solana/web3.js";
+import { LbPosition } from "../dlmm/types";
+import { PositionChanges } from "../server/positionChanges";
+
+const KEY = "rpc|pool|user";
+
+function position(publicKey: Keypair, totalXAmount: string): LbPosition {
+  return {
+    publicKey: publicKey.publicKey,
+    positionData: { totalXAmount, positionBinData: [] },
+    version: 1,
+  } as any;
+}
+
+const addresses = (positions: LbPosition[]) => positions.map((p) => p.publicKey.toBase58());
+
+describe("PositionChanges", () => {
+  const a = Keypair.generate();
+  const b = Keypair.generate();
+
+  it("answers the first call and older cursors with the full set", () => {
+    const changes = new PositionChanges();
+    const first = changes.delta(KEY, 100, 0, [position(a, "1"), position(b, "2")]);
+    expect(first.full).toBe(true);
+    expect(first.slot).toBe(100);
+    expect(addresses(first.userPositions)).toEqual(addresses([position(a, "1"), position(b, "2")]));
+
+    // A cursor from before tracking started, e.g. from a previous server process.
+    const stale = changes.delta(KEY, 110, 50, [position(a, "1"), position(b, "2")]);
+    expect(stale.full).toBe(true);
+    expect(stale.userPositions).toHaveLength(2);
+  });
+
+  it("returns only positions changed since the cursor slot", () => {
+    const changes = new PositionChanges();
+    changes.delta(KEY, 100, 0, [position(a, "1"), position(b, "2")]);
+
+    // Positions seen at the cursor slot itself are delivered again (at-least-once).
+    const again = changes.delta(KEY, 110, 100, [position(a, "1"), position(b, "2")]);
+    expect(again.full).toBe(false);
+    expect(again.userPositions).toHaveLength(2);
+    expect(again.slot).toBe(110);
+
+    const unchanged = changes.delta(KEY, 120, 110, [position(a, "1"), position(b, "2")]);
+    expect(unchanged.userPositions).toEqual([]);
+    expect(unchanged.closedPositions).toEqual([]);
+
+    const changed = changes.delta(KEY, 130, 120, [position(a, "1"), position(b, "3")]);
+    expect(addresses(changed.userPositions)).toEqual([b.publicKey.toBase58()]);
+    expect(changed.slot).toBe(130);
+  });
+
+  it("reports closed positions until the cursor passes them", () => {
+    const changes = new PositionChanges();
+    changes.delta(KEY, 100, 0, [position(a, "1"), position(b, "2")]);
+    changes.delta(KEY, 110, 100, [position(a, "1"), position(b, "2")]);
+
+    const closed = changes.delta(KEY, 120, 110, [position(a, "1")]);
+    expect(closed.closedPositions).toEqual([b.publicKey.toBase58()]);
+    expect(closed.userPositions).toEqual([]);
+
+    expect(changes.delta(KEY, 130, 120, [position(a, "1")]).closedPositions).toEqual([b.publicKey.toBase58()]);
+    expect(changes.delta(KEY, 140, 130, [position(a, "1")]).closedPositions).toEqual([]);
+
+    // A reopened position is no longer closed and counts as changed.
+    const reopened = changes.delta(KEY, 150, 140, [position(a, "1"), position(b, "2")]);
+    expect(reopened.closedPositions).toEqual([]);
+    expect(addresses(reopened.userPositions)).toEqual([b.publicKey.toBase58()]);
+  });
+
+  it("forgets closed positions once the cursor is past them", () => {
+    const changes = new PositionChanges();
+    changes.delta(KEY, 100, 0, [position(a, "1"), position(b, "2")]);
+    changes.delta(KEY, 110, 100, [position(a, "1")]);
+    // Still reported to a cursor at the closing slot.
+    expect(changes.delta(KEY, 120, 110, [position(a, "1")]).closedPositions).toEqual([b.publicKey.toBase58()]);
+    changes.delta(KEY, 130, 120, [position(a, "1")]);
+    expect((changes as any).tracked.get(KEY).closed.size).toBe(0);
+  });
+
+  it("drops keys nobody read for idleMs", () => {
+    const now = jest.spyOn(Date, "now").mockReturnValue(0);
+    try {
+      const changes = new PositionChanges(1000, 60_000);
+      changes.delta(KEY, 100, 0, [position(a, "1")]);
+      now.mockReturnValue(30_000);
+      changes.delta("other", 100, 0, [position(b, "2")]);
+      expect(changes.size).toBe(2);
+
+      now.mockReturnValue(61_000);
+      changes.delta("other", 110, 100, [position(b, "2")]);
+      expect(changes.size).toBe(1);
+      // The dropped key starts over with the full set.
+      expect(changes.delta(KEY, 120, 100, [position(a, "1")]).full).toBe(true);
+    } finally {
+      now.mockRestore();
+    }
+  });
+});